@@ -0,0 +1,69 @@
+"""
+wall-clock time of the dc power flow of all the windows of the year (8760 x T injections),
+the batched solve with the cached factorization compared with one sparse solve per injection
+e.g. python benchmark/dc_power_flow.py -n case118 -d data/case118/
+"""
+
+import sys
+import time
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import spsolve
+sys.path.append('.')
+from operation import PowerGrid
+from utils import DataWindows, get_data
+
+def benchmark_dc_power_flow(args):
+
+    T = args.T
+    grid = PowerGrid(f"configs/{args.pypower_case_name}.xlsx", sparse = True)
+    load_all, solar_all, wind_all = get_data(grid.no_load, args.data_folder, grid)
+    windows = DataWindows(load_all, solar_all, wind_all, T)
+
+    # the generation in proportion to pgmax meets the load and the renewables of each step
+    load = windows.windows['load'].reshape(len(windows), T, grid.no_load)
+    solar = windows.windows['solar'].reshape(len(windows), T, -1) if solar_all is not None else None
+    wind = windows.windows['wind'].reshape(len(windows), T, -1) if wind_all is not None else None
+    net_load = np.sum(load, axis = -1, keepdims = True)
+    net_load = net_load - (np.sum(solar, axis = -1, keepdims = True) if solar is not None else 0) \
+                        - (np.sum(wind, axis = -1, keepdims = True) if wind is not None else 0)
+    pg = net_load * grid.pgmax / np.sum(grid.pgmax)
+
+    start = time.perf_counter()
+    injection = grid.net_injection(pg, load, solar, wind)
+    injection_time = time.perf_counter() - start
+    print(f"========= {args.pypower_case_name}, {len(windows)} windows x T = {T}: {injection[..., 0].size} injections =========")
+    print(f"net injection: {injection_time:.2f} s")
+
+    start = time.perf_counter()
+    grid._dc_lu = None
+    pf = grid.dc_power_flow(injection)
+    batch_time = time.perf_counter() - start
+    print(f"batched dc power flow (factorization included): {batch_time:.2f} s")
+
+    # one sparse solve per injection, on the first injections
+    non_slack = np.delete(np.arange(grid.no_bus), grid.slack_idx)
+    Bbus_reduced = sp.csc_matrix(grid.Bbus)[non_slack][:, non_slack]
+    flat = injection.reshape(-1, grid.no_bus)
+    no_loop = min(args.no_loop, len(flat))
+    start = time.perf_counter()
+    for i in range(no_loop):
+        theta = np.full(grid.no_bus, float(grid.slack_theta))
+        theta[non_slack] += spsolve(Bbus_reduced, flat[i, non_slack] - grid.Pbusshift[non_slack])
+        pf_i = grid.Bf @ theta + grid.Pfshift
+    loop_time = (time.perf_counter() - start) / no_loop * len(flat)
+    assert np.allclose(pf_i, pf.reshape(-1, grid.no_branch)[no_loop - 1]), "the flows are not consistent"
+    print(f"one solve per injection (extrapolated from {no_loop}): {loop_time:.2f} s, speedup: {loop_time / batch_time:.0f}x")
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, default="case118")
+    parser.add_argument('-d', '--data_folder', type=str, default="data/case118")
+    parser.add_argument('-T', '--T', type=int, default=24)
+    parser.add_argument('--no_loop', type=int, default=2000)
+    args = parser.parse_args()
+
+    benchmark_dc_power_flow(args)
@@ -0,0 +1,63 @@
+"""
+compare the startup time of the power grid from the xlsx file and from its binary copy
+e.g. python benchmark/grid_loading.py -n case14 case118 case300
+"""
+
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+sys.path.append('.')
+from operation import read_grid, write_grid_binary
+from operation.grid_io import binary_dir
+
+def remove_binary(xlsx_path):
+    """make the binary copy missing so that the xlsx file is read"""
+    meta_path = os.path.join(binary_dir(xlsx_path), "meta.json")
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+def process_startup(xlsx_path):
+    """wall time of a new process that imports the package and builds the PowerGrid"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import sys; sys.path.append('.'); from operation import PowerGrid; PowerGrid('{xlsx_path}')"], check = True)
+    return time.perf_counter() - start
+
+def benchmark_grid_loading(pypower_case_name, repeat):
+
+    xlsx_path = f"configs/{pypower_case_name}.xlsx"
+    print(f"========= {pypower_case_name} =========")
+
+    read_time = {'xlsx': [], 'binary': []}
+    startup_time = {'xlsx': [], 'binary': []}
+    for _ in range(repeat):
+        remove_binary(xlsx_path)
+        start = time.perf_counter()
+        read_grid(xlsx_path, write_through = False)
+        read_time['xlsx'].append(time.perf_counter() - start)
+
+        write_grid_binary(xlsx_path)
+        start = time.perf_counter()
+        read_grid(xlsx_path)
+        read_time['binary'].append(time.perf_counter() - start)
+
+        remove_binary(xlsx_path)
+        startup_time['xlsx'].append(process_startup(xlsx_path))
+        write_grid_binary(xlsx_path)
+        startup_time['binary'].append(process_startup(xlsx_path))
+
+    print(f"read sheets: xlsx {np.median(read_time['xlsx']) * 1e3:.1f} ms, binary {np.median(read_time['binary']) * 1e3:.1f} ms")
+    print(f"process startup: xlsx {np.median(startup_time['xlsx']) * 1e3:.0f} ms, binary {np.median(startup_time['binary']) * 1e3:.0f} ms")
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, nargs='+', default=["case14", "case118", "case300"])
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    for name in args.pypower_case_name:
+        benchmark_grid_loading(name, args.repeat)
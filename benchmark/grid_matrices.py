@@ -0,0 +1,53 @@
+"""
+compare the memory and build time of the dense and sparse network matrices
+e.g. python benchmark/grid_matrices.py -n case118 case300
+"""
+
+import sys
+import time
+import numpy as np
+from scipy.sparse import issparse
+sys.path.append('.')
+from operation import Operation
+
+MATRICES = ["Cg", "Cl", "Cs", "Cw", "A", "Bf", "Bbus", "second_order_coeff"]
+
+def nbytes(matrix):
+    """memory of a dense or sparse matrix in bytes"""
+    if issparse(matrix):
+        matrix = matrix.tocsr()
+        return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+    return matrix.nbytes
+
+def benchmark_grid_matrices(pypower_case_name, T, repeat):
+    
+    xlsx_path = f"configs/{pypower_case_name}.xlsx"
+    print(f"========= {pypower_case_name}, T = {T} =========")
+    
+    for sparse in [False, True]:
+        build_time = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            grid_op = Operation(xlsx_path, T, reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1, sparse = sparse)
+            build_time.append(time.perf_counter() - start)
+        
+        start = time.perf_counter()
+        grid_op.get_opt(with_int = False)
+        opt_time = time.perf_counter() - start
+        
+        memory = sum(nbytes(getattr(grid_op, name)) for name in MATRICES if hasattr(grid_op, name))
+        print(f"sparse = {sparse}: build {np.median(build_time) * 1e3:.1f} ms, "
+            f"get_opt {opt_time * 1e3:.1f} ms, matrices {memory / 1024:.1f} KiB")
+
+if __name__ == "__main__":
+    
+    import argparse
+    
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, nargs='+', default=["case118", "case300"])
+    parser.add_argument('-T', '--T', type=int, default=24)
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    for name in args.pypower_case_name:
+        benchmark_grid_matrices(name, args.T, args.repeat)
@@ -0,0 +1,150 @@
+"""
+compare the runtime of group_data with the previous grouping (one pd.concat per hour and bus) on synthetic raw data
+the raw data has the same layout as data/Data_public/ and the outputs are compared byte by byte (test/group_data.py checks a few days)
+e.g. python benchmark/group_data.py --no_day 365
+"""
+
+import datetime
+import filecmp
+import os
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from tqdm import trange
+sys.path.append('.')
+from utils.group_data import group_data, return_renewable_incidences, CLIMATE_COLUMNS
+
+def make_raw_data(raw_dir, no_day, no_bus = 123, no_hour = 24, seed = 0):
+    """synthetic Data_public: the generator workbook, a climate workbook per day and the load, solar and wind files per day"""
+
+    rng = np.random.default_rng(seed)
+    for folder in ['Climate_2019', 'load_2019', 'solar_2019', 'wind_2019']:
+        os.makedirs(os.path.join(raw_dir, folder), exist_ok = True)
+
+    # one generator on every second bus, the first ones are solar and the others are wind
+    gen_bus = np.arange(1, no_bus + 1, 2)
+    no_solar, no_wind = len(gen_bus) // 2, len(gen_bus) - len(gen_bus) // 2
+    with pd.ExcelWriter(os.path.join(raw_dir, 'Generator_data.xlsx'), engine = 'xlsxwriter') as writer:
+        pd.DataFrame({'Gen Number': np.arange(1, len(gen_bus) + 1), 'Bus Number': gen_bus}).to_excel(writer, sheet_name = 'Gen data', index = False)
+        pd.DataFrame({'Solar Plant Number': np.arange(1, no_solar + 1), 'Generator Number': np.arange(1, no_solar + 1)}).to_excel(writer, sheet_name = 'Solar Plant Number', index = False)
+        pd.DataFrame({'Wind Plant Number': np.arange(1, no_wind + 1), 'Generator Number': np.arange(no_solar + 1, len(gen_bus) + 1)}).to_excel(writer, sheet_name = 'Wind Plant Number', index = False)
+
+    for day in trange(1, no_day + 1, desc = 'Writing raw data'):
+        # the climate files are workbooks with the .csv extension
+        climate_path = os.path.join(raw_dir, 'Climate_2019', f'climate_2019_Day{day}.csv')
+        with pd.ExcelWriter(climate_path + '.xlsx', engine = 'xlsxwriter') as writer:
+            for hour in range(1, no_hour + 1):
+                climate = {'Bus Number': np.arange(1, no_bus + 1)}
+                for column in CLIMATE_COLUMNS:
+                    climate[column] = np.round(rng.uniform(0, 300, no_bus), 3)
+                # an integer column as in the radiation at night
+                climate['Shortwave Radiation (w/m2)'] = rng.integers(0, 800, no_bus)
+                pd.DataFrame(climate).to_excel(writer, sheet_name = f'Hour {hour}', index = False)
+        os.replace(climate_path + '.xlsx', climate_path)
+        np.savetxt(os.path.join(raw_dir, 'load_2019', f'load_annual_D{day}.txt'), rng.uniform(10, 500, (no_hour, no_bus)), fmt = '%.6f')
+        for name, no_plant in [('solar', no_solar), ('wind', no_wind)]:
+            value = rng.uniform(0, 100, (no_plant, no_hour))
+            if name == 'solar':
+                value[:, :6] = 0 # night
+            np.savetxt(os.path.join(raw_dir, f'{name}_2019', f'{name}_annual_D{day}.txt'), value, fmt = '%.6g')
+
+def group_data_concat(raw_dir, save_dir, no_day):
+    """the previous grouping, each bus DataFrame grows by pd.concat once per hour"""
+
+    no_bus = 123
+    no_hour = 24
+
+    climate_hour = pd.read_excel(f"{raw_dir}/Climate_2019/climate_2019_Day" + '1.csv', sheet_name='Hour 1')
+    data_all = {key: pd.DataFrame(columns=climate_hour.columns) for key in range(1, no_bus+1)}
+
+    for i in trange(1, no_day+1, desc='Loading climate data'):
+        climate_data_day = pd.ExcelFile(f"{raw_dir}/Climate_2019/climate_2019_Day" + str(i) + '.csv')
+        for hour in [f'Hour {i}' for i in range(1,no_hour+1)]:
+            climate_data_hour = climate_data_day.parse(hour)
+            for bus_idx in range(1, no_bus +1):
+                if len(data_all[bus_idx]) == 0:
+                    data_all[bus_idx] = climate_data_hour.iloc[bus_idx-1:bus_idx]
+                else:
+                    data_all[bus_idx] = pd.concat([data_all[bus_idx], climate_data_hour.iloc[bus_idx-1:bus_idx]], ignore_index=True, axis=0)
+
+    load_all = []
+    for day in range(1, no_day+1):
+        load_all.append(pd.read_csv(f'{raw_dir}/load_2019/load_annual_D{day}.txt', sep=" ", header=None))
+    load_all = pd.concat(load_all, axis=0)
+    load_all.reset_index(drop=True, inplace=True)
+
+    solar_to_bus, wind_to_bus = return_renewable_incidences(no_bus, raw_dir)
+    for idx, data in data_all.items():
+        data['Solar'] = 0
+        data['Wind'] = 0
+
+    for name, to_bus in [('solar', solar_to_bus), ('wind', wind_to_bus)]:
+        series_all = {idx: [] for idx in to_bus.keys()}
+        for day in range(1, no_day+1):
+            series_day = pd.read_csv(f'{raw_dir}/{name}_2019/{name}_annual_D{day}.txt', sep=" ", header=None)
+            for idx in to_bus.keys():
+                if len(series_all[idx]) == 0:
+                    series_all[idx] = series_day.iloc[idx-1,:]
+                else:
+                    series_all[idx] = pd.concat([series_all[idx], series_day.iloc[idx-1,:]], axis=0, ignore_index=True)
+        for idx, bus_idx in to_bus.items():
+            data_all[bus_idx][name.capitalize()] = series_all[idx]
+
+    start_weekday = datetime.datetime(2019,1,1).weekday()
+    one_week = np.concatenate([np.arange(start_weekday, 7), (np.arange(0, start_weekday))])
+    hour = np.tile(np.arange(1,25), no_day)
+    weekday = np.tile(np.repeat(one_week, 24), 53)[:no_day * 24]
+
+    for bus in range(1, no_bus+1):
+        data_all[bus]['Hour_sin'] = np.sin(2 * np.pi * ( hour / 24))
+        data_all[bus]['Hour_cos'] = np.cos(2 * np.pi * ( hour / 24))
+        data_all[bus]['Weekday_sin'] = np.sin(2 * np.pi * ( weekday / 7))
+        data_all[bus]['Weekday_cos'] = np.cos(2 * np.pi * ( weekday / 7))
+        data_all[bus]['Load'] = load_all.iloc[:,bus-1]
+
+    columns = ['Weekday_sin', 'Weekday_cos', 'Hour_sin', 'Hour_cos', *CLIMATE_COLUMNS, 'Load', 'Solar', 'Wind']
+    os.makedirs(save_dir)
+    for bus, data in data_all.items():
+        data[columns].to_csv(f'{save_dir}/bus_{bus}.csv', index=False)
+    np.save(f'{save_dir}/solar_to_bus.npy', solar_to_bus, allow_pickle=True)
+    np.save(f'{save_dir}/wind_to_bus.npy', wind_to_bus, allow_pickle=True)
+
+def benchmark_group_data(args):
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        raw_dir = os.path.join(work_dir, 'Data_public')
+        make_raw_data(raw_dir, args.no_day)
+
+        result = {}
+        for name, func in [('concat', lambda save_dir: group_data_concat(raw_dir, save_dir, args.no_day)),
+                            ('preallocated', lambda save_dir: group_data(raw_dir, save_dir, args.no_day, n_workers = args.n_workers))]:
+            save_dir = os.path.join(work_dir, name)
+            start = time.perf_counter()
+            func(save_dir)
+            result[name] = (save_dir, time.perf_counter() - start)
+
+        # the index and series.npy of group_data are not written by the previous grouping
+        files = sorted(os.listdir(result['concat'][0]))
+        _, mismatch, errors = filecmp.cmpfiles(result['concat'][0], result['preallocated'][0], files, shallow = False)
+        assert len(mismatch) == 0 and len(errors) == 0, f"the output files are not byte-compatible: {mismatch + errors}"
+
+        print(f"{args.no_day} days, {len(files)} files are byte-compatible")
+        print(f"concat: {result['concat'][1]:.1f} s, preallocated: {result['preallocated'][1]:.1f} s, "
+            f"speedup: {result['concat'][1] / result['preallocated'][1]:.1f}x")
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--no_day', type=int, default=365)
+    parser.add_argument('--n_workers', type=int, default=None)
+    args = parser.parse_args()
+
+    benchmark_group_data(args)
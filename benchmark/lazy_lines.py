@@ -0,0 +1,78 @@
+"""
+compare the full line limits with the lazy line limit generation (Operation.solve_lazy)
+the branch limits should be tight, e.g. after utils.modify_data.modify_pfmax
+e.g. python benchmark/lazy_lines.py -x configs/case118.xlsx -d data/case118/ -T 24 -s 100 --solver GUROBI
+"""
+
+import sys
+import time
+import numpy as np
+sys.path.append('.')
+from operation import Operation
+from utils.modify_data import get_data
+from utils.data_windows import DataWindows
+from utils.sampling import random_params
+
+def benchmark_lazy_lines(args):
+
+    T = args.T
+    grid_op = {lazy: Operation(args.xlsx_path, T, reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1,
+                            sparse = True, vectorize = True) for lazy in [False, True]}
+    print(f"========= {args.xlsx_path}, T = {T}, no_branch = {grid_op[False].no_branch} =========")
+
+    rng = np.random.default_rng(0)
+    params_samples = []
+    if args.data_folder is not None:
+        # random windows of the assigned data
+        load_all, solar_all, wind_all = get_data(grid_op[False].no_load, args.data_folder, grid_op[False])
+        windows = DataWindows(load_all, solar_all, wind_all, T)
+        for i in rng.choice(len(windows), args.no_sample, replace = False):
+            params_samples.append(windows[i])
+    else:
+        # random samples around the default values
+        for _ in range(args.no_sample):
+            params_val_dict = random_params(grid_op[False], rng)
+            params_samples.append(params_val_dict)
+
+    # full line limits: the problems are built once
+    start = time.perf_counter()
+    uc, ed = grid_op[False].get_opt(with_int = False)
+    value_full = []
+    for params_val_dict in params_samples:
+        Operation.solve(uc, params_val_dict, solver = args.solver)
+        pg_uc = Operation.get_sol(uc)['pg']
+        Operation.solve(ed, {**params_val_dict, 'pg_uc': pg_uc}, solver = args.solver)
+        value_full.append((uc.value, ed.value))
+    full_time = time.perf_counter() - start
+
+    # lazy line limits: the problems are rebuilt when the active lines grow
+    start = time.perf_counter()
+    value_lazy, no_iter = [], []
+    for params_val_dict in params_samples:
+        uc, no_iter_uc = grid_op[True].solve_lazy('uc', params_val_dict, solver = args.solver, margin = args.margin)
+        pg_uc = Operation.get_sol(uc)['pg']
+        ed, no_iter_ed = grid_op[True].solve_lazy('ed', {**params_val_dict, 'pg_uc': pg_uc}, solver = args.solver, margin = args.margin)
+        value_lazy.append((uc.value, ed.value))
+        no_iter.append((no_iter_uc, no_iter_ed))
+    lazy_time = time.perf_counter() - start
+
+    no_iter = np.array(no_iter)
+    print(f"max relative difference of the objective: {np.max(np.abs(np.array(value_lazy) / np.array(value_full) - 1)):.2e}")
+    print(f"active lines: {np.sum(grid_op[True].active_lines)} / {grid_op[True].no_branch}")
+    print(f"iterations per sample: uc {no_iter[:, 0].mean():.2f} (first {no_iter[0, 0]}), ed {no_iter[:, 1].mean():.2f} (first {no_iter[0, 1]})")
+    print(f"full: {full_time:.2f} s, lazy: {lazy_time:.2f} s, speedup: {full_time / lazy_time:.2f}x")
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-x', '--xlsx_path', type=str, default="configs/case118.xlsx")
+    parser.add_argument('-d', '--data_folder', type=str, default=None, help="sample the windows of the data, random samples if None")
+    parser.add_argument('-T', '--T', type=int, default=24)
+    parser.add_argument('-s', '--no_sample', type=int, default=100)
+    parser.add_argument('-m', '--margin', type=float, default=0.1)
+    parser.add_argument('--solver', type=str, default="GUROBI")
+    args = parser.parse_args()
+
+    benchmark_lazy_lines(args)
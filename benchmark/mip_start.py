@@ -0,0 +1,77 @@
+"""
+time to the first incumbent and total solve time of the ncuc with the integer variables over consecutive windows,
+with and without the mip start (the previous window, the relaxation and the rounding checked by the ed)
+the first incumbent (the time and the gap to the optimum) is reported by scip, for gurobi it is from a second
+solve stopped at the first solution (SolutionLimit = 1)
+e.g. python benchmark/mip_start.py -n case118 -d data/case118/ --solver GUROBI
+"""
+
+import sys
+import time
+import numpy as np
+sys.path.append('.')
+from operation import Operation, MipStart, first_incumbent
+from utils import DataWindows, get_data
+
+def solve(prob, params, solver, warm_start = None):
+    """the total time, the time to the first incumbent, its relative gap to the optimum and the optimal value"""
+    start = time.perf_counter()
+    Operation.solve(prob, params, solver = solver, warm_start = warm_start)
+    total, value = time.perf_counter() - start, prob.value
+    incumbent = first_incumbent(prob)
+    if incumbent is not None:
+        return total, *incumbent, value
+    if solver.upper() == 'GUROBI':
+        Operation.solve(prob, params, solver = solver, warm_start = warm_start, SolutionLimit = 1)
+        return total, prob.solver_stats.solve_time, (prob.value - value) / np.abs(value), value
+    return total, np.nan, np.nan, value
+
+def benchmark_mip_start(args):
+
+    T = args.T
+    grid_op = Operation(f"configs/{args.pypower_case_name}.xlsx", T, reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1,
+                        sparse = True, vectorize = True)
+    load_all, solar_all, wind_all = get_data(grid_op.no_load, args.data_folder, grid_op)
+    windows = DataWindows(load_all, solar_all, wind_all, T)
+
+    uc, uc_start = grid_op.get_opt(True, 'uc'), grid_op.get_opt(True, 'uc')
+    mip_start = MipStart(grid_op, methods = args.methods, solver = args.cont_solver)
+
+    result = {'cold': [], 'start': [], 'candidate': [], 'method': []}
+    for i in range(args.first_window, args.first_window + args.no_window):
+        params = windows[i]
+        result['cold'].append(solve(uc, params, args.solver))
+        warm_start = mip_start.get(uc_start, params)
+        result['candidate'].append(mip_start.info['time'])
+        result['method'].append(mip_start.info['method'])
+        result['start'].append(solve(uc_start, params, args.solver, warm_start))
+        mip_start.update(uc_start)
+        cold, start = result['cold'][-1], result['start'][-1]
+        print(f"window {i}: {mip_start.info['method']} start, first incumbent {cold[1]:.2f} s ({cold[2]:.1%}) -> "
+            f"{start[1]:.2f} s ({start[2]:.1%}), total {cold[0]:.2f} -> {start[0]:.2f} s (+ {result['candidate'][-1]:.2f} s candidates)")
+        assert np.abs(cold[3] - start[3]) <= 1e-3 * np.abs(cold[3]), f"the optimal value of window {i} is not the same"
+
+    cold, start = np.array(result['cold']), np.array(result['start'])
+    print(f"========= {args.pypower_case_name}, T = {T}, {args.no_window} windows, {args.solver} =========")
+    print(f"{'':<16}{'first incumbent (s)':>22}{'mean gap':>12}{'total (s)':>12}")
+    for name, stats in [('without start', cold), ('with start', start)]:
+        print(f"{name:<16}{np.sum(stats[:, 1]):>22.2f}{np.mean(stats[:, 2]):>12.2%}{np.sum(stats[:, 0]):>12.2f}")
+    chosen = ', '.join(f"{method}: {result['method'].count(method)}" for method in sorted(set(result['method']), key = str))
+    print(f"candidates (relaxation and ed checks): {np.sum(result['candidate']):.2f} s, chosen: {chosen}")
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, default="case118")
+    parser.add_argument('-d', '--data_folder', type=str, default="data/case118/")
+    parser.add_argument('-T', '--T', type=int, default=24)
+    parser.add_argument('-f', '--first_window', type=int, default=0)
+    parser.add_argument('-w', '--no_window', type=int, default=5)
+    parser.add_argument('-m', '--methods', type=str, nargs='+', default=['previous', 'relaxation', 'rounding'])
+    parser.add_argument('--solver', type=str, default="GUROBI")
+    parser.add_argument('--cont_solver', type=str, default="GUROBI", help="the solver of the relaxation and the ed")
+    args = parser.parse_args()
+
+    benchmark_mip_start(args)
@@ -0,0 +1,53 @@
+"""
+compare the size and the solve time of the phase angle and the ptdf formulation
+e.g. python benchmark/ptdf.py -n case39 case118 -T 24 --solver HIGHS
+"""
+
+import sys
+import time
+import numpy as np
+import cvxpy as cp
+sys.path.append('.')
+from operation import Operation
+from utils import random_params
+
+def benchmark_ptdf(pypower_case_name, T, with_int, solver, no_sample):
+
+    xlsx_path = f"configs/{pypower_case_name}.xlsx"
+    print(f"========= {pypower_case_name}, T = {T}, with_int = {with_int} =========")
+
+    for formulation in ['angle', 'ptdf']:
+        grid_op = Operation(xlsx_path, T, reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1,
+                            sparse = True, vectorize = True, formulation = formulation)
+        uc = grid_op.get_opt(with_int, 'uc')
+
+        data, _, _ = uc.get_problem_data(solver = getattr(cp, solver))
+        param_prog = data[cp.settings.PARAM_PROB]
+        no_var, no_eq, no_cons = param_prog.reduced_A.var_len, data['dims'].zero, param_prog.constr_size
+        # the ptdf rows are dense: every flow depends on all the injections
+        no_nnz = sum(data[key].nnz for key in ['A', 'F'] if key in data)
+
+        rng = np.random.default_rng(0)
+        solve_time = []
+        for _ in range(no_sample):
+            params_val_dict = random_params(grid_op, rng)
+            Operation.solve(uc, params_val_dict, solver = solver)
+            solve_time.append(uc.solver_stats.solve_time)
+
+        print(f"{formulation}: no var {no_var}, no eq {no_eq}, no ineq {no_cons - no_eq}, nnz {no_nnz}, "
+            f"solve {np.median(solve_time) * 1e3:.1f} ms (median over {no_sample}), value {uc.value:.4f}")
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, nargs='+', default=["case39", "case118"])
+    parser.add_argument('-T', '--T', type=int, default=24)
+    parser.add_argument('-i', '--with_int', default=False, action='store_true')
+    parser.add_argument('-s', '--no_sample', type=int, default=10)
+    parser.add_argument('--solver', type=str, default="GUROBI")
+    args = parser.parse_args()
+
+    for name in args.pypower_case_name:
+        benchmark_ptdf(name, args.T, args.with_int, args.solver.upper(), args.no_sample)
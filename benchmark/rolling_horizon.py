@@ -0,0 +1,68 @@
+"""
+wall-clock time of the year-long rolling horizon (day-ahead ncuc and real-time ed) with the problems kept
+across the days, compared with rebuilding the operation every day for the initial condition
+e.g. python benchmark/rolling_horizon.py -n case118 -d data/case118/ --solver GUROBI
+"""
+
+import sys
+import time
+import numpy as np
+sys.path.append('.')
+from operation import Operation, RollingHorizon
+from utils import DataWindows, get_data
+
+def benchmark_rolling_horizon(args):
+
+    T = args.T
+    xlsx_path = f"configs/{args.pypower_case_name}.xlsx"
+    kwargs = dict(reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1, sparse = True, vectorize = True)
+
+    start = time.perf_counter()
+    grid_op = Operation(xlsx_path, T, init_param = True, **kwargs)
+    load_all, solar_all, wind_all = get_data(grid_op.no_load, args.data_folder, grid_op)
+    actual = DataWindows(load_all, solar_all, wind_all, T)
+    simulator = RollingHorizon(grid_op, with_int = args.with_int, solver = args.solver)
+    results = simulator.run(actual, no_day = args.no_day, result_dir = args.result_dir, verbose = False)
+    run_time = time.perf_counter() - start
+    no_day = len(results['optimal'])
+
+    print(f"========= {args.pypower_case_name}, {no_day} days =========")
+    print(f"solved days: {np.sum(results['optimal'])} / {no_day}")
+    print(f"total ed cost: {np.nansum(results['ed_cost']):.2f}, load shed: {np.nansum(results['load_shed']):.4f}, "
+        f"curtailment: {np.nansum(results['solar_curtailment']) + np.nansum(results['wind_curtailment']):.4f}")
+    print(f"rolling horizon: {run_time:.1f} s, {run_time / no_day:.3f} s per day")
+
+    # rebuild the operation every day (the previous workflow), on the first days
+    start = time.perf_counter()
+    pg_init = grid_op.pg_init
+    for day in range(args.no_rebuild):
+        grid_op_day = Operation(xlsx_path, T, **kwargs)
+        grid_op_day.pg_init = pg_init
+        uc, ed = grid_op_day.get_opt(args.with_int)
+        Operation.solve(uc, actual[day * T], solver = args.solver)
+        sol_uc = Operation.get_sol(uc, T = T, reshaped = True)
+        params_ed = {**actual[day * T], 'pg_uc': sol_uc['pg'].flatten()}
+        if args.with_int:
+            grid_op_day.ug_init = np.round(sol_uc['ug'][-1])
+            params_ed['ug'] = np.round(sol_uc['ug']).flatten()
+        Operation.solve(ed, params_ed, solver = args.solver)
+        pg_init = Operation.get_sol(ed, T = T, reshaped = True)['pg'][-1]
+    rebuild_time = (time.perf_counter() - start) / args.no_rebuild
+    print(f"rebuild every day: {rebuild_time:.3f} s per day, speedup: {rebuild_time / (run_time / no_day):.2f}x")
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, default="case118")
+    parser.add_argument('-d', '--data_folder', type=str, default="data/case118")
+    parser.add_argument('-T', '--T', type=int, default=24)
+    parser.add_argument('-s', '--no_day', type=int, default=None, help="all the days of the data if None")
+    parser.add_argument('-r', '--no_rebuild', type=int, default=5, help="the days to time the rebuild")
+    parser.add_argument('-o', '--result_dir', type=str, default=None)
+    parser.add_argument('-i', '--with_int', default=False, action='store_true')
+    parser.add_argument('--solver', type=str, default="GUROBI")
+    args = parser.parse_args()
+
+    benchmark_rolling_horizon(args)
@@ -0,0 +1,42 @@
+"""
+throughput of Operation.solve_batch with different number of workers
+e.g. python benchmark/solve_batch.py -n case118 -w 1 2 4 8 --solver GUROBI
+"""
+
+import sys
+import time
+import numpy as np
+sys.path.append('.')
+from operation import Operation
+from utils import random_params
+
+def benchmark_solve_batch(args):
+    
+    rng = np.random.default_rng(0)
+    T = args.T
+    grid_op = Operation(f"configs/{args.pypower_case_name}.xlsx", T, reserve = 0.0, 
+                        pg_init_ratio = 0.5, ug_init = 1, sparse = True, vectorize = True)
+    
+    params_batch = random_params(grid_op, rng, args.no_sample)
+    
+    for n_workers in args.n_workers:
+        start = time.perf_counter()
+        _, status, _ = grid_op.solve_batch('uc', params_batch, with_int = False, 
+                                        n_workers = n_workers, solver = args.solver)
+        elapsed = time.perf_counter() - start
+        print(f"n_workers = {n_workers}: {elapsed:.2f} s, {args.no_sample / elapsed:.1f} samples/s, "
+            f"optimal {np.mean(status == 'optimal') * 100:.0f}%")
+
+if __name__ == "__main__":
+    
+    import argparse
+    
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, default="case118")
+    parser.add_argument('-s', '--no_sample', type=int, default=200)
+    parser.add_argument('-T', '--T', type=int, default=24)
+    parser.add_argument('-w', '--n_workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--solver', type=str, default="GUROBI")
+    args = parser.parse_args()
+    
+    benchmark_solve_batch(args)
@@ -0,0 +1,56 @@
+"""
+compare the per-call latency of return_standard_form with and without the cached compiler
+e.g. python benchmark/standard_form.py -n case14 case39 --solver OSQP
+"""
+
+import sys
+import time
+import numpy as np
+sys.path.append('.')
+from utils import load_grid_from_xlsx, return_standard_form, clear_compiler_cache, random_params
+
+def benchmark_standard_form(pypower_case_name, T, repeat, solver):
+
+    rng = np.random.default_rng(0)
+
+    grid_op = load_grid_from_xlsx(
+        xlsx_path = f"configs/{pypower_case_name}.xlsx", T = T,
+        reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1
+        )
+    uc_cvxpy, ed_cvxpy = grid_op.get_opt(with_int = False)
+    print(f"========= {pypower_case_name}, T = {T} =========")
+
+    params_val_dict = random_params(grid_op, rng)
+
+    # before: the problem is canonicalized by cvxpy in every call
+    latency_before = []
+    for _ in range(repeat):
+        clear_compiler_cache(uc_cvxpy)
+        start = time.perf_counter()
+        return_standard_form(uc_cvxpy, params_val_dict, solver)
+        latency_before.append(time.perf_counter() - start)
+
+    # after: only the parameters are applied
+    return_standard_form(uc_cvxpy, params_val_dict, solver)
+    latency_after = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        return_standard_form(uc_cvxpy, params_val_dict, solver)
+        latency_after.append(time.perf_counter() - start)
+
+    before, after = np.median(latency_before), np.median(latency_after)
+    print(f"uncached: {before * 1e3:.2f} ms/call, cached: {after * 1e3:.2f} ms/call, speedup: {before / after:.1f}x")
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, nargs='+', default=["case14", "case39"])
+    parser.add_argument('-T', '--T', type=int, default=24)
+    parser.add_argument('-r', '--repeat', type=int, default=20)
+    parser.add_argument('--solver', type=str, default="GUROBI")
+    args = parser.parse_args()
+
+    for name in args.pypower_case_name:
+        benchmark_standard_form(name, args.T, args.repeat, args.solver)
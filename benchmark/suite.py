@@ -0,0 +1,225 @@
+"""
+benchmark suite of the stages of the operation problems, with a comparison against a stored baseline
+the stages are timed separately for each case, T and with/without the integer variables:
+    - grid_load: PowerGrid from the binary copy of the xlsx file
+    - get_data: the data of the case (utils.get_data)
+    - build: get_opt of the uc or ed
+    - canonicalize: the first canonicalization of the problem by cvxpy
+    - solve: Operation.solve with the compiled problem
+    - get_sol: Operation.get_sol
+    - standard_form: return_standard_form with the cached compiler
+the default solvers are open source (CLARABEL, and SCIP with the integer variables), so that it runs without Gurobi
+e.g. python benchmark/suite.py run -o benchmark/results/current.json
+     python benchmark/suite.py compare benchmark/results/baseline.json benchmark/results/current.json
+"""
+
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+import cvxpy as cp
+import numpy as np
+sys.path.append('.')
+from operation import Operation, PowerGrid, write_grid_binary
+from utils import get_data, return_standard_form, random_params
+
+# the solver options of the time limit (s) of the integer solve
+TIME_LIMIT = {
+    'SCIP': lambda t: {'scip_params': {'limits/time': t}},
+    'GUROBI': lambda t: {'TimeLimit': t},
+    'HIGHS': lambda t: {'time_limit': t},
+}
+
+def _timed(func, repeat):
+    """the times of repeat calls of func, and the output of the last call"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = func()
+        times.append(time.perf_counter() - start)
+    return times, output
+
+def _record(results, key, times, **info):
+    results[key] = {'median': float(np.median(times)), 'min': float(np.min(times)), 'times': [float(t) for t in times], **info}
+
+def _skip(results, key, reason):
+    results[key] = {'skipped': reason}
+
+def _params(grid_op, T, prob_kind, with_int, rng):
+    """the random load and renewables around the defaults, and the dispatch (and commitment) of the ed"""
+    params = random_params(grid_op, rng)
+    if prob_kind == 'ed':
+        params['pg_uc'] = np.tile(grid_op.pgmax, T) * rng.uniform(0.3, 0.7, T * grid_op.no_gen)
+        if with_int:
+            params['ug'] = np.ones(T * grid_op.no_gen)
+    return params
+
+def benchmark_case(args, case_name, results):
+
+    xlsx_path = f"configs/{case_name}.xlsx"
+    rng = np.random.default_rng(0)
+
+    # the reads from the binary copy are timed
+    write_grid_binary(xlsx_path)
+    times, _ = _timed(lambda: PowerGrid(xlsx_path, sparse = args.sparse), args.repeat)
+    _record(results, f"{case_name}/grid_load", times)
+
+    data_folder = os.path.join(args.data_dir, case_name)
+    if os.path.isdir(data_folder):
+        grid_op = Operation(xlsx_path, 1, reserve = 0.0, sparse = args.sparse)
+        # the first call writes the binary store of the data folder
+        get_data(grid_op.no_load, data_folder, grid_op)
+        times, _ = _timed(lambda: get_data(grid_op.no_load, data_folder, grid_op), args.repeat)
+        _record(results, f"{case_name}/get_data", times)
+    else:
+        _skip(results, f"{case_name}/get_data", f"{data_folder} is not found")
+
+    for T in args.T:
+        grid_op = Operation(xlsx_path, T, reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1,
+                            sparse = args.sparse, vectorize = args.vectorize, formulation = args.formulation)
+        for with_int in args.with_int:
+            solver = args.int_solver if with_int else args.solver
+            solver_options = TIME_LIMIT[solver](args.time_limit) if with_int and solver in TIME_LIMIT else {}
+            compile_solver = args.int_compile_solver if with_int else args.compile_solver
+
+            for prob_kind in ['uc', 'ed']:
+                prefix = f"{case_name}/T{T}/{'int' if with_int else 'con'}/{prob_kind}"
+
+                # a new problem for each canonicalization
+                build_times, canon_times = [], []
+                for _ in range(args.repeat):
+                    times, prob = _timed(lambda: grid_op.get_opt(with_int, prob_kind), 1)
+                    build_times += times
+                    times, _ = _timed(lambda: prob.get_problem_data(solver = getattr(cp, solver)), 1)
+                    canon_times += times
+                _record(results, f"{prefix}/build", build_times)
+                _record(results, f"{prefix}/canonicalize", canon_times, solver = solver)
+
+                # the first solve is not timed, the problem is compiled and the solver is set up
+                params_all = [_params(grid_op, T, prob_kind, with_int, rng) for _ in range(args.repeat + 1)]
+                Operation.solve(prob, params_all[0], solver = solver, **solver_options)
+                solve_times, status = [], []
+                for params in params_all[1:]:
+                    times, _ = _timed(lambda: Operation.solve(prob, params, solver = solver, **solver_options), 1)
+                    solve_times += times
+                    status.append(prob.status)
+                _record(results, f"{prefix}/solve", solve_times, solver = solver, status = status)
+
+                if prob.status in [cp.OPTIMAL, cp.OPTIMAL_INACCURATE]:
+                    times, _ = _timed(lambda: Operation.get_sol(prob, T = T, reshaped = True), args.repeat)
+                    _record(results, f"{prefix}/get_sol", times)
+                else:
+                    _skip(results, f"{prefix}/get_sol", f"the problem is {prob.status}")
+
+                try:
+                    return_standard_form(prob, params_all[0], compile_solver)
+                    times, _ = _timed(lambda: return_standard_form(prob, params_all[1], compile_solver), args.repeat)
+                    _record(results, f"{prefix}/standard_form", times, solver = compile_solver)
+                except (cp.error.SolverError, AssertionError) as e:
+                    # e.g. the miqp is only canonicalized by gurobi
+                    _skip(results, f"{prefix}/standard_form", f"{compile_solver}: {str(e).strip() or type(e).__name__}")
+
+                if args.verbose:
+                    print(f"{prefix}: build {np.median(build_times):.3f} s, canonicalize {np.median(canon_times):.3f} s, "
+                        f"solve {np.median(solve_times):.3f} s ({status[-1]})")
+
+def run(args):
+
+    results = {}
+    for case_name in args.pypower_case_name:
+        benchmark_case(args, case_name, results)
+
+    meta = {
+        'date': datetime.datetime.now().isoformat(timespec = 'seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'cvxpy': cp.__version__,
+        'args': {key: value for key, value in vars(args).items() if key != 'func'},
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok = True)
+    with open(args.output, 'w') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent = 1)
+    print(f"{len(results)} results are written to {args.output}")
+
+def compare_results(baseline, current, threshold = 0.2, min_time = 5e-3, statistic = 'min'):
+    """
+    compare the times of the stages in both results
+    threshold: a stage is slower if its time is above (1 + threshold) times the baseline
+    min_time: the stages faster than min_time (s) are not flagged, as they are dominated by the noise
+    statistic: 'min' (less sensitive to the load of the machine) or 'median' of the repeats
+    return: [(key, baseline time, current time, ratio, slower)] of the common stages
+    """
+    rows = []
+    for key, base in baseline['results'].items():
+        curr = current['results'].get(key)
+        if curr is None or statistic not in base or statistic not in curr:
+            continue
+        ratio = curr[statistic] / base[statistic] if base[statistic] > 0 else np.inf
+        slower = ratio > 1 + threshold and curr[statistic] > min_time
+        rows.append((key, base[statistic], curr[statistic], ratio, slower))
+    return rows
+
+def compare(args):
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    with open(args.current, 'r') as f:
+        current = json.load(f)
+
+    rows = compare_results(baseline, current, args.threshold, args.min_time, args.statistic)
+    width = max([len(row[0]) for row in rows] + [5])
+    print(f"{args.statistic} time of the repeats")
+    print(f"{'stage':<{width}}  {'baseline':>10}  {'current':>10}  {'ratio':>6}")
+    for key, base, curr, ratio, slower in rows:
+        if args.only_slower and not slower:
+            continue
+        print(f"{key:<{width}}  {base * 1e3:>8.2f}ms  {curr * 1e3:>8.2f}ms  {ratio:>6.2f}{'  SLOWER' if slower else ''}")
+
+    missing = sorted(set(baseline['results']) - set(current['results']))
+    if len(missing) > 0:
+        print(f"{len(missing)} stages of the baseline are not in the current results, e.g. {missing[0]}")
+    no_slower = sum(row[4] for row in rows)
+    print(f"{no_slower} of {len(rows)} stages are more than {args.threshold:.0%} slower than the baseline")
+    # a non-zero exit code for the scripts
+    sys.exit(1 if no_slower > 0 else 0)
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(required = True)
+
+    parser_run = subparsers.add_parser('run', help = 'time the stages and write the results to a json file')
+    parser_run.add_argument('-n', '--pypower_case_name', type=str, nargs='+', default=["case14", "case39", "case118"])
+    parser_run.add_argument('-T', '--T', type=int, nargs='+', default=[1, 6, 24])
+    parser_run.add_argument('-i', '--with_int', type=int, nargs='+', default=[0, 1], choices=[0, 1])
+    parser_run.add_argument('-d', '--data_dir', type=str, default="data", help="the data of a case is in data_dir/case_name")
+    parser_run.add_argument('-r', '--repeat', type=int, default=3)
+    parser_run.add_argument('-o', '--output', type=str, default="benchmark/results/current.json")
+    parser_run.add_argument('-f', '--formulation', type=str, default="angle")
+    parser_run.add_argument('--no_sparse', dest='sparse', default=True, action='store_false')
+    parser_run.add_argument('--no_vectorize', dest='vectorize', default=True, action='store_false')
+    parser_run.add_argument('--solver', type=str, default="CLARABEL")
+    parser_run.add_argument('--int_solver', type=str, default="SCIP")
+    parser_run.add_argument('--compile_solver', type=str, default="OSQP")
+    parser_run.add_argument('--int_compile_solver', type=str, default="GUROBI")
+    parser_run.add_argument('--time_limit', type=float, default=60, help="the time limit (s) of the integer solve")
+    parser_run.add_argument('-v', '--verbose', default=False, action='store_true')
+    parser_run.set_defaults(func = run)
+
+    parser_compare = subparsers.add_parser('compare', help = 'flag the stages slower than the baseline')
+    parser_compare.add_argument('baseline', type=str)
+    parser_compare.add_argument('current', type=str)
+    parser_compare.add_argument('-t', '--threshold', type=float, default=0.2)
+    parser_compare.add_argument('--min_time', type=float, default=5e-3)
+    parser_compare.add_argument('-s', '--statistic', type=str, default="min", choices=["min", "median"])
+    parser_compare.add_argument('--only_slower', default=False, action='store_true')
+    parser_compare.set_defaults(func = compare)
+
+    args = parser.parse_args()
+    args.func(args)
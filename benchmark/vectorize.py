@@ -0,0 +1,51 @@
+"""
+compare the build and canonicalization time of the per-step (loop) and the vectorized formulation
+e.g. python benchmark/vectorize.py -n case118 -T 1 24 168
+"""
+
+import sys
+import time
+import cvxpy as cp
+sys.path.append('.')
+from operation import Operation
+
+def benchmark_vectorize(pypower_case_name, T, with_int, solver):
+    
+    xlsx_path = f"configs/{pypower_case_name}.xlsx"
+    print(f"========= {pypower_case_name}, T = {T}, with_int = {with_int} =========")
+
+    for vectorize in [False, True]:
+        grid_op = Operation(xlsx_path, T, reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1, 
+                            sparse = True, vectorize = vectorize)
+        
+        start = time.perf_counter()
+        uc, ed = grid_op.get_opt(with_int)
+        build_time = time.perf_counter() - start
+        
+        compile_time = {}
+        for name, prob in [("uc", uc), ("ed", ed)]:
+            start = time.perf_counter()
+            try:
+                prob.get_problem_data(solver = getattr(cp, solver))
+                compile_time[name] = f"{time.perf_counter() - start:.3f} s"
+            except MemoryError:
+                # ! cvxpy densifies the (no_var, no_param) coefficients of a quadratic objective
+                compile_time[name] = "out of memory"
+        
+        print(f"vectorize = {vectorize}: build {build_time:.3f} s, "
+            f"compile uc {compile_time['uc']}, compile ed {compile_time['ed']}, "
+            f"no constraints uc {len(uc.constraints)}")
+
+if __name__ == "__main__":
+    
+    import argparse
+    
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, default="case118")
+    parser.add_argument('-T', '--T', type=int, nargs='+', default=[1, 24, 168])
+    parser.add_argument('-i', '--with_int', default=False, action='store_true')
+    parser.add_argument('-s', '--solver', type=str, default="OSQP", help="OSQP for continuous, SCIP or GUROBI with integer")
+    args = parser.parse_args()
+    
+    for T in args.T:
+        benchmark_vectorize(args.pypower_case_name, T, args.with_int, args.solver.upper())
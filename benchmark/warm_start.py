@@ -0,0 +1,72 @@
+"""
+iterations and wall-clock time of a rolling-window sweep with the shifted warm start, against the cold solve 
+(cvxpy warm_start = False) and the default of cvxpy (the unshifted solution of the previous window)
+e.g. python benchmark/warm_start.py -n case118 -d data/case118/ --solver OSQP
+"""
+
+import sys
+import time
+import numpy as np
+import cvxpy as cp
+from tqdm import trange
+sys.path.append('.')
+from operation import Operation
+from utils import DataWindows, get_data
+
+def sweep(grid_op, prob, windows, no_window, solver, start, **solver_options):
+    """
+    solve the consecutive windows and return the total iterations, the solve time and the number of solved windows
+    start: 'cold', 'previous' (the default of cvxpy) or 'shifted' (Operation.shift_solution)
+    """
+    
+    no_iter, solve_time, no_solved = 0, 0., 0
+    warm_start_sol = False if start == 'cold' else None
+    
+    for i in trange(no_window, desc = start):
+        params_val_dict = windows[i]
+        
+        start_time = time.perf_counter()
+        grid_op.solve(prob, params_val_dict, solver = solver, warm_start = warm_start_sol, **solver_options)
+        solve_time += time.perf_counter() - start_time
+        no_iter += prob.solver_stats.num_iters or 0
+        no_solved += prob.status == cp.OPTIMAL
+        
+        if start == 'shifted':
+            warm_start_sol = grid_op.shift_solution(prob)
+    
+    return no_iter, solve_time, no_solved
+
+def benchmark_warm_start(args):
+    
+    grid_op = Operation(f"configs/{args.pypower_case_name}.xlsx", args.T, reserve = 0.0, 
+                        pg_init_ratio = 0.5, ug_init = 1, sparse = True, vectorize = True)
+    load_all, solar_all, wind_all = get_data(grid_op.no_load, args.data_folder, grid_op)
+    windows = DataWindows(load_all, solar_all, wind_all, args.T)
+    
+    no_window = len(windows) if args.no_window is None else args.no_window
+    solver_options = {} if args.max_iter is None else {'max_iter': args.max_iter}
+    
+    result = {}
+    for start in ['cold', 'previous', 'shifted']:
+        prob = grid_op.get_opt(with_int = False, prob_kind = 'uc')
+        result[start] = sweep(grid_op, prob, windows, no_window, args.solver, start, **solver_options)
+        print(f"{start}: {result[start][0]} iterations, {result[start][1]:.1f} s, {result[start][2]}/{no_window} windows optimal")
+    
+    for start in ['previous', 'shifted']:
+        print(f"{start} against cold, iteration saving: {1 - result[start][0] / max(result['cold'][0], 1):.1%}, "
+            f"time saving: {1 - result[start][1] / result['cold'][1]:.1%}")
+
+if __name__ == "__main__":
+    
+    import argparse
+    
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, default="case118")
+    parser.add_argument('-d', '--data_folder', type=str, default="data/case118/")
+    parser.add_argument('-T', '--T', type=int, default=24)
+    parser.add_argument('-w', '--no_window', type=int, default=None, help="default to the full 8760-hour sweep")
+    parser.add_argument('--solver', type=str, default="OSQP")
+    parser.add_argument('--max_iter', type=int, default=None, help="the iteration limit of osqp, the default of cvxpy if None")
+    args = parser.parse_args()
+    
+    benchmark_warm_start(args)
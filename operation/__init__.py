@@ -1,2 +1,7 @@
 from .power_operation import Operation
-from .power_grid import PowerGrid
\ No newline at end of file
+from .power_grid import PowerGrid
+from .grid_io import read_grid, write_grid_binary, file_hash
+from .simulation import RollingHorizon
+from .profiling import PROFILE, ProfileStats, enable_profiling, disable_profiling, profiling
+from .mip_start import MipStart, SCIP_START, first_incumbent
+from .solution_cache import SOLUTION_CACHE, SolutionCache, enable_solution_cache, disable_solution_cache
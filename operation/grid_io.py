@@ -0,0 +1,90 @@
+"""
+binary copy of the xlsx grid configuration for fast loading
+each sheet is saved as a numpy structured array in a folder next to the xlsx file,
+e.g. configs/case14.xlsx -> configs/case14_grid/{basic, bus, gen, load, branch, solar, wind}.npy,
+together with meta.json that records the content hash of the xlsx file.
+The binary copy is memory-mapped when loaded, the xlsx file is read instead if it is missing or stale.
+"""
+
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+
+def file_hash(path):
+    """sha256 of the file content"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def binary_dir(xlsx_path):
+    """the folder of the binary copy of the xlsx file"""
+    return os.path.splitext(xlsx_path)[0] + '_grid'
+
+def write_grid_binary(xlsx_path, all_sheets = None):
+    """
+    write the binary copy of the xlsx file
+    all_sheets: {sheet_name: DataFrame} as read from the xlsx file, read again if None
+    """
+    if all_sheets is None:
+        all_sheets = pd.read_excel(xlsx_path, sheet_name=None, engine='openpyxl')
+
+    folder = binary_dir(xlsx_path)
+    os.makedirs(folder, exist_ok = True)
+
+    # ! write to temporary files and rename, so that the readers (e.g. workers) never see a partial file
+    for sheet_name, sheet in all_sheets.items():
+        tmp_path = os.path.join(folder, f"{sheet_name}.npy.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.save(f, sheet.to_records(index = False))
+        os.replace(tmp_path, os.path.join(folder, f"{sheet_name}.npy"))
+
+    # the meta file is written last, it marks the binary copy as complete
+    meta = {'xlsx_hash': file_hash(xlsx_path), 'sheets': list(all_sheets.keys())}
+    tmp_path = os.path.join(folder, f"meta.json.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(folder, "meta.json"))
+
+def read_grid_binary(xlsx_path):
+    """
+    read the binary copy of the xlsx file as {sheet_name: DataFrame}
+    return None if the binary copy is missing or stale
+    """
+    meta_path = os.path.join(binary_dir(xlsx_path), "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+
+    with open(meta_path, 'r') as f:
+        meta = json.load(f)
+    if meta['xlsx_hash'] != file_hash(xlsx_path):
+        return None
+
+    all_sheets = {}
+    for sheet_name in meta['sheets']:
+        sheet_path = os.path.join(binary_dir(xlsx_path), f"{sheet_name}.npy")
+        if not os.path.exists(sheet_path):
+            return None
+        all_sheets[sheet_name] = pd.DataFrame(np.load(sheet_path, mmap_mode = 'r'))
+
+    return all_sheets
+
+def read_grid(xlsx_path, write_through = False):
+    """
+    read all the sheets of the grid configuration as {sheet_name: DataFrame}
+    the binary copy is used if it is up to date, otherwise the xlsx file is read
+    (and the binary copy is written if write_through, it is otherwise written by from_pypower and modify_pfmax
+    or by write_grid_binary, so that loading a grid does not write next to the configuration)
+    """
+    all_sheets = read_grid_binary(xlsx_path)
+    if all_sheets is not None:
+        return all_sheets
+
+    all_sheets = pd.read_excel(xlsx_path, sheet_name=None, engine='openpyxl')
+    if write_through:
+        write_grid_binary(xlsx_path, all_sheets)
+
+    return all_sheets
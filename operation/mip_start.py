@@ -0,0 +1,202 @@
+"""
+the mip start of the ncuc with the integer variables
+the candidate commitments ug are derived from
+    - 'previous': the commitment of the previous window shifted by one step (the last step is repeated)
+    - 'relaxation': the continuous relaxation of the ncuc (Operation.ncuc_with_int(relax = True)),
+        the units used by the relaxation are committed
+    - 'rounding': the relaxation rounded at a threshold
+the start-up and shut-down yg and zg follow from the changes of ug (from ug_init).
+Each candidate is checked by the ed with the integer variables: the start is feasible if the ed does not spill
+(es), and the reserve is met. The feasible candidate of the lowest cost (the ed cost with the fixed, start-up
+and shut-down costs) is passed to the solver with only the integer variables, so that the solver completes
+the dispatch. The ramp limits of the ncuc are not in the ed, a start that violates them is rejected by the solver.
+"""
+
+import time
+import warnings
+import numpy as np
+import cvxpy as cp
+from cvxpy.reductions.solvers.conic_solvers.scip_conif import SCIP
+
+METHODS = ('previous', 'relaxation', 'rounding')
+# the costs of the commitment variables
+_COMMITMENT_COST = {'ug': 'cf', 'yg': 'csu', 'zg': 'csd'}
+# the (major, minor) versions of cvxpy in which ScipStart.solve_via_data is tested
+SCIP_START_CVXPY = ((1, 9), (1, 9))
+
+class ScipStart(SCIP):
+    """
+    scip with the values of the variables as a partial start solution (cvxpy does not pass the warm start to scip)
+    solve_via_data is copied from SCIP.solve_via_data of cvxpy 1.9.3 (reductions/solvers/conic_solvers/scip_conif.py)
+    and relies on its private helpers. cvxpy has no hook for the start of scip, so outside SCIP_START_CVXPY the stock
+    interface of cvxpy solves the problem without the start, with a warning
+    """
+
+    def name(self):
+        return 'SCIP_START'
+
+    def apply(self, problem):
+        data, inv_data = super().apply(problem)
+        data['init_value'] = np.concatenate([np.full(var.size, np.nan) if var.value is None
+                                            else np.ravel(var.value, order = 'F') for var in problem.variables])
+        return data, inv_data
+
+    @staticmethod
+    def supported():
+        """if the version of cvxpy is tested and has the helpers used by solve_via_data"""
+        version = tuple(int(v) for v in cp.__version__.split('.')[:2])
+        helpers = ['_define_data', '_create_variables', '_add_constraints', '_set_params', '_solve']
+        return SCIP_START_CVXPY[0] <= version <= SCIP_START_CVXPY[1] and all(hasattr(SCIP, name) for name in helpers)
+
+    def solve_via_data(self, data, warm_start, verbose, solver_opts, solver_cache = None):
+        if not self.supported():
+            warnings.warn(f"the scip start is not supported with cvxpy {cp.__version__}, solved without the start")
+            return super().solve_via_data(data, warm_start, verbose, solver_opts, solver_cache)
+        
+        from pyscipopt.scip import Model
+
+        model = Model()
+        model.redirectOutput()
+        A, b, c, dims = self._define_data(data)
+        variables = self._create_variables(model, data, c)
+        constraints = self._add_constraints(model, variables, A, b, dims)
+        self._set_params(model, verbose, solver_opts, data, dims)
+        if warm_start:
+            # scip completes the partial solution before the branch and bound
+            sol = model.createPartialSol()
+            for var, value in zip(variables, data['init_value']):
+                if not np.isnan(value):
+                    model.setSolVal(sol, var, value)
+            model.addSol(sol)
+        return self._solve(model, variables, constraints, data, dims)
+
+SCIP_START = ScipStart()
+
+def first_incumbent(prob):
+    """the time (s) of the first incumbent of the last solve of prob and its relative gap to the best solution,
+    None if the solver does not report them (only scip)"""
+    stats = prob.solver_stats.extra_stats if prob.solver_stats is not None else None
+    if not isinstance(stats, dict) or 'model' not in stats:
+        return None
+    model = stats['model']
+    sols = model.getSols()
+    if len(sols) == 0:
+        return None
+    # the objectives of scip are without the constant of the problem
+    first, best = min(sols, key = model.getSolTime), model.getBestSol()
+    value, best_value = model.getSolObjVal(first), model.getSolObjVal(best)
+    return model.getSolTime(first), (value - best_value) / max(np.abs(best_value), 1e-9)
+
+class MipStart:
+
+    def __init__(self, grid_op, methods = METHODS, solver: str = 'GUROBI', threshold = 0.5, tol = 1e-4,
+                **solver_options):
+        """
+        grid_op: the operation of the ncuc with the integer variables
+        methods: the candidates in METHODS, 'previous' needs the commitment of the last window (update)
+        solver: the solver of the relaxation and the ed (continuous)
+        threshold: the rounding threshold of the relaxed ug for 'rounding'
+        tol: the tolerance (p.u.) of the relaxed ug for 'relaxation', of the spill and the reserve of the check
+        """
+
+        assert set(methods) <= set(METHODS), f"methods must be in {METHODS}, got {methods}"
+        self.grid_op = grid_op
+        self.T = grid_op.T
+        self.methods = tuple(methods)
+        self.solver = solver
+        self.solver_options = solver_options
+        self.threshold = threshold
+        self.tol = tol
+
+        # built once
+        self.relaxed = grid_op.ncuc_with_int(relax = True) if set(methods) & {'relaxation', 'rounding'} else None
+        self.ed = grid_op.ed(with_int = True)
+
+        # the (T, no_gen) commitment and dispatch of the last window
+        self.previous = None
+        # the candidates and the time of the last get
+        self.info = {}
+
+    def update(self, uc):
+        """keep the commitment of the solved uc for the 'previous' candidate of the next window"""
+        if uc.status not in [cp.OPTIMAL, cp.OPTIMAL_INACCURATE]:
+            self.previous = None
+            return
+        sol = {var.name(): var.value for var in uc.variables()}
+        self.previous = (np.round(sol['ug']).reshape(self.T, -1), sol['pg'].reshape(self.T, -1))
+
+    def candidates(self, parameters):
+        """{method: ((T, no_gen) ug, (T, no_gen) pg)} of the methods, the relaxation is solved once for both"""
+
+        candidates = {}
+        if 'previous' in self.methods and self.previous is not None:
+            ug, pg = self.previous
+            candidates['previous'] = (np.concatenate([ug[1:], ug[-1:]]), np.concatenate([pg[1:], pg[-1:]]))
+
+        if self.relaxed is not None:
+            self.grid_op.solve(self.relaxed, parameters, solver = self.solver, **self.solver_options)
+            if self.relaxed.status in [cp.OPTIMAL, cp.OPTIMAL_INACCURATE]:
+                sol = {var.name(): var.value for var in self.relaxed.variables()}
+                ug, pg = sol['ug'].reshape(self.T, -1), sol['pg'].reshape(self.T, -1)
+                if 'relaxation' in self.methods:
+                    candidates['relaxation'] = ((ug > self.tol).astype(float), pg)
+                if 'rounding' in self.methods:
+                    candidates['rounding'] = ((ug >= self.threshold).astype(float), pg)
+
+        return candidates
+
+    def commitment(self, ug, parameters):
+        """{'ug', 'yg', 'zg'} of the vectorized ncuc from the (T, no_gen) ug, yg and zg are the start-ups and shut-downs"""
+        if self.T == 1:
+            return {'ug': ug.flatten()}
+        ug_init = parameters.get('ug_init', getattr(self.grid_op, 'ug_init', None))
+        diff = np.diff(ug, axis = 0, prepend = np.reshape(ug_init, (1, -1)))
+        return {'ug': ug.flatten(), 'yg': np.maximum(diff, 0).flatten(), 'zg': np.maximum(-diff, 0).flatten()}
+
+    def check(self, ug, pg, parameters):
+        """
+        solve the ed with the commitment ug and the dispatch pg (clipped to the limits of ug)
+        return: feasible, the cost of the start (the ed cost with the fixed, start-up and shut-down costs) and the load shed
+        """
+
+        grid_op = self.grid_op
+        pg_uc = np.clip(pg, grid_op.pgmin * ug, grid_op.pgmax * ug)
+        ed_params = {param.name(): parameters[param.name()] for param in self.ed.parameters() if param.name() in parameters}
+        grid_op.solve(self.ed, {**ed_params, 'ug': ug.flatten(), 'pg_uc': pg_uc.flatten()},
+                    solver = self.solver, **self.solver_options)
+        if self.ed.status not in [cp.OPTIMAL, cp.OPTIMAL_INACCURATE]:
+            return False, np.inf, np.nan
+
+        sol = {var.name(): var.value for var in self.ed.variables()}
+        reserve = np.broadcast_to(parameters.get('reserve', grid_op.reserve), (self.T,))
+        pg_ed = sol['pg'].reshape(self.T, -1)
+        feasible = np.sum(sol['es']) <= self.tol and \
+                    np.all(np.sum(grid_op.pgmax * ug, axis = 1) >= np.sum(pg_ed, axis = 1) + reserve - self.tol)
+
+        cost = self.ed.value
+        for name, value in self.commitment(ug, parameters).items():
+            coeff = parameters.get(_COMMITMENT_COST[name], getattr(grid_op, _COMMITMENT_COST[name]))
+            cost += np.sum(np.reshape(value, (self.T, -1)) * coeff)
+        return feasible, cost, np.sum(sol['ls'])
+
+    def get(self, uc, parameters):
+        """
+        the mip start of uc for the parameters, the feasible candidate of the lowest cost
+        return: the warm start of Operation.solve, {'primal': {var_name: value}} with None for the continuous variables,
+            or None if no candidate is feasible. self.info records the candidates, the chosen method and the time
+        """
+
+        start_time = time.perf_counter()
+        best, best_cost, info = None, np.inf, {}
+        for method, (ug, pg) in self.candidates(parameters).items():
+            feasible, cost, load_shed = self.check(ug, pg, parameters)
+            info[method] = {'feasible': feasible, 'cost': cost, 'load_shed': load_shed}
+            if feasible and cost < best_cost:
+                best, best_cost = (method, ug), cost
+
+        self.info = {'candidates': info, 'method': None if best is None else best[0],
+                    'time': time.perf_counter() - start_time}
+        if best is None:
+            return None
+        commitment = self.commitment(best[1], parameters)
+        return {'primal': {var.name(): commitment.get(var.name()) for var in uc.variables()}, 'dual': {}}
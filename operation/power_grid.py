@@ -1,18 +1,25 @@
 import pandas as pd
+import hashlib
 from collections.abc import Iterable
 import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+from .grid_io import read_grid
 
 class PowerGrid:
 
-    def __init__(self, system_path: str):
+    def __init__(self, system_path: str, sparse: bool = False):
 
         """
         construct the basic power grid
         system_path: the path to the system configuration file, must be an excel file
+            (its binary copy next to the excel file is loaded instead if it is up to date, see operation.grid_io)
+        sparse: if True, the incidence and susceptance matrices (Cg, Cl, Cs, Cw, A, Bf, Bbus) 
+            are stored as scipy.sparse csr matrices, otherwise as dense numpy arrays
         """
         
-        # read the excel file
-        all_sheets = pd.read_excel(system_path, sheet_name=None, engine='openpyxl')
+        # read the excel file (or its binary copy)
+        all_sheets = read_grid(system_path)
         basic, bus, gen, load, branch = all_sheets["basic"], all_sheets["bus"], all_sheets["gen"], all_sheets["load"], all_sheets["branch"]
         if "solar" in all_sheets:
             solar = all_sheets["solar"]
@@ -23,6 +30,8 @@ class PowerGrid:
         else:
             wind = None
 
+        self.sparse = sparse
+
         # no
         self.no_bus = len(bus)
         self.no_gen = len(gen)
@@ -41,10 +50,7 @@ class PowerGrid:
             
             # generator incidence matrix
             if column == "idx":
-                self.Cg = np.zeros((self.no_bus, self.no_gen))
-                for i in range(self.no_gen):
-                    idx = PowerGrid._to_python_idx(gen["idx"][i])
-                    self.Cg[idx, i] = 1
+                self.Cg = self._incidence(gen["idx"].values, self.no_bus)
             
             # to p.u. on ramp and generation constraints
             elif "r" in column or "pg" in column:
@@ -58,10 +64,7 @@ class PowerGrid:
         # self.cgv = self.cgv * baseMVA
         
         # load
-        self.Cl = np.zeros((self.no_bus, self.no_load))
-        for i in range(self.no_load):
-            idx = PowerGrid._to_python_idx(load["idx"][i])
-            self.Cl[idx, i] = 1
+        self.Cl = self._incidence(load["idx"].values, self.no_bus)
         self.load_default = load["default"].values / baseMVA # to pu
         self.cls = load["cls"].values
         
@@ -69,45 +72,133 @@ class PowerGrid:
         if solar is not None:
             self.solar_default = solar["default"].values / baseMVA
             self.csc = solar["csc"].values
-            self.Cs = np.zeros((self.no_bus, self.no_solar))
-            for i in range(self.no_solar):
-                idx = PowerGrid._to_python_idx(solar["idx"][i])
-                self.Cs[idx, i] = 1
+            self.Cs = self._incidence(solar["idx"].values, self.no_bus)
         
         # wind
         if wind is not None:
             self.wind_default = wind["default"].values / baseMVA
             self.cwc = wind["cwc"].values
-            self.Cw = np.zeros((self.no_bus, self.no_wind))
-            for i in range(self.no_wind):
-                idx = PowerGrid._to_python_idx(wind["idx"][i])
-                self.Cw[idx, i] = 1
+            self.Cw = self._incidence(wind["idx"].values, self.no_bus)
         
         # branch
-        Cf = np.zeros((self.no_branch, self.no_bus))
-        Ct = np.zeros((self.no_branch, self.no_bus))
-        for i in range(self.no_branch):
-            fbus = PowerGrid._to_python_idx(branch["fbus"][i])
-            tbus = PowerGrid._to_python_idx(branch["tbus"][i])
-            Cf[i, fbus] = 1
-            Ct[i, tbus] = 1
-        self.A = Cf - Ct # bus-to-branch incidence matrix
+        Cf = self._incidence(branch["fbus"].values, self.no_bus, sparse = True).T
+        Ct = self._incidence(branch["tbus"].values, self.no_bus, sparse = True).T
+        A = (Cf - Ct).tocsr() # bus-to-branch incidence matrix
 
         Bff = 1/(branch["x"].values * branch["tap_ratio"].values)
-        self.Bf = np.diag(Bff) @ self.A # branch susceptance matrix
-        self.Bbus = self.A.T @ self.Bf  # bus susceptance matrix
+        Bf = (sp.diags(Bff) @ A).tocsr() # branch susceptance matrix
+        Bbus = (A.T @ Bf).tocsr()         # bus susceptance matrix
+
+        if self.sparse:
+            self.A, self.Bf, self.Bbus = A, Bf, Bbus
+        else:
+            self.A, self.Bf, self.Bbus = A.toarray(), Bf.toarray(), Bbus.toarray()
+        
         self.Pfshift = -branch["shift_angle"].values / np.pi * Bff
-        self.Pbusshift = self.A.T @ self.Pfshift
+        self.Pbusshift = A.T @ self.Pfshift
         self.Gsh = bus['GS'].values / baseMVA
 
         self.pfmax = branch["pfmax"].values / baseMVA
         
         self.baseMVA = baseMVA
+    
+    def _incidence(self, idx, no_row, sparse = None):
+        """
+        build the (no_row, len(idx)) incidence matrix in one step
+        idx: the 1-based row index of each column (element)
+        """
+        sparse = self.sparse if sparse is None else sparse
+        row = np.asarray(PowerGrid._to_python_idx(idx), dtype = int)
+        col = np.arange(len(row))
+        C = sp.csr_matrix((np.ones(len(row)), (row, col)), shape = (no_row, len(row)))
+        return C if sparse else C.toarray()
+    
+    def get_ptdf(self):
+        """
+        the power transfer distribution factor with the slack bus as the reference
+        return:
+            - PTDF: (no_branch, no_bus), pf = PTDF @ (P - Pbusshift) + Pfshift for the net injection P
+            - X: (no_bus, no_bus), theta = X @ (P - Pbusshift) + slack_theta,
+                the inverse of the reduced Bbus with zero row and column at the slack bus
+        """
+        non_slack = np.delete(np.arange(self.no_bus), self.slack_idx)
+        Bbus_reduced = sp.csc_matrix(self.Bbus)[non_slack][:, non_slack]
+        
+        X = np.zeros((self.no_bus, self.no_bus))
+        X[np.ix_(non_slack, non_slack)] = splu(Bbus_reduced.tocsc()).solve(np.eye(len(non_slack)))
+        PTDF = np.asarray(self.Bf @ X)
+        
+        return PTDF, X
+        
+    def _dc_factor(self):
+        """
+        the sparse LU factorization of the reduced Bbus (the slack bus removed), computed once and cached
+        the cache is keyed by the content of Bbus and the slack bus, so that it is factorized again after a change of 
+        the reactances or the branches (e.g. an outage), once Bbus is updated
+        return: the splu object and the index of the non-slack buses
+        """
+        Bbus = sp.csr_matrix(self.Bbus)
+        Bbus.sum_duplicates()
+        key = hashlib.sha256(b''.join([np.int64(self.slack_idx).tobytes(), Bbus.indptr.tobytes(), 
+                                        Bbus.indices.tobytes(), Bbus.data.tobytes()])).hexdigest()
+        if getattr(self, '_dc_lu', None) is None or self._dc_lu[0] != key:
+            non_slack = np.delete(np.arange(self.no_bus), self.slack_idx)
+            Bbus_reduced = Bbus.tocsc()[non_slack][:, non_slack]
+            self._dc_lu = (key, splu(Bbus_reduced.tocsc()), non_slack)
+        return self._dc_lu[1:]
+    
+    def net_injection(self, pg, load, solar = None, wind = None):
+        """
+        the net injection of the buses, Cg pg - Cl load + Cs solar + Cw wind
+        pg, load, solar, wind: (..., no_gen), (..., no_load), (..., no_solar), (..., no_wind) arrays in p.u.,
+            e.g. (no_window, T, no_load) for the windows of the data
+        return: (..., no_bus) array
+        """
+        load = np.asarray(load, dtype = float)
+        shape = load.shape[:-1]
+        injection = -(self.Cl @ load.reshape(-1, self.no_load).T)
+        for value, C in [(pg, self.Cg), (solar, getattr(self, 'Cs', None)), (wind, getattr(self, 'Cw', None))]:
+            if value is not None and C is not None:
+                value = np.asarray(value, dtype = float)
+                injection += C @ value.reshape(-1, C.shape[1]).T
+        return np.asarray(injection).T.reshape(*shape, self.no_bus)
+    
+    def dc_power_flow(self, injection, return_theta = False, chunk_size = 65536):
+        """
+        the dc power flow of a batch of net injections: Bbus theta + Pbusshift = injection with theta[slack] = slack_theta
+        the reduced Bbus is factorized once (see _dc_factor) and all the injections are solved at once
+        injection: (..., no_bus) array of the net injections in p.u., e.g. from net_injection.
+            The injections are balanced by the slack bus, its entry is not used
+        chunk_size: the number of injections solved at once, to bound the memory
+        return: the (..., no_branch) branch flows, and the (..., no_bus) phase angles if return_theta
+            the same as get_pf of Operation for the optimized theta
+        """
+        lu, non_slack = self._dc_factor()
+        injection = np.asarray(injection, dtype = float)
+        shape = injection.shape[:-1]
+        injection = injection.reshape(-1, self.no_bus)
+        
+        pf = np.empty((len(injection), self.no_branch))
+        theta = np.empty((len(injection), self.no_bus)) if return_theta else None
+        for start in range(0, len(injection), chunk_size):
+            stop = min(start + chunk_size, len(injection))
+            # Bbus has zero row sums, the slack angle shifts all the angles
+            rhs = (injection[start:stop, non_slack] - self.Pbusshift[non_slack]).T
+            theta_chunk = np.full((self.no_bus, stop - start), float(self.slack_theta))
+            theta_chunk[non_slack] += lu.solve(np.asfortranarray(rhs))
+            pf[start:stop] = np.asarray(self.Bf @ theta_chunk).T + self.Pfshift
+            if return_theta:
+                theta[start:stop] = theta_chunk.T
         
+        pf = pf.reshape(*shape, self.no_branch)
+        if return_theta:
+            return pf, theta.reshape(*shape, self.no_bus)
+        return pf
+    
     @staticmethod
     def _to_python_idx(idx):
         """convert to the 0-based index"""
         if isinstance(idx, Iterable):
             return [int(i) - 1 for i in idx]
         else:
-            return int(idx) - 1
\ No newline at end of file
+            return int(idx) - 1
@@ -1,10 +1,37 @@
 from .power_grid import PowerGrid
+from .profiling import PROFILE, timed, init_worker_profiling, call_with_stats
+from .mip_start import SCIP_START
+from .solution_cache import SOLUTION_CACHE, problem_identity, enable_solution_cache
 import cvxpy as cp
 import numpy as np
+import scipy.sparse as sp
+import os
+import time
+import warnings
+from types import SimpleNamespace
+from concurrent.futures import ProcessPoolExecutor
+
+# the version of the formulations of get_opt, bump it on every change of the constraints or the objective
+# so that the compiled problems cached on disk (utils.problem_cache) are rebuilt
+FORMULATION_VERSION = 1
+# the methods that build the problems, their source is hashed in the key of the compiled problems as well
+FORMULATION_METHODS = ('__init__', 'get_opt', '_flow_constraint', '_monitored_lines', '_power_balance_constraint',
+                    '_network_constraints', '_ptdf_constraints', '_attach_angle', '_angle_variable', '_parameter',
+                    '_initial_condition', '_pfmax', '_costs', '_tile', '_slack_constraints', '_variable_constraints',
+                    'ncuc_no_int', 'ncuc_with_int', 'ed')
+# the solvers of utils.standard_solver.StandardFormSolver, see Operation.solve_batch(..., compiled_dir = ...)
+STANDARD_SOLVERS = ('OSQP', 'HIGHS', 'CLARABEL')
+# the (major, minor) versions of cvxpy in which the osqp solver cache is tested, see Operation._set_warm_start
+OSQP_CACHE_CVXPY = ((1, 9), (1, 9))
+# the data that can be declared as the parameters, see Operation(..., parametric = ...)
+PARAMETRIC = ('init', 'reserve', 'pfmax', 'cost')
+# the names of these parameters, they have the default values of the grid
+_DEFAULT_PARAMETERS = {'pg_init', 'ug_init', 'reserve', 'pfmax', 'cv', 'cls', 'csc', 'cwc', 'ces', 'cf', 'csu', 'csd'}
 
 class Operation(PowerGrid):
 
-    def __init__(self, system_path: str, T, reserve, pg_init_ratio = None, ug_init = None):
+    def __init__(self, system_path: str, T, reserve, pg_init_ratio = None, ug_init = None, sparse = False,
+                vectorize = False, formulation = 'angle', init_param = False, parametric = ()):
         """
         formulate the power grid operation problem
         inherit from the PowerGrid class
@@ -12,6 +39,23 @@ class Operation(PowerGrid):
         reserve: the array of reserve with length of T or a scalar for single step
         pg_init: the initial pg with length of pg, does not need for single step
         ug_init: the initial ug with legnth of R, does not need for single step
+        sparse: if True, the network matrices are scipy.sparse matrices (recommended for large grids)
+        vectorize: if True, each constraint family is written as one matrix-level constraint over 
+            the whole horizon instead of one constraint per time step (faster to canonicalize)
+        formulation: 'angle' to model the network by the phase angle variables, 
+            or 'ptdf' to express the branch flows by the PTDF matrix and the net injections with 
+            one system-wide power balance per time step (no phase angle variables)
+        init_param: if True, the initial condition of the ncuc is the parameters 'pg_init' (and 'ug_init' with 
+            the integer variables), so that the same problem can be solved from different initial conditions 
+            (e.g. the rolling horizon in operation.simulation). Otherwise pg_init and ug_init are constants.
+            the same as 'init' in parametric.
+        parametric: the data declared as the DPP parameters instead of the constants, any of
+            - 'init': the initial condition 'pg_init' and 'ug_init' of the ncuc
+            - 'reserve': the (T,) system-level reserve 'reserve' of the ncuc
+            - 'pfmax': the (no_branch,) branch flow limit 'pfmax'
+            - 'cost': the linear costs 'cv', 'cls', 'csc', 'cwc', 'ces', 'cf', 'csu' and 'csd' (cv2 is kept constant)
+            the parameters default to the values of the grid, so that one compiled problem serves every value
+            and Operation.solve only needs the changed ones.
         
         1. ncuc_no_int: T = 1 or T > 1
         2. ncuc_with_int: T = 1 or T > 1
@@ -30,37 +74,83 @@ class Operation(PowerGrid):
             otherwise the standard QP will generate extra dummy variables
         """
 
-        super().__init__(system_path)
+        super().__init__(system_path, sparse = sparse)
+
+        # the arguments to rebuild the same operation in the worker processes
+        self.init_args = dict(system_path = system_path, T = T, reserve = reserve, 
+                            pg_init_ratio = pg_init_ratio, ug_init = ug_init, 
+                            sparse = sparse, vectorize = vectorize, formulation = formulation, 
+                            init_param = init_param, parametric = tuple(parametric))
 
         self.T = T
+        self.vectorize = vectorize
+        assert set(parametric) <= set(PARAMETRIC), f"parametric must be in {PARAMETRIC}, got {parametric}"
+        self.parametric = tuple(parametric) + (('init',) if init_param and 'init' not in parametric else ())
+        self.init_param = 'init' in self.parametric
+        
+        # the branches with the flow limits (None for all), see solve_lazy
+        self.monitored_lines = None
+        self.active_lines = np.zeros(self.no_branch, dtype = bool)
+        self._lazy_probs = {}
+        
+        assert formulation in ['angle', 'ptdf'], "formulation must be 'angle' or 'ptdf'"
+        self.formulation = formulation
+        if self.formulation == 'ptdf':
+            self.PTDF, self.ptdf_X = self.get_ptdf()
         self.reserve = reserve * np.ones(T)      # system-level reserve
         self.first_order_coeff = np.tile(self.cv, T)
-        self.second_order_coeff = np.diag(np.tile(self.cv2, T))
+        if self.sparse:
+            self.second_order_coeff = sp.diags(np.tile(self.cv2, T).astype(float), format = 'csc')
+        else:
+            self.second_order_coeff = np.diag(np.tile(self.cv2, T))
         
-        if self.T > 1:
+        if self.T > 1 and not self.init_param:
             assert pg_init_ratio is not None, "pg_init_ratio is required for T > 1"
             assert ug_init is not None, "ug_init is required for T > 1"
+        if pg_init_ratio is not None:
             self.pg_init = self.pgmax * pg_init_ratio
+        if ug_init is not None:
             self.ug_init = ug_init * np.ones(self.no_gen)
             
-    def get_opt(self, with_int):
-        """return the optimization problem"""
-        if with_int:
-            return self.ncuc_with_int(), self.ed(with_int)
+    @timed('get_opt')
+    def get_opt(self, with_int, prob_kind = None):
+        """return the optimization problem
+        prob_kind: 'uc' or 'ed' to only build the requested problem, return both (uc, ed) if None"""
+        ncuc = self.ncuc_with_int if with_int else self.ncuc_no_int
+        if prob_kind is None:
+            return ncuc(), self.ed(with_int)
+        elif prob_kind == 'uc':
+            return ncuc()
+        elif prob_kind == 'ed':
+            return self.ed(with_int)
         else:
-            return self.ncuc_no_int(), self.ed(with_int)
+            raise ValueError(f"prob_kind must be 'uc', 'ed' or None, got {prob_kind}")
     
     def _flow_constraint(self, constraints, theta):
         """theta is a matrix
         for T = 1, theta is a (1, no) matrix, the same in the followings"""
 
+        if self.monitored_lines is not None and len(self.monitored_lines) == 0:
+            return constraints
+        lines = self._monitored_lines()
+        Bf, Pfshift, pfmax = self.Bf[lines], self.Pfshift[lines], self._pfmax()[lines]
+
+        if self.vectorize:
+            flow = theta @ Bf.T + self._tile(Pfshift)
+            constraints += [flow <= self._tile(pfmax), flow >= -self._tile(pfmax)]
+            return constraints
+
         for t in range(self.T):
             constraints += [
-                self.Bf @ theta[t] + self.Pfshift <= self.pfmax, 
-                self.Bf @ theta[t] + self.Pfshift >= -self.pfmax
+                Bf @ theta[t] + Pfshift <= pfmax, 
+                Bf @ theta[t] + Pfshift >= -pfmax
             ]
         return constraints
     
+    def _monitored_lines(self):
+        """the index of the branches with the flow limits, slice(None) for all the branches"""
+        return slice(None) if self.monitored_lines is None else self.monitored_lines
+    
     def _power_balance_constraint(self, constraints, theta, pg_all, 
                                 load_all, solar_all = None, wind_all = None):
         
@@ -73,6 +163,17 @@ class Operation(PowerGrid):
         a vector if T = 1 and a matrix of (T, no) if T > 1
         """
         
+        if self.vectorize:
+            generation = pg_all @ self.Cg.T
+            if self.no_solar > 0:
+                generation += solar_all @ self.Cs.T
+            if self.no_wind > 0:
+                generation += wind_all @ self.Cw.T
+            constraints += [
+                theta @ self.Bbus.T + self._tile(self.Pbusshift) == generation - load_all @ self.Cl.T
+            ]
+            return constraints
+
         for t in range(self.T):
             generation = self.Cg @ pg_all[t]
             if self.no_solar > 0:
@@ -84,6 +185,101 @@ class Operation(PowerGrid):
             ]
         return constraints
     
+    def _network_constraints(self, constraints, theta, pg_all, load_all, solar_all = None, wind_all = None):
+        """
+        branch flow limit, power balance and slack bus angle of the network formulation
+        return: the constraints, and the (T, no_bus) phase angle 
+            (the variable theta, or an expression of the net injections for the ptdf formulation)
+        """
+        
+        if self.formulation == 'ptdf':
+            return self._ptdf_constraints(constraints, pg_all, load_all, solar_all, wind_all)
+        
+        constraints = self._flow_constraint(constraints=constraints, theta=theta)
+        constraints = self._power_balance_constraint(constraints, theta, pg_all, load_all, solar_all, wind_all)
+        constraints = self._slack_constraints(constraints=constraints, theta=theta)
+        
+        return constraints, theta
+    
+    def _ptdf_constraints(self, constraints, pg_all, load_all, solar_all = None, wind_all = None):
+        """
+        the ptdf formulation of the network: the branch flows are PTDF @ (net injection - Pbusshift) + Pfshift
+        and the net injections are balanced at the system level
+        return: the constraints, and the (T, no_bus) phase angle as an expression of the net injections
+        """
+        
+        injection = pg_all @ self.Cg.T - load_all @ self.Cl.T
+        if self.no_solar > 0:
+            injection += solar_all @ self.Cs.T
+        if self.no_wind > 0:
+            injection += wind_all @ self.Cw.T
+        
+        if self.monitored_lines is None or len(self.monitored_lines) > 0:
+            lines = self._monitored_lines()
+            PTDF, pfmax = self.PTDF[lines], self._pfmax()[lines]
+            flow = injection @ PTDF.T + self._tile(self.Pfshift[lines] - PTDF @ self.Pbusshift)
+            constraints += [flow <= self._tile(pfmax), flow >= -self._tile(pfmax)]
+        constraints += [cp.sum(injection, axis = 1) == np.sum(self.Pbusshift) * np.ones(self.T)]
+        
+        theta = injection @ self.ptdf_X.T + self._tile(self.slack_theta - self.ptdf_X @ self.Pbusshift)
+        
+        return constraints, theta
+    
+    def _attach_angle(self, problem, theta):
+        """keep the phase angle expression of the ptdf formulation on the problem for get_sol"""
+        if self.formulation == 'ptdf':
+            problem.theta_expr = theta
+    
+    def _angle_variable(self):
+        """the (T, no_bus) phase angle variable, None for the ptdf formulation"""
+        if self.formulation == 'ptdf':
+            return None
+        theta = cp.Variable((self.T * self.no_bus), name = 'theta')
+        return cp.reshape(theta, (self.T, -1), 'C')
+    
+    def _parameter(self, name, value, kind, shape = None):
+        """the parameter named name with the default value if kind is in parametric, otherwise the constant value"""
+        if kind not in self.parametric:
+            return value
+        shape = np.shape(value) if shape is None else shape
+        if int(np.prod(shape)) == 0:
+            return value
+        param = cp.Parameter(shape, name = name)
+        if value is not None:
+            # a copy, the parameter keeps the reference to its value
+            param.value = np.array(value, dtype = float)
+        return param
+    
+    def _initial_condition(self):
+        """the initial pg and ug of the ncuc, the parameters 'pg_init' and 'ug_init' if init_param"""
+        if self.init_param:
+            return (self._parameter('pg_init', getattr(self, 'pg_init', None), 'init', shape = (self.no_gen,)),
+                    self._parameter('ug_init', getattr(self, 'ug_init', None), 'init', shape = (self.no_gen,)))
+        return self.pg_init, self.ug_init
+    
+    def _pfmax(self):
+        """the branch flow limit, the parameter 'pfmax' if 'pfmax' is parametric"""
+        return self._parameter('pfmax', self.pfmax, 'pfmax')
+    
+    def _costs(self):
+        """the linear costs of the objective, the parameters if 'cost' is parametric
+        'first_order' is the (T * no_gen,) generation cost of the vectorized pg"""
+        cost = {name: self._parameter(name, getattr(self, name), 'cost') 
+                for name in ['cv', 'cls', 'csc', 'cwc', 'ces', 'cf', 'csu', 'csd']}
+        if isinstance(cost['cv'], cp.Expression):
+            cost['first_order'] = cp.reshape(self._tile(cost['cv']), (self.T * self.no_gen,), 'C')
+        else:
+            cost['first_order'] = self.first_order_coeff
+        return cost
+    
+    def _tile(self, vec, no_row = None):
+        """repeat a (no,) vector into a (no_row, no) matrix, no_row = T by default"""
+        no_row = self.T if no_row is None else no_row
+        if isinstance(vec, cp.Expression):
+            # a parameter stays a parameter-affine expression (dpp)
+            return np.ones((no_row, 1)) @ cp.reshape(vec, (1, vec.size), 'C')
+        return np.tile(vec, (no_row, 1))
+    
     def _slack_constraints(self, constraints, theta):
         constraints += [theta[:, self.slack_idx] == self.slack_theta]
         return constraints
@@ -92,6 +288,17 @@ class Operation(PowerGrid):
                             solar = None, solarc = None, wind = None, windc = None):
         """bounds on the penalization variables"""
 
+        if self.vectorize:
+            # the (T, no) matrices are bounded at once
+            constraints += [ls >= 0, ls <= load]
+            if pg is not None:
+                constraints += [es >= 0, es <= pg]
+            if self.no_solar > 0:
+                constraints += [solarc >= 0, solarc <= solar]
+            if self.no_wind > 0:
+                constraints += [windc >= 0, windc <= wind]
+            return constraints
+
         for t in range(self.T):
             constraints += [ls[t] >= 0, ls[t] <= load[t]]
             if pg is not None:
@@ -112,13 +319,12 @@ class Operation(PowerGrid):
         # the parameter and variable are in vector form
         load = cp.Parameter((self.T * self.no_load), name = 'load')              # load forecast (T * no_load)
         pg = cp.Variable((self.T * self.no_gen), name = 'pg')                    # generation (T * no_gen)
-        theta = cp.Variable((self.T * self.no_bus), name = 'theta')              # phase angle (T * no_bus)
+        theta = self._angle_variable()                                           # phase angle (T, no_bus)
         ls = cp.Variable((self.T * self.no_load), name = 'ls')                   # load shed (T * no_load)
         
         # reshape: so that the following formulations are the same for vectorize and matrix form
         load = cp.reshape(load, (self.T, -1), 'C')
         # pg = cp.reshape(pg, (self.T, -1), 'C')
-        theta = cp.reshape(theta, (self.T, -1), 'C')
         ls = cp.reshape(ls, (self.T, -1), 'C')
         
         if self.no_solar > 0:
@@ -134,22 +340,30 @@ class Operation(PowerGrid):
             windc = cp.reshape(windc, (self.T, -1), 'C')
         
         """ objective function """
+        cost = self._costs()
         obj = 0
         # ! to avoid the dummy variable in the standard form
         
-        obj += cp.scalar_product(self.first_order_coeff, pg)                   # generation cost
+        obj += cp.scalar_product(cost['first_order'], pg)                   # generation cost
         obj += 0.5 * cp.quad_form(pg, self.second_order_coeff)                # quadratic cost
         
         pg = cp.reshape(pg, (self.T, -1), 'C') # reshape
         
-        for t in range(self.T):
-            # obj += cp.scalar_product(self.cv, pg[t])                   # generation cost
-            # obj += 0.5 * cp.quad_form(pg[t], np.diag(self.cv2))        # quadratic cost
-            obj += cp.scalar_product(self.cls, ls[t])                   # load shed cost
+        if self.vectorize:
+            obj += cp.scalar_product(self._tile(cost['cls']), ls)          # load shed cost
             if self.no_solar > 0:
-                obj += cp.scalar_product(self.csc, solarc[t])
+                obj += cp.scalar_product(self._tile(cost['csc']), solarc)
             if self.no_wind > 0:
-                obj += cp.scalar_product(self.cwc, windc[t])
+                obj += cp.scalar_product(self._tile(cost['cwc']), windc)
+        else:
+            for t in range(self.T):
+                # obj += cp.scalar_product(self.cv, pg[t])                   # generation cost
+                # obj += 0.5 * cp.quad_form(pg[t], np.diag(self.cv2))        # quadratic cost
+                obj += cp.scalar_product(cost['cls'], ls[t])                   # load shed cost
+                if self.no_solar > 0:
+                    obj += cp.scalar_product(cost['csc'], solarc[t])
+                if self.no_wind > 0:
+                    obj += cp.scalar_product(cost['cwc'], windc[t])
         
         # # ! treat the quadratic cost always in vector form
         # # this may solve the gurobi failure issue and the dummy variable in standard form
@@ -158,14 +372,14 @@ class Operation(PowerGrid):
         
         """ constraints """
         constraints = []
-        for t in range(self.T):
-            constraints += [pg[t] <= self.pgmax, pg[t] >= self.pgmin]
-        
-        # branch flow limit
-        constraints = self._flow_constraint(constraints=constraints, theta=theta)
+        if self.vectorize:
+            constraints += [pg <= self._tile(self.pgmax), pg >= self._tile(self.pgmin)]
+        else:
+            for t in range(self.T):
+                constraints += [pg[t] <= self.pgmax, pg[t] >= self.pgmin]
         
-        # power balance
-        constraints = self._power_balance_constraint(
+        # branch flow limit, power balance and slack bus angle
+        constraints, theta = self._network_constraints(
                     constraints=constraints, 
                     theta=theta, 
                     pg_all=pg, 
@@ -174,16 +388,19 @@ class Operation(PowerGrid):
                     solar_all = solar - solarc if self.no_solar > 0 else None,
                     wind_all = wind - windc if self.no_wind > 0 else None
                     )
-        
-        # slack bus angle
-        constraints = self._slack_constraints(constraints=constraints, theta=theta)
 
+        reserve = self._parameter('reserve', self.reserve, 'reserve')
         # reserve requirement
         # todo: consider area
-        for t in range(self.T):
+        if self.vectorize:
             constraints += [
-                np.sum(self.pgmax) >= cp.sum(pg[t]) + self.reserve[t]
+                np.sum(self.pgmax) >= cp.sum(pg, axis = 1) + reserve
             ]
+        else:
+            for t in range(self.T):
+                constraints += [
+                    np.sum(self.pgmax) >= cp.sum(pg[t]) + reserve[t]
+                ]
 
         # constraints on the decision variables
         constraints = self._variable_constraints(
@@ -196,40 +413,49 @@ class Operation(PowerGrid):
                                                 windc = windc if self.no_wind > 0 else None
                                                 )
         
-        # formulate the problem
-        problem = cp.Problem(cp.Minimize(obj), constraints)
-        
         # ramp constraints
         if self.T > 1:
-            for t in range(1, self.T):
-                constraints += [pg[t] - pg[t-1] <= self.ru,
-                                pg[t] - pg[t-1] >= -self.rd]
-            constraints += [pg[0] - self.pg_init <= self.ru,
-                            pg[0] - self.pg_init >= -self.rd] # initial ramp limit
+            pg_init, _ = self._initial_condition()
+            if self.vectorize:
+                constraints += [pg[1:] - pg[:-1] <= self._tile(self.ru, self.T - 1),
+                                pg[1:] - pg[:-1] >= -self._tile(self.rd, self.T - 1)]
+            else:
+                for t in range(1, self.T):
+                    constraints += [pg[t] - pg[t-1] <= self.ru,
+                                    pg[t] - pg[t-1] >= -self.rd]
+            constraints += [pg[0] - pg_init <= self.ru,
+                            pg[0] - pg_init >= -self.rd] # initial ramp limit
+        
+        # formulate the problem
+        problem = cp.Problem(cp.Minimize(obj), constraints)
+        self._attach_angle(problem, theta)
+        problem.identity = problem_identity(self, 'ncuc_no_int')
 
         return problem
     
-    def ncuc_with_int(self):
+    def ncuc_with_int(self, relax = False):
         
-        """network constrained unit commitment (ncuc) with integer variable"""
+        """network constrained unit commitment (ncuc) with integer variable
+        relax: if True, the binary variables are relaxed to [0, 1] (the continuous relaxation, e.g. for the mip start)"""
         
         load = cp.Parameter((self.T * self.no_load), name = 'load')              # load forecast (T, no_load)
         pg = cp.Variable((self.T * self.no_gen), name = 'pg')                    # generation (T, no_gen)
-        ug = cp.Variable((self.T * self.no_gen), boolean = True, name = 'ug')    # commitment status (T, no_gen)
-        theta = cp.Variable((self.T * self.no_bus), name = 'theta')              # phase angle (T, no_bus)
+        ug = cp.Variable((self.T * self.no_gen), boolean = not relax, name = 'ug')    # commitment status (T, no_gen)
+        binaries = [ug]
+        theta = self._angle_variable()                                           # phase angle (T, no_bus)
         ls = cp.Variable((self.T * self.no_load), name = 'ls')                   # load shed (T, no_load)
         
         # reshape
         load = load.reshape((self.T, -1), 'C')
         # pg = pg.reshape((self.T, -1), 'C')
         ug = ug.reshape((self.T, -1), 'C')
-        theta = theta.reshape((self.T, -1), 'C')
         ls = ls.reshape((self.T, -1), 'C')
         
         if self.T > 1:
             # dont include the start up and shut down status for T = 1
-            yg = cp.Variable((self.T * self.no_gen), boolean = True, name = 'yg')    # start-up status (T, no_gen)
-            zg = cp.Variable((self.T * self.no_gen), boolean = True, name = 'zg')    # shut-down status (T, no_gen)
+            yg = cp.Variable((self.T * self.no_gen), boolean = not relax, name = 'yg')    # start-up status (T, no_gen)
+            zg = cp.Variable((self.T * self.no_gen), boolean = not relax, name = 'zg')    # shut-down status (T, no_gen)
+            binaries += [yg, zg]
             yg = yg.reshape((self.T, -1), 'C')
             zg = zg.reshape((self.T, -1), 'C')
         
@@ -249,74 +475,105 @@ class Operation(PowerGrid):
         # ls = cp.Variable((self.T * self.no_load), name = 'ls')   
         
         # objective function
+        cost = self._costs()
         obj = 0
         
-        obj += cp.scalar_product(self.first_order_coeff, pg)                   # generation cost
+        obj += cp.scalar_product(cost['first_order'], pg)                   # generation cost
         obj += 0.5 * cp.quad_form(pg, self.second_order_coeff)                # quadratic cost
         
         pg = pg.reshape((self.T, -1), 'C') # reshape
         
-        for t in range(self.T):
-            obj += cp.scalar_product(self.cf, ug[t])              # generator fixed cost
-            # obj += cp.scalar_product(self.cv, pg[t])              # generator varying cost
-            # obj += 0.5 * cp.quad_form(pg[t], np.diag(self.cv2))   # quadratic cost
-            
+        if self.vectorize:
+            obj += cp.scalar_product(self._tile(cost['cf']), ug)           # generator fixed cost
             if self.T > 1:
-                obj += cp.scalar_product(self.csu, yg[t])             # start-up cost
-                obj += cp.scalar_product(self.csd, zg[t])             # shut-down cost
-            
-            obj += cp.scalar_product(self.cls, ls[t])              # load shed cost
-            
+                obj += cp.scalar_product(self._tile(cost['csu']), yg)      # start-up cost
+                obj += cp.scalar_product(self._tile(cost['csd']), zg)      # shut-down cost
+            obj += cp.scalar_product(self._tile(cost['cls']), ls)          # load shed cost
             if self.no_solar > 0:
-                obj += cp.scalar_product(self.csc, solarc[t])      # solar curtailment cost
+                obj += cp.scalar_product(self._tile(cost['csc']), solarc)  # solar curtailment cost
             if self.no_wind > 0:
-                obj += cp.scalar_product(self.cwc, windc[t])       # wind curtailment cost
+                obj += cp.scalar_product(self._tile(cost['cwc']), windc)   # wind curtailment cost
+        else:
+            for t in range(self.T):
+                obj += cp.scalar_product(cost['cf'], ug[t])              # generator fixed cost
+                # obj += cp.scalar_product(self.cv, pg[t])              # generator varying cost
+                # obj += 0.5 * cp.quad_form(pg[t], np.diag(self.cv2))   # quadratic cost
+            
+                if self.T > 1:
+                    obj += cp.scalar_product(cost['csu'], yg[t])             # start-up cost
+                    obj += cp.scalar_product(cost['csd'], zg[t])             # shut-down cost
+            
+                obj += cp.scalar_product(cost['cls'], ls[t])              # load shed cost
+            
+                if self.no_solar > 0:
+                    obj += cp.scalar_product(cost['csc'], solarc[t])      # solar curtailment cost
+                if self.no_wind > 0:
+                    obj += cp.scalar_product(cost['cwc'], windc[t])       # wind curtailment cost
         
         # obj += cp.scalar_product(self.penalty, ls)           # load shed cost    
         # obj += 0.5 * cp.quad_form(ls, np.diag(self.penalty))
         
         # constraints
         constraints = []
+        if relax:
+            constraints += [var >= 0 for var in binaries] + [var <= 1 for var in binaries]
         
         if self.T > 1:
             
             # constraint with initial condition involved
             # when T = 1, we dont have the ramp constraints and ramp up and down constraints
             # e.g. we dont have the variable yg and zg
-            for t in range(1,self.T):
-                # on-off
-                constraints += [yg[t] - zg[t] == ug[t] - ug[t-1]]  # commitment status
-                # ramp up
+            if self.vectorize:
+                constraints += [yg[1:] - zg[1:] == ug[1:] - ug[:-1]]
                 constraints += [
-                    pg[t] - pg[t-1] <= cp.multiply(self.ru, ug[t-1]) + cp.multiply(self.rsu, yg[t])
+                    pg[1:] - pg[:-1] <= cp.multiply(self._tile(self.ru, self.T - 1), ug[:-1]) 
+                                        + cp.multiply(self._tile(self.rsu, self.T - 1), yg[1:])
                 ]
-                # ramp down
-                # ! ug[t]
                 constraints += [
-                    pg[t-1] - pg[t] <= cp.multiply(self.rd, ug[t]) + cp.multiply(self.rsd, zg[t])
+                    pg[:-1] - pg[1:] <= cp.multiply(self._tile(self.rd, self.T - 1), ug[1:]) 
+                                        + cp.multiply(self._tile(self.rsd, self.T - 1), zg[1:])
                 ]
+            else:
+                for t in range(1, self.T):
+                    # on-off
+                    constraints += [yg[t] - zg[t] == ug[t] - ug[t-1]]  # commitment status
+                    # ramp up
+                    constraints += [
+                        pg[t] - pg[t-1] <= cp.multiply(self.ru, ug[t-1]) + cp.multiply(self.rsu, yg[t])
+                    ]
+                    # ramp down
+                    # ! ug[t]
+                    constraints += [
+                        pg[t-1] - pg[t] <= cp.multiply(self.rd, ug[t]) + cp.multiply(self.rsd, zg[t])
+                    ]
             
             # initial condition
-            constraints += [yg[0] - zg[0] == ug[0] - self.ug_init]      
+            pg_init, ug_init = self._initial_condition()
+            constraints += [yg[0] - zg[0] == ug[0] - ug_init]      
             constraints += [
-                pg[0] - self.pg_init <= cp.multiply(self.ru, self.ug_init) + cp.multiply(self.rsu, yg[0])
+                pg[0] - pg_init <= cp.multiply(self.ru, ug_init) + cp.multiply(self.rsu, yg[0])
             ]
             constraints += [
-                self.pg_init - pg[0] <= cp.multiply(self.rd, ug[0]) + cp.multiply(self.rsd, zg[0])
+                pg_init - pg[0] <= cp.multiply(self.rd, ug[0]) + cp.multiply(self.rsd, zg[0])
             ]
         
             # constraint without initial condition involved
-            for t in range(self.T):
-                # on-off
-                constraints += [yg[t] + zg[t] <= 1]
+            if self.vectorize:
+                constraints += [yg + zg <= 1]
+            else:
+                for t in range(self.T):
+                    # on-off
+                    constraints += [yg[t] + zg[t] <= 1]
         
-        for t in range(self.T):
-            # generation limit
-            constraints += [pg[t] <= cp.multiply(self.pgmax, ug[t]), pg[t] >= cp.multiply(self.pgmin, ug[t])]
+        if self.vectorize:
+            constraints += [pg <= cp.multiply(self._tile(self.pgmax), ug), 
+                            pg >= cp.multiply(self._tile(self.pgmin), ug)]
+        else:
+            for t in range(self.T):
+                # generation limit
+                constraints += [pg[t] <= cp.multiply(self.pgmax, ug[t]), pg[t] >= cp.multiply(self.pgmin, ug[t])]
         
-        constraints = self._flow_constraint(constraints=constraints, theta=theta)
-
-        constraints = self._power_balance_constraint(
+        constraints, theta = self._network_constraints(
                     constraints=constraints, 
                     theta=theta, 
                     pg_all=pg, 
@@ -324,14 +581,18 @@ class Operation(PowerGrid):
                     solar_all = solar - solarc if self.no_solar > 0 else None,
                     wind_all = wind - windc if self.no_wind > 0 else None
                     )
-        
-        constraints = self._slack_constraints(constraints=constraints, theta=theta)
 
+        reserve = self._parameter('reserve', self.reserve, 'reserve')
         # reserve requirement: related to the on-off condition
-        for t in range(self.T):
+        if self.vectorize:
             constraints += [
-                cp.sum(cp.multiply(self.pgmax, ug[t])) >= cp.sum(pg[t]) + self.reserve[t]
+                cp.sum(cp.multiply(self._tile(self.pgmax), ug), axis = 1) >= cp.sum(pg, axis = 1) + reserve
             ]
+        else:
+            for t in range(self.T):
+                constraints += [
+                    cp.sum(cp.multiply(self.pgmax, ug[t])) >= cp.sum(pg[t]) + reserve[t]
+                ]
 
         # constraints about load shedding
         constraints = self._variable_constraints(constraints=constraints, 
@@ -345,6 +606,8 @@ class Operation(PowerGrid):
         
         # formulate the problem
         problem = cp.Problem(cp.Minimize(obj), constraints)
+        self._attach_angle(problem, theta)
+        problem.identity = problem_identity(self, 'ncuc_relaxed' if relax else 'ncuc_with_int')
         
         return problem
     
@@ -365,7 +628,7 @@ class Operation(PowerGrid):
         pg_uc = cp.Parameter((self.T * self.no_gen), name = 'pg_uc') 
         
         pg = cp.Variable((self.T * self.no_gen), name = 'pg')            # generation
-        theta = cp.Variable((self.T * self.no_bus), name = 'theta')      # phase angle
+        theta = self._angle_variable()                                   # phase angle
         ls = cp.Variable((self.T * self.no_load), name = 'ls')           # load shed
         es = cp.Variable((self.T * self.no_gen), name = 'es')            # energy storage
         
@@ -373,7 +636,6 @@ class Operation(PowerGrid):
         load = load.reshape((self.T, -1), 'C')
         pg_uc = pg_uc.reshape((self.T, -1), 'C')
         # pg = pg.reshape((self.T, -1), 'C')
-        theta = theta.reshape((self.T, -1), 'C')
         ls = ls.reshape((self.T, -1), 'C')
         es = es.reshape((self.T, -1), 'C')
         
@@ -389,39 +651,53 @@ class Operation(PowerGrid):
             windc = windc.reshape((self.T, -1), 'C')
         
         # objective function
+        cost = self._costs()
         obj = 0
-        obj += cp.scalar_product(self.first_order_coeff, pg)                   # generation cost
+        obj += cp.scalar_product(cost['first_order'], pg)                   # generation cost
         obj += 0.5 * cp.quad_form(pg, self.second_order_coeff)                # quadratic cost
         
         pg = pg.reshape((self.T, -1), 'C') # reshape
         
-        for t in range(self.T):
-            # obj += cp.scalar_product(self.cv, pg[t])              # first order cost
-            # obj += 0.5 * cp.quad_form(pg[t], np.diag(self.cv2))   # second order cost
-            
-            obj += cp.scalar_product(self.cls, ls[t])              # load shed cost
-            obj += cp.scalar_product(self.ces, es[t])              # energy storage cost
+        if self.vectorize:
+            obj += cp.scalar_product(self._tile(cost['cls']), ls)          # load shed cost
+            obj += cp.scalar_product(self._tile(cost['ces']), es)          # energy storage cost
             if self.no_solar > 0:
-                obj += cp.scalar_product(self.csc, solarc[t])
+                obj += cp.scalar_product(self._tile(cost['csc']), solarc)
             if self.no_wind > 0:
-                obj += cp.scalar_product(self.cwc, windc[t])
+                obj += cp.scalar_product(self._tile(cost['cwc']), windc)
+        else:
+            for t in range(self.T):
+                # obj += cp.scalar_product(self.cv, pg[t])              # first order cost
+                # obj += 0.5 * cp.quad_form(pg[t], np.diag(self.cv2))   # second order cost
+            
+                obj += cp.scalar_product(cost['cls'], ls[t])              # load shed cost
+                obj += cp.scalar_product(cost['ces'], es[t])              # energy storage cost
+                if self.no_solar > 0:
+                    obj += cp.scalar_product(cost['csc'], solarc[t])
+                if self.no_wind > 0:
+                    obj += cp.scalar_product(cost['cwc'], windc[t])
 
         # constraints
         constraints = []
-        for t in range(self.T):
+        if self.vectorize:
             # generation limit
-            constraints += [pg[t] <= cp.multiply(self.pgmax, ug[t]), 
-                            pg[t] >= cp.multiply(self.pgmin, ug[t])]
-
+            constraints += [pg <= cp.multiply(self._tile(self.pgmax), ug), 
+                            pg >= cp.multiply(self._tile(self.pgmin), ug)]
             # ramp limit
-            constraints += [pg[t] - pg_uc[t] <= cp.multiply(self.rued, ug[t]), 
-                            pg[t] - pg_uc[t] >= -cp.multiply(self.rded, ug[t])]
+            constraints += [pg - pg_uc <= cp.multiply(self._tile(self.rued), ug), 
+                            pg - pg_uc >= -cp.multiply(self._tile(self.rded), ug)]
+        else:
+            for t in range(self.T):
+                # generation limit
+                constraints += [pg[t] <= cp.multiply(self.pgmax, ug[t]), 
+                                pg[t] >= cp.multiply(self.pgmin, ug[t])]
+
+                # ramp limit
+                constraints += [pg[t] - pg_uc[t] <= cp.multiply(self.rued, ug[t]), 
+                                pg[t] - pg_uc[t] >= -cp.multiply(self.rded, ug[t])]
             
-        # branch flow limit
-        constraints = self._flow_constraint(constraints=constraints, theta=theta)
-        
-        # power balance
-        constraints = self._power_balance_constraint(
+        # branch flow limit, power balance and slack bus angle
+        constraints, theta = self._network_constraints(
                     constraints=constraints, 
                     theta=theta, 
                     pg_all=pg - es, 
@@ -430,9 +706,6 @@ class Operation(PowerGrid):
                     wind_all = wind - windc if self.no_wind > 0 else None
                     )
         
-        # slack bus angle
-        constraints = self._slack_constraints(constraints=constraints, theta=theta)
-        
         # variable constraints
         constraints = self._variable_constraints(constraints=constraints, 
                                                 load=load, 
@@ -447,6 +720,8 @@ class Operation(PowerGrid):
         
         # formulate the problem
         problem = cp.Problem(cp.Minimize(obj), constraints)
+        self._attach_angle(problem, theta)
+        problem.identity = problem_identity(self, 'ed_int' if with_int else 'ed')
         
         return problem
     
@@ -460,22 +735,153 @@ class Operation(PowerGrid):
         
         return theta.reshape((self.T, -1)) @ self.Bf.T + self.Pfshift.reshape(1, -1)
     
+    def shift_solution(self, prob, shift = 1):
+        """
+        the warm start of the next rolling window from the current solution of prob
+        the variables (pg, theta, ls, solarc, windc, ...) are shifted forward by shift time steps 
+        and the last time step is repeated
+        the duals are shifted in the same way for the vectorized formulation, 
+        in which every constraint is indexed by the time step along the first axis
+        return: {'primal': {var_name: value}, 'dual': {constr_id: value}}
+        """
+        
+        def _shift(value):
+            value = np.asarray(value)
+            return np.concatenate([value[shift:], np.repeat(value[-1:], shift, axis = 0)], axis = 0)
+        
+        primal = {}
+        for var in prob.variables():
+            if var.value is not None:
+                primal[var.name()] = _shift(var.value.reshape(self.T, -1)).flatten()
+        
+        dual = {}
+        for constr in prob.constraints:
+            if self.vectorize and constr.dual_value is not None and np.ndim(constr.dual_value) > 0:
+                dual[constr.id] = _shift(constr.dual_value)
+        
+        return {'primal': primal, 'dual': dual}
+    
     @staticmethod
-    def solve(prob, parameters: dict, verbose: bool = False, solver: str = 'GUROBI', **solver_options):
+    def solve(prob, parameters: dict, verbose: bool = False, solver: str = 'GUROBI', warm_start: dict = None,
+            **solver_options):
         """
         assign parameter and solve the problem
-        the keys of the parameters should be the same as the parameter names in the problem
+        the keys of the parameters should be the same as the parameter names in the problem,
+        the parameters of Operation(..., parametric = ...) keep their current (default) values if not given
+        warm_start: the initial primal (and dual) solution, e.g. from Operation.shift_solution or the mip start
+            (operation.mip_start), the variables given as None are left to the solver. cvxpy does not pass the start 
+            to scip, so scip is replaced by SCIP_START which adds it as a partial solution.
+            False to solve cold, by default cvxpy starts from the solution of the last solve (e.g. for osqp)
+        the phases are recorded into operation.profiling.PROFILE if it is enabled
+        the solver is skipped if the solution is in operation.solution_cache.SOLUTION_CACHE (when it is enabled)
         """
+        profile = PROFILE.enabled
+        if profile:
+            start = time.perf_counter()
+        
         for param in prob.parameters():
+            if param.name() not in parameters and param.name() in _DEFAULT_PARAMETERS and param.value is not None:
+                continue
             try:
                 param.value = parameters[param.name()]
             except:
                 raise ValueError(f'Parameter name {param.name()} not found in the problem or the dimension is not correct.')
+        
+        if profile:
+            PROFILE.add('solve.set_parameters', time.perf_counter() - start)
+            param_prog = prob._cache.param_prog
+        
+        cache_key = SOLUTION_CACHE.key(prob, solver, solver_options) if SOLUTION_CACHE.enabled else None
+        if cache_key is not None and SOLUTION_CACHE.restore(prob, cache_key):
+            if profile:
+                PROFILE.add('solve.cache_hit', time.perf_counter() - start)
+                PROFILE.add('solve', time.perf_counter() - start)
+            return
+        
+        if warm_start is False:
+            solver_options['warm_start'] = False
+            warm_start = None
+        elif warm_start is not None:
+            solver_options['warm_start'] = Operation._set_warm_start(prob, warm_start, solver.upper())
+        solver = SCIP_START if warm_start is not None and solver.upper() == 'SCIP' else getattr(cp, solver.upper())
+        
+        if not profile:
+            prob.solve(solver = solver, verbose = verbose, **solver_options)
+        else:
+            try:
+                prob.solve(solver = solver, verbose = verbose, **solver_options)
+                _record_solve(prob, param_prog)
+            finally:
+                PROFILE.add('solve', time.perf_counter() - start)
+        
+        if cache_key is not None:
+            SOLUTION_CACHE.store(prob, cache_key)
+    
+    @staticmethod
+    def default_parameters(prob):
+        """the current values of the parameters of Operation(..., parametric = ...), {param_name: value}"""
+        return {param.name(): param.value for param in prob.parameters() 
+                if param.name() in _DEFAULT_PARAMETERS and param.value is not None}
+    
+    @staticmethod
+    def _set_warm_start(prob, warm_start, solver):
+        """
+        pass the warm start to the solver through cvxpy
+        cvxpy reuses the cached solver of the last solve and starts from its solution, so the cache is modified:
+        - gurobi: the cached model is dropped so that the variable values are used as the start attributes
+        - osqp: the warm start in the standard form order is passed to the cached osqp solver, and replaces the cached 
+            solution. There is no cached solver at the first solve of prob, the start is then ignored by cvxpy.
+            Outside the tested versions of cvxpy (OSQP_CACHE_CVXPY) or if the cache is not recognized, 
+            the start is ignored with a warning and the problem is solved cold
+        return: the warm_start option of cvxpy, False for the cold solve
+        """
+        for var in prob.variables():
+            if var.name() in warm_start['primal']:
+                var.value = warm_start['primal'][var.name()]
+        
+        if solver == 'GUROBI':
+            prob._solver_cache.pop(solver, None)
+        
+        elif solver == 'OSQP' and solver in prob._solver_cache:
+            # ! cvxpy internals (tested in OSQP_CACHE_CVXPY, see reductions/solvers/qp_solvers/osqp_qpif.py): the cache 
+            # is (osqp solver, data, results), and cvxpy only calls solver.warm_start(results.x, results.y) if the 
+            # cached status is optimal, so the start is also given to the solver here for the other status
+            entry = prob._solver_cache[solver]
+            version = tuple(int(v) for v in cp.__version__.split('.')[:2])
+            if not (OSQP_CACHE_CVXPY[0] <= version <= OSQP_CACHE_CVXPY[1]) or \
+                not (isinstance(entry, tuple) and len(entry) == 3 and hasattr(entry[0], 'warm_start')):
+                warnings.warn(f"the osqp solver cache of cvxpy {cp.__version__} is not supported, "
+                            "the warm start is ignored and the problem is solved cold")
+                return False
+            osqp_solver, data, results = entry
+            param_prog = prob._cache.param_prog
+            
+            # primal: x is the stack of the variables, the missing ones from the last solve (zero if it failed)
+            x = np.array(results.x, dtype = float)
+            x[~np.isfinite(x)] = 0
+            for var in prob.variables():
+                if var.value is not None:
+                    start_idx = param_prog.var_id_to_col[var.id]
+                    x[start_idx:start_idx + var.size] = var.value.flatten(order = 'F')
             
-        prob.solve(solver = getattr(cp, solver.upper()), verbose = verbose,
-                    **solver_options)
+            # dual: y is [eq_duals; ineq_duals], each constraint flattened in the column-major order
+            y = np.array(results.y, dtype = float)
+            y[~np.isfinite(y)] = 0
+            constrs = [c for c in param_prog.constraints if isinstance(c, cp.constraints.Zero)] + \
+                    [c for c in param_prog.constraints if not isinstance(c, cp.constraints.Zero)]
+            start_idx = 0
+            for constr in constrs:
+                if constr.id in warm_start['dual']:
+                    y[start_idx:start_idx + constr.size] = np.asarray(warm_start['dual'][constr.id]).flatten(order = 'F')
+                start_idx += constr.size
+            
+            osqp_solver.warm_start(x = x, y = y)
+            prob._solver_cache[solver] = (osqp_solver, data, SimpleNamespace(x = x, y = y, info = results.info))
+        
+        return True
     
-    @staticmethod  
+    @staticmethod
+    @timed('get_sol')
     def get_sol(prob, T = None, reshaped = False):
         """
         clean the output into a dictionary
@@ -484,4 +890,204 @@ class Operation(PowerGrid):
         for var in prob.variables():
             sol[var.name()] = var.value if not reshaped else var.value.reshape(T, -1)
         
-        return sol
\ No newline at end of file
+        # the phase angle of the ptdf formulation is not a variable
+        theta_expr = getattr(prob, 'theta_expr', None)
+        if theta_expr is not None and theta_expr.value is not None:
+            sol['theta'] = theta_expr.value.flatten() if not reshaped else theta_expr.value
+        
+        return sol
+    
+    def solve_lazy(self, prob_kind, parameters: dict, with_int = False, solver: str = 'GUROBI', 
+                max_iter = 20, tol = 1e-5, margin = 0.1, **solver_options):
+        """
+        solve the uc or ed by generating the branch flow limits lazily
+        the problem only contains the limits of the active lines (self.active_lines, empty at the start).
+        After each solve, the flows of all the branches are computed by get_pf, the violated limits are 
+        added to the active lines, and the problem is rebuilt and solved again until the flows are feasible.
+        The active lines are kept for the next samples and shared by the uc and ed, 
+        and the problem is only rebuilt when the active lines grow.
+        prob_kind: 'uc' or 'ed'
+        tol: the tolerance (p.u.) of the flow violation
+        margin: when the problem is rebuilt, the lines loaded above (1 - margin) * pfmax are also added
+        the limits are parameters['pfmax'] if given (Operation(..., parametric = ['pfmax'])), otherwise self.pfmax
+        return: the solved problem and the number of iterations (solves)
+        """
+        
+        pfmax = np.asarray(parameters.get('pfmax', self.pfmax), dtype = float)
+        for no_iter in range(1, max_iter + 1):
+            prob = self._lazy_opt(with_int, prob_kind)
+            Operation.solve(prob, parameters, solver = solver, **solver_options)
+            if prob.status not in [cp.OPTIMAL, cp.OPTIMAL_INACCURATE]:
+                break
+            
+            pf = np.max(np.abs(self.get_pf(Operation.get_sol(prob)['theta'])), axis = 0)
+            violated = (pf > pfmax + tol) & ~self.active_lines
+            if not np.any(violated):
+                break
+            # the nearly binding lines are added together, so that the active lines settle in fewer rebuilds
+            self.active_lines = self.active_lines | violated | (pf >= (1 - margin) * pfmax)
+        
+        return prob, no_iter
+    
+    def _lazy_opt(self, with_int, prob_kind):
+        """the problem with the limits of the active lines, rebuilt if the active lines are changed"""
+        key = (with_int, prob_kind)
+        if key not in self._lazy_probs or not np.array_equal(self._lazy_probs[key][0], self.active_lines):
+            self.monitored_lines = np.flatnonzero(self.active_lines)
+            try:
+                self._lazy_probs[key] = (self.active_lines.copy(), self.get_opt(with_int, prob_kind))
+            finally:
+                self.monitored_lines = None
+        return self._lazy_probs[key][1]
+    
+    def solve_batch(self, prob_kind, params_batch: dict, with_int = False, n_workers = None, chunk_size = None,
+                    solver: str = 'GUROBI', compiled_dir = None, **solver_options):
+        """
+        solve the uc or ed problem for a batch of parameters over a process pool
+        each worker builds and compiles the problem once and solves a chunk of samples
+        prob_kind: 'uc' or 'ed'
+        params_batch: {param_name: (N, size) array}, e.g. load, solar, wind, pg_uc and ug stacked over the samples
+        n_workers: the number of processes, default to the number of cpus. solve in the current process if 1
+        chunk_size: the number of samples sent to a worker at once
+        compiled_dir: if given, the workers load the compiled standard form from this directory 
+            (utils.problem_cache.load_compiled, compiled once by the current process) instead of building the 
+            cvxpy problem, and solve it by StandardFormSolver. Only for the solvers in STANDARD_SOLVERS, 
+            the solutions are the variables of the problem (no phase angle for the ptdf formulation)
+        return: 
+            - sol: {var_name: (N, size) array}, nan for the failed samples
+            - status: (N,) array of the solver status, 'error' if the solver failed
+            - value: (N,) array of the optimal value, nan for the failed samples
+        """
+        
+        no_sample = len(next(iter(params_batch.values())))
+        assert all(len(value) == no_sample for value in params_batch.values()), "the batch size of the parameters is not consistent"
+        
+        n_workers = os.cpu_count() if n_workers is None else n_workers
+        if chunk_size is None:
+            # a few chunks per worker to balance the load
+            chunk_size = max(1, int(np.ceil(no_sample / (4 * n_workers))))
+        chunks = [{key: value[start:start + chunk_size] for key, value in params_batch.items()}
+                    for start in range(0, no_sample, chunk_size)]
+        
+        compiled = None
+        if compiled_dir is not None:
+            if solver.upper() not in STANDARD_SOLVERS:
+                raise ValueError(f"the compiled problem is solved by {STANDARD_SOLVERS}, got {solver}")
+            # compile (or load) once here so that the workers only read the cache
+            load_standard_form(self.init_args, with_int, prob_kind, compiled_dir, solver)
+            compiled = (compiled_dir, solver, solver_options)
+        
+        if n_workers == 1:
+            _init_worker(self.init_args, with_int, prob_kind, compiled = compiled)
+            results = [_solve_chunk(chunk, solver, solver_options) for chunk in chunks]
+        else:
+            cache_config = SOLUTION_CACHE.config() if SOLUTION_CACHE.enabled else None
+            with ProcessPoolExecutor(max_workers = n_workers, initializer = init_worker_profiling,
+                                    initargs = (PROFILE.enabled, _init_worker, self.init_args, with_int, prob_kind,
+                                                cache_config, compiled)) as executor:
+                # map keeps the input order
+                results = list(executor.map(call_with_stats, [_solve_chunk] * len(chunks), chunks, 
+                                            [solver] * len(chunks), [solver_options] * len(chunks)))
+            # the phases recorded in the workers
+            for _, stats in results:
+                PROFILE.merge(stats)
+            results = [result for result, _ in results]
+        
+        sol = {key: np.concatenate([result[0][key] for result in results], axis = 0) for key in results[0][0]}
+        status = np.concatenate([result[1] for result in results])
+        value = np.concatenate([result[2] for result in results])
+        
+        return sol, status, value
+
+def _record_solve(prob, param_prog):
+    """record the phases of a solve from the timing of cvxpy
+    param_prog: the compiled problem in the cache before the solve, the problem is canonicalized if it is changed"""
+    canonicalized = prob._cache.param_prog is None or prob._cache.param_prog is not param_prog
+    if prob.compilation_time is not None:
+        PROFILE.add('solve.canonicalize' if canonicalized else 'solve.apply_parameters', prob.compilation_time)
+    if getattr(prob, '_solve_time', None) is not None:
+        PROFILE.add('solve.solver', prob._solve_time)
+    if prob.solver_stats is not None and prob.solver_stats.solve_time is not None:
+        PROFILE.add('solve.solver_reported', prob.solver_stats.solve_time)
+
+"""
+worker functions of Operation.solve_batch
+the problem is built once per process and kept in the module globals
+"""
+
+_worker_prob = None
+
+def load_standard_form(init_args, with_int, prob_kind, compiled_dir, solver):
+    """the compiled standard form of the problem of Operation(**init_args), see utils.problem_cache.load_compiled"""
+    # ! imported here, utils imports this module
+    from utils.problem_cache import load_compiled
+    kwargs = dict(init_args)
+    return load_compiled(kwargs.pop('system_path'), with_int = with_int, prob_kind = prob_kind, 
+                        cache_dir = compiled_dir, solver = solver, **kwargs)
+
+def _init_worker(init_args, with_int, prob_kind, cache_config = None, compiled = None):
+    """
+    cache_config: the solution cache of the parent (SolutionCache.config), shared through its cache_dir
+    compiled: (compiled_dir, solver, solver_options) to solve the compiled standard form by StandardFormSolver
+    """
+    global _worker_prob
+    if cache_config is not None:
+        enable_solution_cache(**cache_config)
+    if compiled is not None:
+        from utils.standard_solver import StandardFormSolver
+        compiled_dir, solver, solver_options = compiled
+        _worker_prob = StandardFormSolver(load_standard_form(init_args, with_int, prob_kind, compiled_dir, solver), 
+                                        solver, **solver_options)
+        return
+    grid_op = Operation(**init_args)
+    _worker_prob = grid_op.get_opt(with_int, prob_kind)
+
+def _solve_chunk(params_chunk, solver, solver_options):
+    """solve the samples in a chunk, the failure of one sample does not abort the chunk"""
+    
+    if not isinstance(_worker_prob, cp.Problem):
+        return _solve_chunk_standard(params_chunk)
+    
+    no_sample = len(next(iter(params_chunk.values())))
+    sol = {var.name(): np.full((no_sample, var.size), np.nan) for var in _worker_prob.variables()}
+    if getattr(_worker_prob, 'theta_expr', None) is not None:
+        sol['theta'] = np.full((no_sample, _worker_prob.theta_expr.size), np.nan)
+    status = np.empty(no_sample, dtype = object)
+    value = np.full(no_sample, np.nan)
+    
+    for i in range(no_sample):
+        try:
+            Operation.solve(_worker_prob, {key: val[i] for key, val in params_chunk.items()}, 
+                            solver = solver, **solver_options)
+            status[i] = _worker_prob.status
+        except Exception:
+            status[i] = 'error'
+            continue
+        
+        if _worker_prob.status in [cp.OPTIMAL, cp.OPTIMAL_INACCURATE]:
+            value[i] = _worker_prob.value
+            for name, val in Operation.get_sol(_worker_prob).items():
+                sol[name][i] = val
+    
+    return sol, status, value
+
+def _solve_chunk_standard(params_chunk):
+    """solve the samples in a chunk by the StandardFormSolver of the worker, see _solve_chunk"""
+    
+    no_sample = len(next(iter(params_chunk.values())))
+    sol = {name: np.full((no_sample, size), np.nan) for name, (_, size) in _worker_prob.var_idx.items()}
+    status = np.empty(no_sample, dtype = object)
+    value = np.full(no_sample, np.nan)
+    
+    for i in range(no_sample):
+        try:
+            sol_i, status[i], value[i] = _worker_prob.solve({key: val[i] for key, val in params_chunk.items()})
+        except Exception:
+            status[i] = 'error'
+            continue
+        
+        if sol_i is not None:
+            for name, val in sol_i.items():
+                sol[name][i] = val
+    
+    return sol, status, value
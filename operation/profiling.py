@@ -0,0 +1,124 @@
+"""
+opt-in timing of the phases of the operation problems
+the wall time and the call counts of each phase are recorded into PROFILE (a ProfileStats) when it is enabled:
+    - get_opt: the cvxpy expression building of the uc and ed
+    - solve: the whole Operation.solve, split into
+        solve.set_parameters, solve.canonicalize (the first compilation by cvxpy), solve.apply_parameters
+        (the later compilations of the dpp problem), solve.solver (the solver call including the cvxpy interface),
+        and solve.solver_reported (the time reported by the solver), or solve.cache_hit when the solution is
+        restored from operation.solution_cache
+    - get_sol
+    - standard_form.*: the functions in utils/standard_from.py
+when it is disabled, the instrumented functions only check PROFILE.enabled
+the stats are plain dictionaries (ProfileStats.snapshot), so that the workers return them and the parent merges them
+"""
+
+import functools
+import time
+from contextlib import contextmanager
+
+class ProfileStats:
+
+    def __init__(self):
+        self.enabled = False
+        self.phases = {}
+
+    def reset(self):
+        """remove the recorded phases"""
+        self.phases = {}
+
+    def add(self, phase, seconds):
+        """add the time (s) of a call to the phase"""
+        stats = self.phases.get(phase)
+        if stats is None:
+            self.phases[phase] = {'count': 1, 'total': seconds, 'max': seconds}
+        else:
+            stats['count'] += 1
+            stats['total'] += seconds
+            stats['max'] = max(stats['max'], seconds)
+
+    def snapshot(self):
+        """a copy of the stats, {phase: {'count', 'total', 'max'}}"""
+        return {phase: dict(stats) for phase, stats in self.phases.items()}
+
+    def merge(self, snapshot):
+        """add the stats of another process (a snapshot)"""
+        for phase, stats in snapshot.items():
+            if phase not in self.phases:
+                self.phases[phase] = dict(stats)
+                continue
+            self.phases[phase]['count'] += stats['count']
+            self.phases[phase]['total'] += stats['total']
+            self.phases[phase]['max'] = max(self.phases[phase]['max'], stats['max'])
+
+    def query(self, phase):
+        """{'count', 'total', 'mean', 'max'} of the phase, zeros if it is not recorded"""
+        stats = self.phases.get(phase, {'count': 0, 'total': 0.0, 'max': 0.0})
+        return {**stats, 'mean': stats['total'] / stats['count'] if stats['count'] > 0 else 0.0}
+
+    def summary(self):
+        """the table of the phases, sorted by the name so that the sub-phases follow their phase"""
+        if len(self.phases) == 0:
+            return "no phase is recorded"
+        width = max(len(phase) for phase in self.phases) + 2
+        lines = [f"{'phase':<{width}}{'count':>8}{'total (s)':>12}{'mean (ms)':>12}{'max (ms)':>12}"]
+        for phase in sorted(self.phases):
+            stats = self.query(phase)
+            lines.append(f"{phase:<{width}}{stats['count']:>8}{stats['total']:>12.3f}{stats['mean'] * 1e3:>12.3f}{stats['max'] * 1e3:>12.3f}")
+        return "\n".join(lines)
+
+# the stats of the current process
+PROFILE = ProfileStats()
+
+def enable_profiling(reset = True):
+    """start recording the phases into PROFILE"""
+    if reset:
+        PROFILE.reset()
+    PROFILE.enabled = True
+    return PROFILE
+
+def disable_profiling():
+    PROFILE.enabled = False
+    return PROFILE
+
+@contextmanager
+def profiling(reset = True):
+    """record the phases within the block, e.g.
+    with profiling() as stats:
+        ...
+    print(stats.summary())"""
+    enabled = PROFILE.enabled
+    enable_profiling(reset)
+    try:
+        yield PROFILE
+    finally:
+        PROFILE.enabled = enabled
+
+def timed(phase):
+    """decorator to record the wall time of the function as the phase"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not PROFILE.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                PROFILE.add(phase, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def init_worker_profiling(enabled, initializer, *initargs):
+    """the initializer of a worker process: PROFILE is enabled as in the parent, then initializer(*initargs)"""
+    PROFILE.reset()
+    PROFILE.enabled = enabled
+    initializer(*initargs)
+
+def call_with_stats(func, *args):
+    """call func in a worker process, return its output and the phases recorded since the last call
+    (including the initializer), the parent merges them by PROFILE.merge"""
+    output = func(*args)
+    stats = PROFILE.snapshot()
+    PROFILE.reset()
+    return output, stats
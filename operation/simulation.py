@@ -0,0 +1,189 @@
+"""
+rolling-horizon simulation of the day-ahead ncuc and the real-time ed
+each day, the ncuc is solved on the forecast from the initial condition of the day, and the ed is solved
+on the actual load and renewables with the ncuc dispatch. The last pg of the ed (and the last ug of the ncuc)
+is the initial condition of the next day. The uc and ed problems are built and compiled once,
+with the initial condition as the parameters 'pg_init' and 'ug_init' (Operation(..., init_param = True)).
+
+the daily results are streamed to a folder of .npy files (one (no_day, ...) array for each result) with
+meta.json recording the completed days and the state, so that an interrupted simulation resumes from the last day
+"""
+
+import json
+import os
+import cvxpy as cp
+import numpy as np
+from numpy.lib.format import open_memmap
+from .power_operation import Operation
+
+class RollingHorizon:
+
+    def __init__(self, grid_op: Operation, with_int = False, solver: str = 'GUROBI', **solver_options):
+        """
+        grid_op: the operation with T = the steps of a day and init_param = True
+        with_int: solve the ncuc with the integer variables, the ed takes the commitment of the ncuc
+        """
+
+        assert grid_op.init_param, "the initial condition must be the parameters, build the operation with init_param = True"
+        assert grid_op.T > 1, "the rolling horizon requires T > 1"
+
+        self.grid_op = grid_op
+        self.T = grid_op.T
+        self.with_int = with_int
+        self.solver = solver
+        self.solver_options = solver_options
+
+        # built once and kept across the days
+        self.uc, self.ed = grid_op.get_opt(with_int)
+
+    def result_shapes(self):
+        """the shape of the daily results: {name: shape of one day}"""
+        grid_op = self.grid_op
+        shapes = {
+            'uc_cost': (), 'ed_cost': (), 'optimal': (),
+            'pg': (self.T, grid_op.no_gen),                      # the real-time dispatch of the ed
+            'load_shed': (self.T, grid_op.no_load),
+            'solar_curtailment': (self.T, grid_op.no_solar),
+            'wind_curtailment': (self.T, grid_op.no_wind),
+            'pf': (self.T, grid_op.no_branch),                   # the branch flows of the ed
+        }
+        if self.with_int:
+            shapes['ug'] = (self.T, grid_op.no_gen)
+        return shapes
+
+    def _open_results(self, no_day, result_dir):
+        """the (no_day, ...) arrays of the results and the meta of the completed days, memory-mapped if result_dir"""
+
+        shapes = self.result_shapes()
+        meta_path = os.path.join(result_dir, 'meta.json') if result_dir is not None else None
+        meta = None
+        if meta_path is not None and os.path.exists(meta_path):
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            if meta['no_day'] != no_day or meta['shapes'] != _as_json(shapes):
+                # a different simulation, start again
+                meta = None
+
+        results = {}
+        for name, shape in shapes.items():
+            dtype = bool if name == 'optimal' else float
+            if result_dir is None:
+                results[name] = np.zeros(no_day, dtype = bool) if dtype is bool else np.full((no_day, *shape), np.nan)
+                continue
+            os.makedirs(result_dir, exist_ok = True)
+            path = os.path.join(result_dir, f'{name}.npy')
+            if meta is not None:
+                results[name] = open_memmap(path, mode = 'r+')
+            else:
+                results[name] = open_memmap(path, mode = 'w+', dtype = dtype, shape = (no_day, *shape))
+                if dtype is float:
+                    results[name][:] = np.nan
+
+        return results, meta
+
+    def _write_meta(self, result_dir, results, meta):
+        """flush the results of the completed days and then the meta (written last, it marks the days as complete)"""
+        for value in results.values():
+            value.flush()
+        tmp_path = os.path.join(result_dir, f'meta.json.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(result_dir, 'meta.json'))
+
+    def run(self, actual, forecast = None, no_day = None, pg_init = None, ug_init = None, result_dir = None,
+            flush_every = 1, verbose = True):
+        """
+        simulate the consecutive days
+        actual: the actual load and renewables as utils.DataWindows (or {'load': (no_window, T * no_load), ...}),
+            day d is the window d * T
+        forecast: the forecast in the same format, the actual values (perfect forecast) if None
+        no_day: the number of days, all the days of actual if None
+        pg_init, ug_init: the initial condition of the first day, default to grid_op.pg_init and grid_op.ug_init
+        result_dir: the folder to stream the results to, kept in memory if None
+        flush_every: the number of days between the writes of the completed days to result_dir
+        return: {name: (no_day, ...) array} of the result_shapes, nan (and optimal = False) for the failed days
+        """
+
+        no_window = len(actual['load']) if isinstance(actual, dict) else len(actual)
+        no_day = (no_window - 1) // self.T + 1 if no_day is None else no_day
+        assert (no_day - 1) * self.T < no_window, "not enough windows for the days"
+        forecast = actual if forecast is None else forecast
+
+        results, meta = self._open_results(no_day, result_dir)
+        if meta is not None:
+            start_day, pg_state, ug_state = meta['no_day_done'], np.array(meta['pg_init']), np.array(meta['ug_init'])
+            if verbose:
+                print(f"resume the simulation from day {start_day}")
+        else:
+            start_day = 0
+            if pg_init is None:
+                assert hasattr(self.grid_op, 'pg_init'), "pg_init is required, or build the operation with pg_init_ratio"
+                pg_init = self.grid_op.pg_init
+            if ug_init is None:
+                ug_init = getattr(self.grid_op, 'ug_init', np.ones(self.grid_op.no_gen))
+            pg_state, ug_state = np.asarray(pg_init, dtype = float), np.asarray(ug_init, dtype = float)
+
+        grid_op = self.grid_op
+        for day in range(start_day, no_day):
+            i = day * self.T
+
+            # day-ahead ncuc on the forecast from the state of the previous day
+            params_uc = {**_window(forecast, i), 'pg_init': pg_state}
+            if self.with_int:
+                params_uc['ug_init'] = ug_state
+            optimal = self._solve(self.uc, params_uc)
+
+            if optimal:
+                sol_uc = Operation.get_sol(self.uc, T = self.T, reshaped = True)
+                # real-time ed on the actual values with the dispatch (and commitment) of the ncuc
+                params_ed = {**_window(actual, i), 'pg_uc': sol_uc['pg'].flatten()}
+                if self.with_int:
+                    params_ed['ug'] = np.round(sol_uc['ug']).flatten()
+                optimal = self._solve(self.ed, params_ed)
+
+            results['optimal'][day] = optimal
+            if optimal:
+                sol_ed = Operation.get_sol(self.ed, T = self.T, reshaped = True)
+                results['uc_cost'][day] = self.uc.value
+                results['ed_cost'][day] = self.ed.value
+                results['pg'][day] = sol_ed['pg']
+                results['load_shed'][day] = sol_ed['ls']
+                if grid_op.no_solar > 0:
+                    results['solar_curtailment'][day] = sol_ed['solarc']
+                if grid_op.no_wind > 0:
+                    results['wind_curtailment'][day] = sol_ed['windc']
+                results['pf'][day] = grid_op.get_pf(sol_ed['theta'])
+
+                # the state at the end of the day, kept from the previous day if the day failed
+                pg_state = sol_ed['pg'][-1]
+                if self.with_int:
+                    results['ug'][day] = np.round(sol_uc['ug'])
+                    ug_state = np.round(sol_uc['ug'][-1])
+            elif verbose:
+                print(f"day {day}: the uc or ed is not solved ({self.uc.status}, {self.ed.status}), the state is kept")
+
+            if result_dir is not None and ((day + 1) % flush_every == 0 or day == no_day - 1):
+                self._write_meta(result_dir, results, {
+                    'no_day': no_day, 'shapes': _as_json(self.result_shapes()), 'no_day_done': day + 1,
+                    'pg_init': pg_state.tolist(), 'ug_init': ug_state.tolist()
+                    })
+
+        return results
+
+    def _solve(self, prob, parameters):
+        """solve the problem and return if it is solved, the failure of the solver does not abort the simulation"""
+        try:
+            Operation.solve(prob, parameters, solver = self.solver, **self.solver_options)
+        except cp.error.SolverError:
+            return False
+        return prob.status in [cp.OPTIMAL, cp.OPTIMAL_INACCURATE]
+
+def _window(data, i):
+    """the parameters of window i from utils.DataWindows or a dict of (no_window, size) arrays"""
+    if isinstance(data, dict):
+        return {name: value[i] for name, value in data.items()}
+    return data[i]
+
+def _as_json(shapes):
+    """the shapes as they are saved in meta.json"""
+    return {name: list(shape) for name, shape in shapes.items()}
@@ -0,0 +1,169 @@
+"""
+opt-in memoization of the solutions of Operation.solve
+a solve is keyed by the identity of the problem (problem_identity of the grid data the problem is built from,
+attached by the builders of Operation), the solver and its options, and the values of all the parameters
+quantized by quantum. On a hit, the solver is skipped: the variables, the duals, the status and the optimal value
+are restored, so that Operation.get_sol returns the same dictionary. The solver_stats are not updated.
+Only the optimal (and optimal_inaccurate) solutions are cached.
+the cache is an in-memory LRU bounded by the number of solutions (maxsize) and their size (max_bytes), with an
+optional folder of pickle files (cache_dir) shared between the processes, e.g. the workers of solve_batch and
+the reruns of a sweep
+"""
+
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+import numpy as np
+import scipy.sparse as sp
+import cvxpy as cp
+
+# the options of the solve that do not change the solution
+_IGNORED_OPTIONS = {'warm_start', 'verbose'}
+# the status of the solutions that are cached, the others (e.g. infeasible, or stopped by a time limit) are solved again
+CACHED_STATUS = (cp.OPTIMAL, cp.OPTIMAL_INACCURATE)
+
+def problem_identity(grid_op, kind):
+    """sha256 of the kind of the problem (e.g. 'ed_int') and the public data of grid_op at the time of the build"""
+    sha = hashlib.sha256(kind.encode())
+    for name, value in sorted(vars(grid_op).items()):
+        if name.startswith('_') or name in ['init_args', 'active_lines']:
+            continue
+        sha.update(name.encode())
+        if sp.issparse(value):
+            value = value.tocsr()
+            for array in [value.data, value.indices, value.indptr, np.asarray(value.shape)]:
+                sha.update(np.ascontiguousarray(array).tobytes())
+        elif isinstance(value, np.ndarray):
+            sha.update(str((value.dtype, value.shape)).encode() + np.ascontiguousarray(value).tobytes())
+        else:
+            sha.update(repr(value).encode())
+    return sha.hexdigest()
+
+class SolutionCache:
+
+    def __init__(self, maxsize = 1024, max_bytes = 1 << 28, cache_dir = None, quantum = 1e-8, status = CACHED_STATUS):
+        """
+        maxsize: the number of the solutions kept in memory
+        max_bytes: the total size (bytes) of the solutions kept in memory
+        cache_dir: the folder of the solutions shared between the processes, memory only if None
+        quantum: the parameter values are rounded to the multiples of quantum in the key
+        status: only the solutions of these status are cached, e.g. (cp.OPTIMAL,) to solve the inaccurate ones again
+        """
+        self.enabled = False
+        self.configure(maxsize, max_bytes, cache_dir, quantum, status)
+
+    def configure(self, maxsize = 1024, max_bytes = 1 << 28, cache_dir = None, quantum = 1e-8, status = CACHED_STATUS):
+        """set the bounds and the folder, the solutions in memory are removed"""
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.quantum = quantum
+        self.status = tuple(status)
+        self.clear()
+
+    def config(self):
+        """the arguments of configure, e.g. to enable the same cache in the worker processes"""
+        return dict(maxsize = self.maxsize, max_bytes = self.max_bytes, cache_dir = self.cache_dir, quantum = self.quantum,
+                    status = self.status)
+
+    def clear(self, disk = False):
+        """remove the solutions in memory (and the files in cache_dir if disk) and reset the counts"""
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits, self.disk_hits, self.misses = 0, 0, 0
+        if disk and self.cache_dir is not None and os.path.isdir(self.cache_dir):
+            for file in os.listdir(self.cache_dir):
+                if file.endswith('.pkl'):
+                    os.remove(os.path.join(self.cache_dir, file))
+
+    def key(self, prob, solver, solver_options):
+        """the key of the solve of prob with the current parameter values, None if prob has no identity"""
+        identity = getattr(prob, 'identity', None)
+        if identity is None:
+            return None
+        sha = hashlib.sha256(identity.encode())
+        options = {name: value for name, value in solver_options.items() if name not in _IGNORED_OPTIONS}
+        sha.update(repr((solver.upper(), sorted(options.items()))).encode())
+        for param in sorted(prob.parameters(), key = lambda param: param.name()):
+            if param.value is None:
+                return None
+            value = np.round(np.asarray(param.value, dtype = float) / self.quantum).astype(np.int64)
+            sha.update(param.name().encode() + value.tobytes())
+        return sha.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.pkl')
+
+    def _get(self, key):
+        """the solution of the key from the memory, then from cache_dir"""
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        if self.cache_dir is not None and os.path.exists(self._path(key)):
+            with open(self._path(key), 'rb') as f:
+                entry = pickle.load(f)
+            self._put_memory(key, entry)
+            self.hits += 1
+            self.disk_hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def _put_memory(self, key, entry):
+        """add the solution and evict the least recently used solutions beyond maxsize or max_bytes"""
+        self.entries[key] = entry
+        self.nbytes += entry['nbytes']
+        while len(self.entries) > self.maxsize or (self.nbytes > self.max_bytes and len(self.entries) > 1):
+            _, evicted = self.entries.popitem(last = False)
+            self.nbytes -= evicted['nbytes']
+
+    def restore(self, prob, key):
+        """restore the cached solution of the key into prob, return False if it is not cached"""
+        entry = self._get(key)
+        if entry is None:
+            return False
+        for var, value in zip(prob.variables(), entry['primal']):
+            var.save_value(value)
+        for constr, value in zip(prob.constraints, entry['dual']):
+            if value is not None:
+                constr.save_dual_value(value)
+        prob._status, prob._value = entry['status'], entry['value']
+        return True
+
+    def store(self, prob, key):
+        """cache the solution of the solved prob if its status is in self.status, return True if cached"""
+        if prob.status not in self.status:
+            return False
+        primal = [None if var.value is None else np.array(var.value) for var in prob.variables()]
+        dual = [None if constr.dual_value is None else np.array(constr.dual_value) for constr in prob.constraints]
+        entry = {'status': prob.status, 'value': prob.value, 'primal': primal, 'dual': dual,
+                'nbytes': sum(value.nbytes for value in primal + dual if value is not None)}
+        self._put_memory(key, entry)
+        if self.cache_dir is not None:
+            # ! write to a temporary file first so that the other processes never read a partial file
+            os.makedirs(self.cache_dir, exist_ok = True)
+            tmp_path = f'{self._path(key)}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(entry, f, protocol = pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        return True
+
+    def summary(self):
+        return (f"{len(self.entries)} solutions in memory ({self.nbytes / 1e6:.1f} MB), "
+                f"{self.hits} hits ({self.disk_hits} from disk), {self.misses} misses")
+
+# the cache of Operation.solve in the current process
+SOLUTION_CACHE = SolutionCache()
+
+def enable_solution_cache(maxsize = 1024, max_bytes = 1 << 28, cache_dir = None, quantum = 1e-8, status = CACHED_STATUS):
+    """start caching the solutions of Operation.solve into SOLUTION_CACHE (emptied)"""
+    SOLUTION_CACHE.configure(maxsize, max_bytes, cache_dir, quantum, status)
+    SOLUTION_CACHE.enabled = True
+    return SOLUTION_CACHE
+
+def disable_solution_cache():
+    SOLUTION_CACHE.enabled = False
+    return SOLUTION_CACHE
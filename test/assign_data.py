@@ -0,0 +1,119 @@
+"""
+test assign_data against the previous assign_data (one pd.read_csv per bus file) on synthetic grouped data:
+the data_{i}.csv files are the same byte by byte, with the index written by group_data, written at the first call
+and rewritten after a change of the bus files
+"""
+
+import os
+import sys
+import filecmp
+import random
+import tempfile
+import numpy as np
+import pandas as pd
+sys.path.append('.')
+from utils import group_data, assign_data
+from benchmark.group_data import make_raw_data
+
+def assign_data_read_csv(xlsx_dir, save_dir, seed):
+    """the previous assign_data, the bus files are read one by one until the solar (wind) buses are found"""
+
+    np.random.seed(seed)
+    random.seed(seed)
+
+    all_sheets = pd.read_excel(xlsx_dir, sheet_name=None, engine='openpyxl')
+    load_config = all_sheets['load']
+    no_load = len(load_config)
+    data_all = {key: [] for key in range(1, no_load + 1)}
+
+    data_grouped_dir = 'data/data_grouped'
+    file_name = os.listdir(data_grouped_dir)
+    assigned_name = []
+
+    for kind in ['solar', 'wind']:
+        if kind not in all_sheets.keys():
+            continue
+        config = all_sheets[kind]
+        for i in range(len(config)):
+            load_idx = load_config[load_config['idx'] == config['idx'][i]].index.values[0] + 1
+            for name in file_name:
+                if '.csv' in name and name not in assigned_name:
+                    data = pd.read_csv(os.path.join(data_grouped_dir, name))
+                    if np.sum(data[kind.capitalize()]) > 0:
+                        assigned_name.append(name)
+                        data['Load'] = data['Load'] * load_config['default'][load_idx - 1] / np.max(data['Load'])
+                        data[kind.capitalize()] = data[kind.capitalize()] * config['default'][i] / np.max(data[kind.capitalize()])
+                        data_all[load_idx] = data
+                        break
+
+    remaining_file_name = [name for name in file_name if name not in assigned_name and '.csv' in name]
+    remaining_file_name = np.random.choice(remaining_file_name, no_load - len(assigned_name), replace=False)
+
+    idx = 0
+    for i in range(1, no_load + 1):
+        if len(data_all[i]) == 0:
+            data = pd.read_csv(os.path.join(data_grouped_dir, remaining_file_name[idx]))
+            data['Load'] = data['Load'] * load_config['default'][i - 1] / np.max(data['Load'])
+            data['Solar'] = 0
+            data['Wind'] = 0
+            data_all[i] = data
+            idx += 1
+
+    os.makedirs(save_dir)
+    for i in range(1, no_load + 1):
+        data_all[i].to_csv(os.path.join(save_dir, f'data_{i}.csv'), index=False)
+
+def same_assignment(xlsx_dir, seed, name):
+    """if assign_data writes the same data_{i}.csv files as the previous assign_data"""
+    ref_dir, save_dir = f'data/{name}_read_csv', f'data/{name}'
+    assign_data_read_csv(xlsx_dir, ref_dir, seed)
+    assign_data(xlsx_dir, save_dir, seed, force_new = True)
+    files = sorted(os.listdir(ref_dir))
+    _, mismatch, errors = filecmp.cmpfiles(ref_dir, save_dir, files, shallow = False)
+    return len(mismatch) == 0 and len(errors) == 0
+
+def test_assign_data(args):
+
+    xlsx_dir = {case_name: os.path.abspath(f"configs/{case_name}.xlsx") for case_name in args.pypower_case_name}
+    work_dir = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # assign_data reads the grouped data from data/data_grouped of the working directory
+        os.chdir(tmp_dir)
+        try:
+            make_raw_data('data/Data_public', args.no_day)
+            group_data('data/Data_public', 'data/data_grouped', args.no_day, n_workers = 1)
+            index_path = 'data/data_grouped/index.json'
+
+            for case_name in args.pypower_case_name:
+                for seed in range(args.no_seed):
+                    name = f'{case_name}_{seed}'
+                    assert same_assignment(xlsx_dir[case_name], seed, name), f"the data of {name} is not the same to the previous assign_data"
+
+            # the index is written at the first call
+            os.remove(index_path)
+            assert same_assignment(xlsx_dir[args.pypower_case_name[0]], 0, 'no_index'), "the data is not the same without the index"
+            assert os.path.exists(index_path), "the index is not written by assign_data"
+
+            # the stale index is rewritten after a change of the bus files
+            data = pd.read_csv('data/data_grouped/bus_1.csv')
+            data['Load'] = data['Load'] * 2
+            data['Solar'] = 0
+            data.to_csv('data/data_grouped/bus_1.csv', index = False)
+            assert same_assignment(xlsx_dir[args.pypower_case_name[0]], 0, 'stale_index'), "the data is not the same after a change of the bus files"
+        finally:
+            os.chdir(work_dir)
+
+    print('All tests passed')
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, nargs='+', default=["case14", "case39", "case118"])
+    parser.add_argument('--no_day', type=int, default=1)
+    parser.add_argument('--no_seed', type=int, default=2)
+    args = parser.parse_args()
+
+    test_assign_data(args)
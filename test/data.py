@@ -5,6 +5,9 @@ test the data
 import pandas as pd
 import numpy as np
 import os
+import sys
+sys.path.append('.')
+from utils.data_store import read_data_store
 
 def test_data(xlsx_path, data_folder):
 
@@ -13,9 +16,17 @@ def test_data(xlsx_path, data_folder):
     wind_config = pd.read_excel(xlsx_path, sheet_name='wind', engine='openpyxl')
 
     no_load = len(load_config)
+    
+    # the binary store written by assign_data is the same to the csv export
+    store = read_data_store(data_folder, no_load)
+    assert store is not None, "the binary store is missing or stale"
 
     for i in range(1, no_load + 1):
         data = pd.read_csv(os.path.join(data_folder, f"data_{i}.csv"))
+        assert np.allclose(store['load'][:, i - 1] * store['meta']['baseMVA'], data['Load']), f"load {i} of the binary store is not consistent"
+        if i - 1 in store['meta']['solar_idx']:
+            solar_col = store['meta']['solar_idx'].index(i - 1)
+            assert np.allclose(store['solar'][:, solar_col] * store['meta']['baseMVA'], data['Solar']), f"solar {i} of the binary store is not consistent"
         assert np.isclose(np.max(data['Load']), load_config['default'][i - 1], atol=1e-5), f"load {i} value is not correct"
         if data['Solar'].sum() > 0:
             print(f"load {i} has solar")
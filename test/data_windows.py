@@ -0,0 +1,63 @@
+"""
+test the zero-copy sliding windows against the slicing of the data
+"""
+
+import sys
+import numpy as np
+sys.path.append('.')
+from utils import DataWindows, get_data, load_grid_from_xlsx
+
+def test_data_windows(args):
+
+    T = args.T
+    grid_op = load_grid_from_xlsx(xlsx_path = args.xlsx_path, T = T, reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1)
+    load_all, solar_all, wind_all = get_data(grid_op.no_load, args.data_folder, grid_op)
+    data_all = {'load': load_all, 'solar': solar_all, 'wind': wind_all}
+
+    windows = DataWindows(load_all, solar_all, wind_all, T)
+    assert len(windows) == load_all.shape[0] - T + 1, "the number of windows is not correct"
+    assert set(windows.windows.keys()) == {name for name, data in data_all.items() if data is not None}, "the names of the windows are not correct"
+
+    # the windows are the same to data_all[i:i + T].flatten() without copy
+    for i in [0, 1, len(windows) // 2, len(windows) - 1]:
+        window = windows[i]
+        for name, value in window.items():
+            assert np.array_equal(value, data_all[name][i:i + T].flatten()), f"{name} window {i} is not correct"
+            assert np.shares_memory(value, data_all[name]), f"{name} window {i} is a copy"
+            assert not value.flags.writeable, f"{name} window {i} is writeable"
+
+    # chunks of the consecutive windows and of the random windows
+    chunk_size = 100
+    for idx, chunk in windows.chunks(chunk_size):
+        assert np.array_equal(chunk['load'], np.stack([load_all[i:i + T].flatten() for i in idx])), f"chunk {idx[0]} is not correct"
+    idx_all = np.random.default_rng(0).choice(len(windows), min(250, len(windows)), replace = False)
+    no_taken = 0
+    for idx, chunk in windows.chunks(chunk_size, idx_all):
+        assert np.array_equal(idx, idx_all[no_taken:no_taken + len(idx)]), "the order of the chunks is not correct"
+        assert np.array_equal(chunk['load'], load_all[idx[:, None] + np.arange(T)].reshape(len(idx), -1)), f"chunk of {idx[0]} is not correct"
+        no_taken += len(idx)
+    assert no_taken == len(idx_all), "not all the windows are taken"
+
+    # the noisy windows are written into the buffer within the bounds
+    buffer = windows.noise_buffer()
+    rng = np.random.default_rng(0)
+    for i in [0, len(windows) - 1]:
+        noisy = windows.noisy(i, 0.9, 1.1, out = buffer, rng = rng)
+        for name, value in noisy.items():
+            assert value is buffer[name], f"the noisy {name} is not written into the buffer"
+            ratio = value[windows[i][name] > 0] / windows[i][name][windows[i][name] > 0]
+            assert np.all(ratio >= 0.9 - 1e-12) and np.all(ratio < 1.1 + 1e-12), f"the noisy {name} of window {i} is out of the bounds"
+
+    print('All tests passed')
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-x', '--xlsx_path', type=str, default="configs/case14.xlsx")
+    parser.add_argument('-d', '--data_folder', type=str, default="data/case14")
+    parser.add_argument('-T', '--T', type=int, default=24)
+    args = parser.parse_args()
+
+    test_data_windows(args)
@@ -0,0 +1,134 @@
+"""
+test the batched dc power flow against get_pf of the optimized solutions, the dense and sparse grids against each other
+and the factorization after a change of the reactances and of the branches
+"""
+
+import sys
+import numpy as np
+import scipy.sparse as sp
+sys.path.append('.')
+from operation import Operation, PowerGrid
+from utils import DataWindows, get_data, random_params
+
+def test_dc_power_flow(args):
+
+    rng = np.random.default_rng(0)
+    T = args.T
+    grid_op = Operation(f"configs/{args.pypower_case_name}.xlsx", T, reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1,
+                        sparse = args.sparse, vectorize = True)
+    uc, ed = grid_op.get_opt(False)
+
+    injection_all, pf_all, theta_all = [], [], []
+    for i in range(args.no_sample):
+        params = random_params(grid_op, rng)
+        Operation.solve(uc, params, solver = args.solver)
+        Operation.solve(ed, {**params, 'pg_uc': Operation.get_sol(uc)['pg']}, solver = args.solver)
+        sol = Operation.get_sol(ed, T = T, reshaped = True)
+
+        # the net injection of the ed solution
+        injection = grid_op.net_injection(
+            sol['pg'] - sol['es'], params['load'].reshape(T, -1) - sol['ls'],
+            params['solar'].reshape(T, -1) - sol['solarc'] if grid_op.no_solar > 0 else None,
+            params['wind'].reshape(T, -1) - sol['windc'] if grid_op.no_wind > 0 else None
+            )
+        pf, theta = grid_op.dc_power_flow(injection, return_theta = True)
+        assert pf.shape == (T, grid_op.no_branch) and theta.shape == (T, grid_op.no_bus), "the shapes are not correct"
+        assert np.allclose(pf, grid_op.get_pf(sol['theta']), atol = args.atol), f"the flows of sample {i} are not the same to get_pf"
+        assert np.allclose(theta, sol['theta'], atol = args.atol), f"the angles of sample {i} are not the same to the ed"
+        injection_all.append(injection), pf_all.append(pf), theta_all.append(theta)
+
+    # the batch in one call, with the leading dimensions and in chunks
+    injection_all = np.stack(injection_all)
+    pf_batch, theta_batch = grid_op.dc_power_flow(injection_all, return_theta = True, chunk_size = 7)
+    assert pf_batch.shape == (args.no_sample, T, grid_op.no_branch), "the shape of the batch is not correct"
+    assert np.allclose(pf_batch, np.stack(pf_all), atol = 1e-10) and np.allclose(theta_batch, np.stack(theta_all), atol = 1e-10), \
+        "the batch is not the same to the samples"
+
+    # the flows of the load windows with the generation in proportion to pgmax
+    if args.data_folder is not None:
+        load_all, solar_all, wind_all = get_data(grid_op.no_load, args.data_folder, grid_op)
+        windows = DataWindows(load_all, solar_all, wind_all, T)
+        load = windows.take(np.arange(min(100, len(windows))))['load'].reshape(-1, T, grid_op.no_load)
+        pg = np.sum(load, axis = -1, keepdims = True) * grid_op.pgmax / np.sum(grid_op.pgmax)
+        injection = grid_op.net_injection(pg, load)
+        pf = grid_op.dc_power_flow(injection)
+        # the dispatch is balanced, so the flows satisfy the power balance at all the buses: A^T pf = injection
+        balance = np.asarray((grid_op.A.T @ pf.reshape(-1, grid_op.no_branch).T).T)
+        assert np.allclose(balance, injection.reshape(-1, grid_op.no_bus), atol = 1e-8), "the flows of the windows are not balanced"
+
+    test_factor(args)
+
+    print('All tests passed')
+
+def ptdf_flow(grid, injection):
+    """the branch flows of the injections by the ptdf of the current grid (not cached)"""
+    PTDF, _ = grid.get_ptdf()
+    return (injection - grid.Pbusshift) @ PTDF.T + grid.Pfshift
+
+def set_branches(grid, Bf):
+    """update the branch and bus susceptance matrices of the grid, keeping the dense or sparse storage"""
+    Bf = sp.csr_matrix(Bf)
+    Bbus = (sp.csr_matrix(grid.A).T @ Bf).tocsr()
+    grid.Bf, grid.Bbus = (Bf, Bbus) if grid.sparse else (Bf.toarray(), Bbus.toarray())
+
+def test_factor(args):
+    """the dense and sparse grids have the same ptdf and flows, and the factor follows the changes of Bbus"""
+
+    rng = np.random.default_rng(1)
+    grid = {sparse: PowerGrid(f"configs/{args.pypower_case_name}.xlsx", sparse = sparse) for sparse in [False, True]}
+    injection = rng.normal(size = (args.no_sample, grid[True].no_bus))
+
+    PTDF_dense, X_dense = grid[False].get_ptdf()
+    PTDF_sparse, X_sparse = grid[True].get_ptdf()
+    assert np.allclose(PTDF_dense, PTDF_sparse, atol = 1e-10) and np.allclose(X_dense, X_sparse, atol = 1e-10), \
+        "the ptdf of the dense and sparse grids are not the same"
+    pf_dense, theta_dense = grid[False].dc_power_flow(injection, return_theta = True)
+    pf_sparse, theta_sparse = grid[True].dc_power_flow(injection, return_theta = True)
+    assert np.allclose(pf_dense, pf_sparse, atol = 1e-10) and np.allclose(theta_dense, theta_sparse, atol = 1e-10), \
+        "the dc flows of the dense and sparse grids are not the same"
+    assert np.allclose(pf_sparse, ptdf_flow(grid[True], injection), atol = 1e-8), "the dc flows are not the same to the ptdf"
+
+    for sparse, grid_ in grid.items():
+        Bf = sp.csr_matrix(grid_.Bf)
+        pf_before = grid_.dc_power_flow(injection)
+
+        # the reactance of the first branch is doubled
+        scale = np.ones(grid_.no_branch)
+        scale[0] = 0.5
+        set_branches(grid_, sp.diags(scale) @ Bf)
+        pf = grid_.dc_power_flow(injection)
+        assert not np.allclose(pf, pf_before), f"the factor is not updated after the change of the reactance (sparse = {sparse})"
+        assert np.allclose(pf, ptdf_flow(grid_, injection), atol = 1e-8), f"the flows after the change of the reactance are not correct (sparse = {sparse})"
+
+        # the outage of a branch that keeps the grid connected
+        for k in range(grid_.no_branch):
+            status = np.ones(grid_.no_branch)
+            status[k] = 0
+            Bbus = (sp.csr_matrix(grid_.A).T @ sp.diags(status) @ Bf).toarray()
+            non_slack = np.delete(np.arange(grid_.no_bus), grid_.slack_idx)
+            if np.linalg.matrix_rank(Bbus[np.ix_(non_slack, non_slack)]) == len(non_slack):
+                break
+        set_branches(grid_, sp.diags(status) @ Bf)
+        pf = grid_.dc_power_flow(injection)
+        assert np.allclose(pf[:, k], 0) and np.allclose(pf, ptdf_flow(grid_, injection), atol = 1e-8), \
+            f"the flows after the outage of branch {k} are not correct (sparse = {sparse})"
+
+        # back to the original branches
+        set_branches(grid_, Bf)
+        assert np.allclose(grid_.dc_power_flow(injection), pf_before, atol = 1e-10), f"the factor is not restored (sparse = {sparse})"
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, default="case14")
+    parser.add_argument('-d', '--data_folder', type=str, default=None)
+    parser.add_argument('-T', '--T', type=int, default=6)
+    parser.add_argument('-s', '--no_sample', type=int, default=5)
+    parser.add_argument('--dense', dest='sparse', default=True, action='store_false')
+    parser.add_argument('--solver', type=str, default="GUROBI")
+    parser.add_argument('--atol', type=float, default=1e-5)
+    args = parser.parse_args()
+
+    test_dc_power_flow(args)
@@ -7,18 +7,23 @@ import numpy as np
 sys.path.append('.')
 from utils import load_grid_from_xlsx
 from pypower import api
+from scipy.sparse import issparse
 
-def test_grid_formulation(pypower_case_name, xlsx_path):
+def test_grid_formulation(pypower_case_name, xlsx_path, sparse = False):
     
-    my_grid = load_grid_from_xlsx(xlsx_path, T=1, reserve=0.0)
+    my_grid = load_grid_from_xlsx(xlsx_path, T=1, reserve=0.0, sparse=sparse)
     grid_pypower = getattr(api, pypower_case_name)()
     grid_pypower_int = api.ext2int(grid_pypower)
 
     Bbus, Bf, Pbusinj, Pfinj = api.makeBdc(grid_pypower_int['baseMVA'], 
                                         grid_pypower_int['bus'], 
                                         grid_pypower_int['branch'])
-    assert np.allclose(my_grid.Bbus, Bbus.toarray()), "Bbus is not equal to the pypower results, probably due to the overwrite of the tap_ratio"
-    assert np.allclose(my_grid.Bf, Bf.toarray()), "Bf is not equal to the pypower results, probably due to the overwrite of the tap_ratio"
+    if sparse:
+        assert issparse(my_grid.Bbus) and issparse(my_grid.Bf) and issparse(my_grid.Cg), "the matrices are not sparse"
+    Bbus_my = my_grid.Bbus.toarray() if sparse else my_grid.Bbus
+    Bf_my = my_grid.Bf.toarray() if sparse else my_grid.Bf
+    assert np.allclose(Bbus_my, Bbus.toarray()), "Bbus is not equal to the pypower results, probably due to the overwrite of the tap_ratio"
+    assert np.allclose(Bf_my, Bf.toarray()), "Bf is not equal to the pypower results, probably due to the overwrite of the tap_ratio"
     assert np.allclose(my_grid.Pbusshift, Pbusinj), "Pbusinj is not equal to the pypower results"
     assert np.allclose(my_grid.Pfshift, Pfinj), "Pfinj is not equal to the pypower results"
 
@@ -32,4 +37,5 @@ if __name__ == "__main__":
     parser.add_argument('-x', '--xlsx_path', type=str, default="configs/case14.xlsx")
     args = parser.parse_args()
 
-    test_grid_formulation(args.pypower_case_name, xlsx_path=args.xlsx_path)
\ No newline at end of file
+    test_grid_formulation(args.pypower_case_name, xlsx_path=args.xlsx_path)
+    test_grid_formulation(args.pypower_case_name, xlsx_path=args.xlsx_path, sparse=True)
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""
+test the binary copy of the grid configuration is the same to the xlsx file and is rebuilt when stale
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+sys.path.append('.')
+from operation import PowerGrid, read_grid, write_grid_binary
+from operation.grid_io import read_grid_binary
+
+def test_grid_io(xlsx_path):
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_xlsx_path = os.path.join(tmp_dir, os.path.basename(xlsx_path))
+        shutil.copy(xlsx_path, tmp_xlsx_path)
+
+        # the read falls back to the xlsx file and only writes the binary copy if write_through
+        assert read_grid_binary(tmp_xlsx_path) is None, "the binary copy should be missing"
+        read_grid(tmp_xlsx_path)
+        assert read_grid_binary(tmp_xlsx_path) is None, "the binary copy is written without write_through"
+        sheets_xlsx = read_grid(tmp_xlsx_path, write_through = True)
+        sheets_binary = read_grid_binary(tmp_xlsx_path)
+        assert sheets_binary is not None, "the binary copy is not written"
+        assert sheets_xlsx.keys() == sheets_binary.keys(), "the sheets are not the same"
+        for sheet_name in sheets_xlsx.keys():
+            pd.testing.assert_frame_equal(sheets_xlsx[sheet_name], sheets_binary[sheet_name])
+
+        grid_xlsx = PowerGrid(xlsx_path)
+        grid_binary = PowerGrid(tmp_xlsx_path)
+        for name, value in vars(grid_xlsx).items():
+            assert np.array_equal(value, getattr(grid_binary, name)), f"{name} is not the same"
+
+        # modify the xlsx file, the binary copy becomes stale
+        sheets_xlsx['branch']['pfmax'] = sheets_xlsx['branch']['pfmax'] * 2
+        with pd.ExcelWriter(tmp_xlsx_path, engine='xlsxwriter') as writer:
+            for element_name, element_df in sheets_xlsx.items():
+                element_df.to_excel(writer, sheet_name=element_name, index=False)
+        assert read_grid_binary(tmp_xlsx_path) is None, "the stale binary copy is not detected"
+        assert np.allclose(PowerGrid(tmp_xlsx_path).pfmax, grid_xlsx.pfmax * 2), "the modified xlsx file is not loaded"
+        write_grid_binary(tmp_xlsx_path)
+        assert read_grid_binary(tmp_xlsx_path) is not None, "the binary copy is not rebuilt"
+        assert np.allclose(PowerGrid(tmp_xlsx_path).pfmax, grid_xlsx.pfmax * 2), "the rebuilt binary copy is not the modified xlsx file"
+
+    print('All tests passed')
+
+if __name__ == "__main__":
+
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-x', '--xlsx_path', type=str, default="configs/case14.xlsx")
+    args = parser.parse_args()
+
+    test_grid_io(args.xlsx_path)
@@ -0,0 +1,78 @@
+"""
+test group_data against the previous grouping (one pd.concat per hour and bus) on a few synthetic days:
+the output files are the same byte by byte, also after an interrupted grouping is resumed from the parsed days
+"""
+
+import os
+import sys
+import filecmp
+import tempfile
+import importlib
+sys.path.append('.')
+from benchmark.group_data import make_raw_data, group_data_concat
+
+# the module, utils re-exports the function group_data under the same name
+grouping = importlib.import_module('utils.group_data')
+
+def same_files(ref_dir, save_dir):
+    """the files of the previous grouping are the same byte by byte (the index and series.npy are new)"""
+    files = sorted(os.listdir(ref_dir))
+    _, mismatch, errors = filecmp.cmpfiles(ref_dir, save_dir, files, shallow = False)
+    return len(mismatch) == 0 and len(errors) == 0
+
+def test_group_data(args):
+
+    no_day = args.no_day
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        raw_dir = os.path.join(tmp_dir, 'Data_public')
+        make_raw_data(raw_dir, no_day)
+        ref_dir = os.path.join(tmp_dir, 'concat')
+        group_data_concat(raw_dir, ref_dir, no_day)
+
+        save_dir = os.path.join(tmp_dir, 'grouped')
+        grouping.group_data(raw_dir, save_dir, no_day, n_workers = args.n_workers)
+        assert same_files(ref_dir, save_dir), "the grouped files are not the same to the previous grouping"
+        assert {'index.json', 'series.npy'} <= set(os.listdir(save_dir)), "the index of the grouped files is not written"
+        assert not os.path.exists(save_dir + '_partial'), "the parsed days are not removed"
+
+        # interrupt the grouping at the last day, the days before are kept in the partial folder
+        save_dir = os.path.join(tmp_dir, 'resumed')
+        load_path = os.path.join(raw_dir, 'load_2019', f'load_annual_D{no_day}.txt')
+        os.rename(load_path, load_path + '.hidden')
+        try:
+            grouping.group_data(raw_dir, save_dir, no_day, n_workers = 1)
+            raise AssertionError("the grouping is not interrupted")
+        except FileNotFoundError:
+            pass
+        os.rename(load_path + '.hidden', load_path)
+        assert not os.path.exists(save_dir), "the interrupted grouping writes the output folder"
+        assert sorted(os.listdir(save_dir + '_partial')) == [f'day_{day}.npz' for day in range(1, no_day)], "the parsed days are not kept"
+
+        # only the last day is parsed when resumed
+        parsed = []
+        read_day = grouping._read_day
+        def record(raw_dir, day, no_hour):
+            parsed.append(day)
+            return read_day(raw_dir, day, no_hour)
+        grouping._read_day = record
+        try:
+            grouping.group_data(raw_dir, save_dir, no_day, n_workers = 1)
+        finally:
+            grouping._read_day = read_day
+        assert parsed == [no_day], f"the days {parsed} are parsed when resumed"
+        assert same_files(ref_dir, save_dir), "the resumed grouping is not the same to the previous grouping"
+        assert not os.path.exists(save_dir + '_partial'), "the parsed days are not removed"
+
+    print('All tests passed')
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--no_day', type=int, default=2)
+    parser.add_argument('--n_workers', type=int, default=2)
+    args = parser.parse_args()
+
+    test_group_data(args)
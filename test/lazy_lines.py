@@ -0,0 +1,68 @@
+"""
+test the lazy line limit generation against the problem with all the line limits
+"""
+
+import sys
+import numpy as np
+sys.path.append('.')
+from utils import load_grid_from_xlsx, random_params
+
+def test_lazy_lines(args):
+
+    rng = np.random.default_rng(0)
+
+    T = args.T
+    with_int = False
+
+    grid_op = load_grid_from_xlsx(
+        xlsx_path = f"configs/{args.pypower_case_name}.xlsx", T = T,
+        reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1
+        )
+    uc, ed = grid_op.get_opt(with_int)
+
+    for i in range(args.no_sample):
+        params_val_dict_uc = random_params(grid_op, rng)
+
+        grid_op.solve(uc, params_val_dict_uc, solver = args.solver)
+        uc_lazy, no_iter_uc = grid_op.solve_lazy('uc', params_val_dict_uc, with_int = with_int, solver = args.solver)
+        assert np.isclose(uc.value, uc_lazy.value, rtol = 1e-4), f"uc value of sample {i} is not consistent"
+
+        params_val_dict_ed = {**params_val_dict_uc, 'pg_uc': grid_op.get_sol(uc_lazy)['pg']}
+        grid_op.solve(ed, params_val_dict_ed, solver = args.solver)
+        ed_lazy, no_iter_ed = grid_op.solve_lazy('ed', params_val_dict_ed, with_int = with_int, solver = args.solver)
+        assert np.isclose(ed.value, ed_lazy.value, rtol = 1e-4), f"ed value of sample {i} is not consistent"
+
+        pf = grid_op.get_pf(grid_op.get_sol(ed_lazy)['theta'])
+        assert np.all(np.abs(pf) <= grid_op.pfmax + 1e-4), f"the flow limit of sample {i} is violated"
+        print(f"sample {i}: iterations uc {no_iter_uc}, ed {no_iter_ed}, active lines {np.sum(grid_op.active_lines)}")
+
+    # the parametric limits: the lines are screened against the given pfmax, not the default of the grid
+    grid_op = load_grid_from_xlsx(
+        xlsx_path = f"configs/{args.pypower_case_name}.xlsx", T = T,
+        reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1, parametric = ['pfmax']
+        )
+    uc = grid_op.get_opt(with_int, 'uc')
+    for i in range(args.no_sample):
+        params = {**random_params(grid_op, rng), 'pfmax': grid_op.pfmax * rng.uniform(args.pfmax_ratio, 1.0, grid_op.no_branch)}
+        grid_op.solve(uc, params, solver = args.solver)
+        uc_lazy, no_iter_uc = grid_op.solve_lazy('uc', params, with_int = with_int, solver = args.solver)
+        assert np.isclose(uc.value, uc_lazy.value, rtol = 1e-4), f"uc value of sample {i} is not consistent with the parametric pfmax"
+        pf = grid_op.get_pf(grid_op.get_sol(uc_lazy)['theta'])
+        assert np.all(np.abs(pf) <= params['pfmax'] + 1e-4), f"the parametric flow limit of sample {i} is violated"
+        print(f"parametric sample {i}: iterations uc {no_iter_uc}, active lines {np.sum(grid_op.active_lines)}")
+
+    print('All tests passed')
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, default="case14")
+    parser.add_argument('-s', '--no_sample', type=int, default=5)
+    parser.add_argument('-T', '--T', type=int, default=6)
+    parser.add_argument('--pfmax_ratio', type=float, default=0.3, help="the parametric pfmax is 0.3 to 1 of the default")
+    parser.add_argument('--solver', type=str, default="GUROBI")
+    args = parser.parse_args()
+
+    test_lazy_lines(args)
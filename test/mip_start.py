@@ -0,0 +1,92 @@
+"""
+test the mip start of the ncuc with the integer variables: the candidates are consistent commitments,
+and the solve with the start reaches the same optimum (also by the stock scip interface outside the tested cvxpy)
+"""
+
+import sys
+import warnings
+import numpy as np
+import cvxpy as cp
+sys.path.append('.')
+import operation.mip_start as mip_start_module
+from operation import Operation, MipStart, first_incumbent
+from utils import DataWindows, get_data
+
+def test_mip_start(args):
+
+    T = args.T
+    grid_op = Operation(f"configs/{args.pypower_case_name}.xlsx", T, reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1,
+                        sparse = True, vectorize = True)
+    load_all, solar_all, wind_all = get_data(grid_op.no_load, args.data_folder, grid_op)
+    windows = DataWindows(load_all, solar_all, wind_all, T)
+
+    uc, uc_start = grid_op.get_opt(True, 'uc'), grid_op.get_opt(True, 'uc')
+    mip_start = MipStart(grid_op, solver = args.cont_solver)
+
+    for i in range(args.no_window):
+        params = windows[i]
+        Operation.solve(uc, params, solver = args.solver)
+        assert uc.status == cp.OPTIMAL, f"the ncuc of window {i} is not solved"
+        sol = Operation.get_sol(uc, T = T, reshaped = True)
+
+        # the relaxation is a lower bound
+        start = mip_start.get(uc_start, params)
+        assert mip_start.relaxed.value <= uc.value + 1e-4 * abs(uc.value), f"the relaxation of window {i} is above the ncuc"
+        assert start is not None, f"no candidate of window {i} is feasible: {mip_start.info}"
+        if i > 0:
+            assert 'previous' in mip_start.info['candidates'], "the previous commitment is not a candidate"
+
+        # the start-ups and shut-downs follow the commitment
+        ug, yg, zg = (start['primal'][name].reshape(T, -1) for name in ['ug', 'yg', 'zg'])
+        assert np.array_equal(yg - zg, np.diff(ug, axis = 0, prepend = grid_op.ug_init.reshape(1, -1))), "yg - zg is not the change of ug"
+        assert np.all(yg + zg <= 1) and set(np.unique(ug)) <= {0, 1}, "the commitment is not binary"
+        assert all(start['primal'][var.name()] is None for var in uc_start.variables() if var.name() not in ['ug', 'yg', 'zg']), \
+            "the continuous variables are in the start"
+
+        # the optimal commitment passes the check, and the ed cost is below the ncuc (the ed has no ramp limit)
+        feasible, cost, _ = mip_start.check(np.round(sol['ug']), sol['pg'], params)
+        assert feasible and cost <= uc.value + 1e-4 * abs(uc.value), f"the optimal commitment of window {i} does not pass the check"
+
+        # the same optimum with the start
+        Operation.solve(uc_start, params, solver = args.solver, warm_start = start)
+        assert uc_start.status == cp.OPTIMAL, f"the ncuc of window {i} is not solved with the start"
+        assert np.abs(uc_start.value - uc.value) <= 1e-4 * np.abs(uc.value), f"the optimal value of window {i} is not the same with the start"
+        mip_start.update(uc_start)
+
+        if args.solver.upper() == 'SCIP':
+            # the optimal commitment as the start is the first incumbent
+            commitment = mip_start.commitment(np.round(sol['ug']), params)
+            Operation.solve(uc_start, params, solver = args.solver, 
+                            warm_start = {'primal': {var.name(): commitment.get(var.name()) for var in uc_start.variables()}})
+            incumbent = first_incumbent(uc_start)
+            assert incumbent is not None and incumbent[1] <= 1e-4, f"the start of window {i} is not the first incumbent"
+
+            # outside the tested versions of cvxpy the stock interface solves without the start
+            tested = mip_start_module.SCIP_START_CVXPY
+            mip_start_module.SCIP_START_CVXPY = ((0, 0), (0, 0))
+            try:
+                with warnings.catch_warnings(record = True) as caught:
+                    warnings.simplefilter('always')
+                    Operation.solve(uc_start, params, solver = args.solver, warm_start = start)
+            finally:
+                mip_start_module.SCIP_START_CVXPY = tested
+            assert any('without the start' in str(warning.message) for warning in caught), "the unsupported version is not warned"
+            assert uc_start.status == cp.OPTIMAL and np.abs(uc_start.value - uc.value) <= 1e-4 * np.abs(uc.value), \
+                f"the optimal value of window {i} is not the same without the start"
+
+    print('All tests passed')
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, default="case14")
+    parser.add_argument('-d', '--data_folder', type=str, default="data/case14/")
+    parser.add_argument('-T', '--T', type=int, default=6)
+    parser.add_argument('-w', '--no_window', type=int, default=3)
+    parser.add_argument('--solver', type=str, default="GUROBI")
+    parser.add_argument('--cont_solver', type=str, default="GUROBI", help="the solver of the relaxation and the ed")
+    args = parser.parse_args()
+
+    test_mip_start(args)
@@ -0,0 +1,95 @@
+"""
+test the parallel chunked sweep of modify_pfmax against the serial sweep: the same maximum flows, the same infeasible
+windows (including the windows that are not solved) and the same xlsx output, also with the compiled uc
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+sys.path.append('.')
+from utils import load_grid_from_xlsx, modify_pfmax, sweep_pfmax
+
+def copy_data(data_folder, save_dir, no_sample, no_load, negative = None):
+    """the first no_sample rows of data_{i}.csv, the load of the sample negative is negated (an infeasible window)"""
+    os.makedirs(save_dir)
+    for i in range(1, no_load + 1):
+        data = pd.read_csv(os.path.join(data_folder, f'data_{i}.csv')).iloc[:no_sample]
+        if negative is not None:
+            data.loc[negative, 'Load'] = -np.abs(data.loc[negative, 'Load']) - 1
+        data.to_csv(os.path.join(save_dir, f'data_{i}.csv'), index = False)
+
+def test_modify_pfmax(args):
+
+    T = args.T
+    xlsx_path = f"configs/{args.pypower_case_name}.xlsx"
+    new_grid = lambda: load_grid_from_xlsx(xlsx_path = xlsx_path, T = T, reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1)
+    grid_op = new_grid()
+    no_window = args.no_sample - T + 1
+    settings = [(1, 5, False), (args.n_workers, 1, False), (args.n_workers, 7, False), (args.n_workers, None, False),
+                (1, 5, True), (args.n_workers, 7, True)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # the serial sweep of the whole data as one chunk is the reference
+        data_folder = os.path.join(tmp_dir, 'data')
+        copy_data(args.data_folder, data_folder, args.no_sample, grid_op.no_load)
+        pf_max_ref, infeasible_ref = sweep_pfmax(grid_op, False, T, data_folder, no_window, solver = args.solver,
+                                                n_workers = 1, chunk_size = no_window)
+        for n_workers, chunk_size, warm_start in settings:
+            pf_max, infeasible = sweep_pfmax(grid_op, False, T, data_folder, no_window, solver = args.solver, warm_start = warm_start,
+                                            n_workers = n_workers, chunk_size = chunk_size)
+            name = f"n_workers = {n_workers}, chunk_size = {chunk_size}, warm_start = {warm_start}"
+            assert np.allclose(pf_max, pf_max_ref, atol = args.atol), f"pf_max is not the same with {name}"
+            assert [sample[0] for sample in infeasible] == [sample[0] for sample in infeasible_ref], f"the infeasible windows are not the same with {name}"
+        
+        # the workers solve the compiled uc loaded from the cache
+        compiled_dir = os.path.join(tmp_dir, 'compiled')
+        for n_workers, chunk_size in [(1, 5), (args.n_workers, 7)]:
+            pf_max, infeasible = sweep_pfmax(grid_op, False, T, data_folder, no_window, solver = args.compiled_solver, 
+                                            n_workers = n_workers, chunk_size = chunk_size, compiled_dir = compiled_dir)
+            assert np.allclose(pf_max, pf_max_ref, atol = args.atol), f"pf_max of the compiled uc is not the same with n_workers = {n_workers}"
+            assert [sample[0] for sample in infeasible] == [sample[0] for sample in infeasible_ref], "the infeasible windows of the compiled uc are not the same"
+        assert len(os.listdir(compiled_dir)) == 1, "the compiled uc is not reused"
+
+        # the windows with the negative load are not solved, they are reported instead of stopping the workers
+        data_folder = os.path.join(tmp_dir, 'data_negative')
+        copy_data(args.data_folder, data_folder, args.no_sample, grid_op.no_load, negative = args.no_sample // 2)
+        expected = list(range(args.no_sample // 2 - T + 1, args.no_sample // 2 + 1))
+        for n_workers, chunk_size, warm_start in settings:
+            pf_max, infeasible = sweep_pfmax(grid_op, False, T, data_folder, no_window, solver = args.solver, warm_start = warm_start,
+                                            n_workers = n_workers, chunk_size = chunk_size)
+            failed = [sample[0] for sample in infeasible if sample[1] not in ['optimal', 'optimal_inaccurate']]
+            assert failed == expected, f"the windows of the negative load are {failed}, not {expected}"
+            assert np.all(np.isfinite(pf_max)), "the windows that are not solved are in pf_max"
+
+        # the xlsx output of the parallel sweep is the same to the serial sweep
+        data_folder = os.path.join(tmp_dir, 'data')
+        pfmax_xlsx = {}
+        for n_workers in [1, args.n_workers]:
+            xlsx_dir = os.path.join(tmp_dir, f'{args.pypower_case_name}_{n_workers}.xlsx')
+            shutil.copy(xlsx_path, xlsx_dir)
+            modify_pfmax(new_grid(), False, T, data_folder, min_pfmax = 0.1, scale_factor = 1.2, xlsx_dir = xlsx_dir,
+                        force_new = True, solver = args.solver, n_workers = n_workers, chunk_size = 7)
+            pfmax_xlsx[n_workers] = pd.read_excel(xlsx_dir, sheet_name = 'branch')['pfmax'].values
+        assert np.allclose(pfmax_xlsx[1], pfmax_xlsx[args.n_workers], atol = args.atol * grid_op.baseMVA), "the xlsx output is not the same"
+
+    print('All tests passed')
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, default="case14")
+    parser.add_argument('-d', '--data_folder', type=str, default="data/case14/")
+    parser.add_argument('-s', '--no_sample', type=int, default=40, help="the first samples of the data are swept")
+    parser.add_argument('-T', '--T', type=int, default=6)
+    parser.add_argument('-w', '--n_workers', type=int, default=2)
+    parser.add_argument('--solver', type=str, default="GUROBI")
+    parser.add_argument('--compiled_solver', type=str, default="CLARABEL", help="the solver of the compiled standard form")
+    parser.add_argument('--atol', type=float, default=1e-5)
+    args = parser.parse_args()
+
+    test_modify_pfmax(args)
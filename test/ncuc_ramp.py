@@ -0,0 +1,59 @@
+"""
+test the ramp constraints of the ncuc without integer variables are in the problem:
+the solution follows the tight ramp limits (including the initial ramp limit from pg_init)
+"""
+
+import sys
+import numpy as np
+sys.path.append('.')
+from operation import Operation
+
+def test_ncuc_ramp(args):
+
+    T = args.T
+    for vectorize in [True, False]:
+        grid_op = Operation(f"configs/{args.pypower_case_name}.xlsx", T, reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1,
+                            sparse = True, vectorize = vectorize)
+        params = {'load': np.tile(grid_op.load_default, T)}
+        if grid_op.no_solar > 0:
+            params['solar'] = np.tile(grid_op.solar_default, T)
+        if grid_op.no_wind > 0:
+            params['wind'] = np.tile(grid_op.wind_default, T)
+
+        # without the ramp limits the dispatch moves away from pg_init
+        grid_op.ru = grid_op.rd = 10 * grid_op.pgmax
+        uc = grid_op.get_opt(False, 'uc')
+        Operation.solve(uc, params, solver = args.solver)
+        pg = Operation.get_sol(uc, T = T, reshaped = True)['pg']
+        ramp = args.ramp * grid_op.pgmax
+        assert np.any(np.abs(pg[0] - grid_op.pg_init) > ramp + args.atol), "the test is not binding, reduce the ramp"
+
+        # the tight ramp limits are in the problem
+        grid_op.ru = grid_op.rd = ramp
+        uc = grid_op.get_opt(False, 'uc')
+        Operation.solve(uc, params, solver = args.solver)
+        pg = Operation.get_sol(uc, T = T, reshaped = True)['pg']
+        assert np.all(np.abs(pg[0] - grid_op.pg_init) <= ramp + args.atol), f"the initial ramp limit is violated (vectorize = {vectorize})"
+        assert np.all(np.abs(np.diff(pg, axis = 0)) <= ramp + args.atol), f"the ramp limits are violated (vectorize = {vectorize})"
+
+        # the constraints on pg only: the generation limits and the reserve (2 + 1 per step or vectorized),
+        # and the ramps (2 per step or 2 vectorized, with the initial 2)
+        no_step = 1 if vectorize else T
+        no_pg_only = sum(1 for constr in uc.constraints if [var.name() for var in constr.variables()] == ['pg'])
+        assert no_pg_only == 3 * no_step + 2 * no_step + (2 if vectorize else 0), "the ramp constraints are not in the problem"
+
+    print('All tests passed')
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, default="case14")
+    parser.add_argument('-T', '--T', type=int, default=4)
+    parser.add_argument('--ramp', type=float, default=0.01, help="the tight ramp limits in ratio of pgmax")
+    parser.add_argument('--solver', type=str, default="GUROBI")
+    parser.add_argument('--atol', type=float, default=1e-5)
+    args = parser.parse_args()
+
+    test_ncuc_ramp(args)
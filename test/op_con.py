@@ -5,7 +5,7 @@ test the optimization problem for the case without integer variables
 import sys
 import numpy as np
 sys.path.append('.')
-from utils import get_data, load_grid_from_xlsx, return_standard_form_in_cvxpy
+from utils import DataWindows, get_data, load_grid_from_xlsx, return_standard_form_in_cvxpy
 from tqdm import tqdm
 
 def test(args):
@@ -60,6 +60,10 @@ def test(args):
     # no_sample = load_all.shape[0] - T + 1
     # no_sample = 10
     
+    windows = DataWindows(load_all, solar_all, wind_all, T)
+    forecast_buffer = windows.noise_buffer()
+    rng = np.random.default_rng(0)
+    
     sample_idx = np.random.choice(load_all.shape[0] - T + 1, args.no_sample, replace=False)
     
     for i in tqdm(sample_idx):
@@ -69,29 +73,17 @@ def test(args):
         """
         
         # solve uc
-        load_forecast = load_all[i:i+T] * (0.9 + np.random.rand(*load_all[i:i+T].shape) * 0.2)
-        params_val_dict_uc = {
-            'load': load_forecast.flatten()
-        }
-        if solar_all is not None:
-            solar_forecast = solar_all[i:i+T] * (0.9 + np.random.rand(*solar_all[i:i+T].shape) * 0.2)
-            params_val_dict_uc['solar'] = solar_forecast.flatten()
-        if wind_all is not None:
-            wind_forecast = wind_all[i:i+T] * (0.9 + np.random.rand(*wind_all[i:i+T].shape) * 0.2)
-            params_val_dict_uc['wind'] = wind_forecast.flatten()
+        # the forecast is written into the preallocated buffer
+        params_val_dict_uc = windows.noisy(i, 0.9, 1.1, out = forecast_buffer, rng = rng)
         grid_op.solve(uc_cvxpy, params_val_dict_uc)
         value_uc_cvxpy = uc_cvxpy.value
         uc_sol_cvxpy = grid_op.get_sol(uc_cvxpy)
         
         # solve ed
         params_val_dict_ed = {
-            'load': load_all[i:i+T].flatten(),
+            **windows[i],
             'pg_uc': uc_sol_cvxpy['pg']
         }
-        if solar_all is not None:
-            params_val_dict_ed['solar'] = solar_all[i:i+T].flatten()
-        if wind_all is not None:
-            params_val_dict_ed['wind'] = wind_all[i:i+T].flatten()
         grid_op.solve(ed_cvxpy, params_val_dict_ed)
         value_ed_cvxpy = ed_cvxpy.value
         ed_sol_cvxpy = grid_op.get_sol(ed_cvxpy)
@@ -0,0 +1,108 @@
+"""
+test the problems with the reserve, line limits and costs as the parameters against the problems rebuilt
+with the changed constants, and the standard form of the parametric problems
+"""
+
+import sys
+import numpy as np
+import cvxpy as cp
+sys.path.append('.')
+from operation import Operation
+from utils import compile_problem, StandardFormSolver, return_standard_form_in_cvxpy, random_params
+
+COSTS = ['cv', 'cls', 'csc', 'cwc', 'ces', 'cf', 'csu', 'csd']
+
+def test_parametric(args):
+
+    rng = np.random.default_rng(0)
+    T = args.T
+    xlsx_path = f"configs/{args.pypower_case_name}.xlsx"
+    kwargs = dict(reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1, sparse = True, formulation = args.formulation)
+
+    for vectorize in [True, False]:
+        grid_op = Operation(xlsx_path, T, vectorize = vectorize, parametric = ['init', 'reserve', 'pfmax', 'cost'], **kwargs)
+        uc, ed = grid_op.get_opt(args.with_int)
+        assert uc.is_dcp(dpp = True) and ed.is_dcp(dpp = True), "the parametric problems are not dpp"
+
+        for i in range(args.no_sample):
+            params = random_params(grid_op, rng)
+
+            # the defaults are the same to the constant problem, the changed values are the same to the rebuilt problem
+            changed = {} if i == 0 else {
+                'reserve': rng.uniform(0, 0.1, T) * np.sum(grid_op.pgmax),
+                'pfmax': grid_op.pfmax * rng.uniform(0.8, 1.2, grid_op.no_branch),
+                'pg_init': grid_op.pgmax * rng.uniform(0.3, 0.7, grid_op.no_gen),
+                **{name: getattr(grid_op, name) * rng.uniform(0.5, 1.5, np.size(getattr(grid_op, name))) for name in COSTS}
+            }
+
+            grid_op_const = Operation(xlsx_path, T, vectorize = vectorize, **kwargs)
+            for name, value in changed.items():
+                setattr(grid_op_const, name, value)
+            grid_op_const.first_order_coeff = np.tile(grid_op_const.cv, T)
+            uc_const, ed_const = grid_op_const.get_opt(args.with_int)
+
+            Operation.solve(uc, {**params, **changed}, solver = args.solver)
+            Operation.solve(uc_const, params, solver = args.solver)
+            assert uc.status == cp.OPTIMAL and uc_const.status == cp.OPTIMAL, f"uc of sample {i} is not solved"
+            assert np.isclose(uc.value, uc_const.value, rtol = args.rtol), f"uc value of sample {i} is not consistent"
+
+            params_ed = {**params, 'pg_uc': Operation.get_sol(uc_const)['pg']}
+            if args.with_int:
+                params_ed['ug'] = np.round(Operation.get_sol(uc_const)['ug'])
+            Operation.solve(ed, {**params_ed, **changed}, solver = args.solver)
+            Operation.solve(ed_const, params_ed, solver = args.solver)
+            assert np.isclose(ed.value, ed_const.value, rtol = args.rtol), f"ed value of sample {i} is not consistent"
+
+            # the parameters not given keep the current values
+            value = ed.value
+            Operation.solve(ed, params_ed, solver = args.solver)
+            assert np.isclose(ed.value, value, rtol = args.rtol), "the parameters not given do not keep the values"
+
+        print(f"vectorize = {vectorize}: the parametric problems are consistent")
+
+    # the standard form with the parametric right-hand sides and linear cost
+    if not args.with_int:
+        grid_op = Operation(xlsx_path, T, vectorize = True, parametric = ['reserve', 'pfmax', 'cost'], **kwargs)
+        uc = grid_op.get_opt(False, 'uc')
+        compiled = compile_problem(uc, solver = args.compile_solver)
+        assert set(compiled['Q'].keys()) == {name for name in COSTS if isinstance(getattr(grid_op, name), np.ndarray)} & \
+                                            {param.name() for param in uc.parameters()}, "the cost parameters are not found in q"
+        stand = StandardFormSolver(compiled, 'CLARABEL')
+        uc_stand = return_standard_form_in_cvxpy(uc, solver = args.compile_solver)
+
+        for i in range(args.no_sample):
+            params = random_params(grid_op, rng)
+            # the defaults are used for the parameters not given
+            changed = {} if i == 0 else {
+                'pfmax': grid_op.pfmax * rng.uniform(0.8, 1.2, grid_op.no_branch),
+                'cv': grid_op.cv * rng.uniform(0.5, 1.5, grid_op.no_gen),
+                'cls': grid_op.cls * rng.uniform(0.5, 1.5, grid_op.no_load),
+            }
+
+            Operation.solve(uc, {**params, **changed}, solver = args.solver)
+            _, status, value = stand.solve({**params, **changed})
+            assert status == 'optimal' and np.isclose(uc.value, value, rtol = args.rtol), f"standard form value of sample {i} is not consistent"
+
+            Operation.solve(uc_stand, {**compiled['defaults'], **params, **changed}, solver = args.solver)
+            assert np.isclose(uc.value, uc_stand.value, rtol = args.rtol), f"standard form in cvxpy of sample {i} is not consistent"
+
+        print("the standard form is consistent")
+
+    print('All tests passed')
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, default="case14")
+    parser.add_argument('-T', '--T', type=int, default=6)
+    parser.add_argument('-f', '--formulation', type=str, default="angle")
+    parser.add_argument('-s', '--no_sample', type=int, default=3)
+    parser.add_argument('-i', '--with_int', default=False, action='store_true')
+    parser.add_argument('--solver', type=str, default="GUROBI")
+    parser.add_argument('--compile_solver', type=str, default="OSQP")
+    parser.add_argument('--rtol', type=float, default=1e-4)
+    args = parser.parse_args()
+
+    test_parametric(args)
@@ -0,0 +1,110 @@
+"""
+test the on-disk cache of the compiled problems: a hit returns the same standard form, a change of the xlsx content,
+the settings or the formulations misses, and only the requested problem is built
+"""
+
+import os
+import sys
+import shutil
+import functools
+import tempfile
+import numpy as np
+import scipy.sparse as sp
+import openpyxl
+sys.path.append('.')
+from operation import Operation
+from utils import load_compiled, problem_key, formulation_hash
+
+def same_compiled(compiled_1, compiled_2):
+    """if the two compiled problems have the same standard form"""
+    def same(value_1, value_2):
+        if isinstance(value_1, dict):
+            return value_1.keys() == value_2.keys() and all(same(value_1[key], value_2[key]) for key in value_1)
+        if sp.issparse(value_1):
+            return value_1.shape == value_2.shape and (value_1 != value_2).nnz == 0
+        return np.array_equal(np.asarray(value_1), np.asarray(value_2))
+    return same(compiled_1, compiled_2)
+
+def count_builds(built):
+    """record the builders of the problems called by load_compiled"""
+    originals = {name: getattr(Operation, name) for name in ['ncuc_no_int', 'ncuc_with_int', 'ed']}
+    def record(name, original):
+        @functools.wraps(original)
+        def builder(self, *args, **kwargs):
+            built.append(name)
+            return original(self, *args, **kwargs)
+        return builder
+    for name, original in originals.items():
+        setattr(Operation, name, record(name, original))
+    return originals
+
+def test_problem_cache(args):
+
+    settings = dict(T = args.T, with_int = False, reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1)
+    built = []
+    originals = count_builds(built)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = os.path.join(tmp_dir, f'{args.pypower_case_name}.xlsx')
+        shutil.copy(f"configs/{args.pypower_case_name}.xlsx", xlsx_path)
+        cache_dir = os.path.join(tmp_dir, 'compiled')
+        load = lambda **changed: load_compiled(xlsx_path, **{**settings, **changed}, cache_dir = cache_dir, solver = args.solver)
+
+        # only the requested problem is built, and a hit builds nothing
+        for prob_kind, builder in [('uc', 'ncuc_no_int'), ('ed', 'ed')]:
+            built.clear()
+            compiled = load(prob_kind = prob_kind)
+            assert built == [builder], f"{built} are built for the {prob_kind}"
+            built.clear()
+            assert same_compiled(load(prob_kind = prob_kind), compiled), f"the cached {prob_kind} is not the same"
+            assert built == [], f"the cached {prob_kind} is built again"
+        assert len(os.listdir(cache_dir)) == 2, "the uc and ed are not cached separately"
+
+        # a change of the settings misses (the ed of with_int has the commitment as a parameter, no integer variable)
+        changes = {'T': args.T + 1, 'with_int': True, 'reserve': 0.1, 'pg_init_ratio': 0.4, 'ug_init': 0}
+        for name, value in changes.items():
+            built.clear()
+            load(prob_kind = 'ed', **{name: value})
+            assert built == ['ed'], f"the change of {name} does not miss the cache"
+        assert len(os.listdir(cache_dir)) == 2 + len(changes), "the changed settings are not cached separately"
+
+        # a change of the xlsx content misses
+        compiled = load(prob_kind = 'uc')
+        workbook = openpyxl.load_workbook(xlsx_path)
+        workbook['branch'].cell(row = 2, column = 4).value *= 0.5
+        workbook.save(xlsx_path)
+        built.clear()
+        changed = load(prob_kind = 'uc')
+        assert built == ['ncuc_no_int'], "the change of the xlsx content does not miss the cache"
+        assert not same_compiled(changed, compiled), "the compiled problem does not follow the xlsx content"
+
+    for name, original in originals.items():
+        setattr(Operation, name, original)
+
+    # a change of the source of the formulations misses, even if FORMULATION_VERSION is not bumped
+    key_args = (f"configs/{args.pypower_case_name}.xlsx", args.T, False, 0.0, 0.5, 1, 'ed')
+    key = problem_key(*key_args)
+    def ed(self, with_int):
+        return originals['ed'](self, not with_int)
+    Operation.ed = ed
+    formulation_hash.cache_clear()
+    try:
+        assert problem_key(*key_args) != key, "the change of the formulation does not change the key"
+    finally:
+        Operation.ed = originals['ed']
+        formulation_hash.cache_clear()
+    assert problem_key(*key_args) == key, "the key is not stable"
+
+    print('All tests passed')
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, default="case14")
+    parser.add_argument('-T', '--T', type=int, default=6)
+    parser.add_argument('--solver', type=str, default="GUROBI", help="the solver used to canonicalize the problems")
+    args = parser.parse_args()
+
+    test_problem_cache(args)
@@ -0,0 +1,89 @@
+"""
+test the phases recorded by operation.profiling in the current process and merged from the workers
+"""
+
+import sys
+import time
+import numpy as np
+sys.path.append('.')
+from operation import Operation, PROFILE, profiling, enable_profiling, disable_profiling
+from utils import return_standard_form, random_params
+
+def test_profiling(args):
+
+    rng = np.random.default_rng(0)
+    T = args.T
+    grid_op = Operation(f"configs/{args.pypower_case_name}.xlsx", T, reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1,
+                        sparse = True, vectorize = True)
+
+    # nothing is recorded when disabled
+    disable_profiling()
+    PROFILE.reset()
+    uc = grid_op.get_opt(False, 'uc')
+    Operation.solve(uc, random_params(grid_op, rng), solver = args.solver)
+    Operation.get_sol(uc)
+    assert len(PROFILE.phases) == 0, "the phases are recorded when the profiling is disabled"
+
+    with profiling() as stats:
+        uc = grid_op.get_opt(False, 'uc')
+        for _ in range(args.no_sample):
+            Operation.solve(uc, random_params(grid_op, rng), solver = args.solver)
+            Operation.get_sol(uc)
+        return_standard_form(uc, random_params(grid_op, rng), solver = args.compile_solver)
+    assert not PROFILE.enabled, "the profiling is not disabled after the block"
+
+    assert stats.query('get_opt')['count'] == 1, "get_opt is not counted"
+    assert stats.query('solve')['count'] == args.no_sample and stats.query('get_sol')['count'] == args.no_sample, "solve or get_sol is not counted"
+    # the first solve canonicalizes the problem, the others apply the parameters to the cached compilation
+    assert stats.query('solve.canonicalize')['count'] == 1, "the canonicalization is not counted once"
+    assert stats.query('solve.apply_parameters')['count'] == args.no_sample - 1, "the parameter application is not counted"
+    assert stats.query('solve.solver')['count'] == args.no_sample, "the solver time is not recorded"
+    assert stats.query('standard_form.compile')['count'] == 1 and stats.query('standard_form.apply_parameters')['count'] == 1, \
+        "the standard form is not counted"
+    # the phases are within the whole solve
+    sub_total = sum(stats.query(phase)['total'] for phase in ['solve.set_parameters', 'solve.canonicalize', 'solve.apply_parameters', 'solve.solver'])
+    assert sub_total <= stats.query('solve')['total'], "the phases of the solve are longer than the solve"
+    print(stats.summary())
+
+    # the stats of the workers are merged into the parent
+    params_batch = {}
+    for _ in range(args.no_sample):
+        for key, value in random_params(grid_op, rng).items():
+            params_batch.setdefault(key, []).append(value)
+    params_batch = {key: np.stack(value) for key, value in params_batch.items()}
+    with profiling() as stats:
+        grid_op.solve_batch('uc', params_batch, n_workers = 2, chunk_size = 1, solver = args.solver)
+    assert stats.query('solve')['count'] == args.no_sample, "the solves in the workers are not merged"
+    assert stats.query('get_opt')['count'] == 2, "the problem builds in the workers are not merged"
+
+    # merge adds the counts and keeps the max
+    merged = type(PROFILE)()
+    merged.merge(stats.snapshot())
+    merged.merge(stats.snapshot())
+    assert merged.query('solve')['count'] == 2 * args.no_sample and merged.query('solve')['max'] == stats.query('solve')['max'], \
+        "the merge is not correct"
+
+    # the overhead of the disabled profiling is an attribute check per call
+    enable_profiling()
+    disable_profiling()
+    start = time.perf_counter()
+    for _ in range(args.no_sample):
+        Operation.get_sol(uc)
+    assert len(PROFILE.phases) == 0, "the phases are recorded when the profiling is disabled"
+    print(f"disabled get_sol: {(time.perf_counter() - start) / args.no_sample * 1e6:.1f} us per call")
+
+    print('All tests passed')
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, default="case14")
+    parser.add_argument('-T', '--T', type=int, default=6)
+    parser.add_argument('-s', '--no_sample', type=int, default=5)
+    parser.add_argument('--solver', type=str, default="GUROBI")
+    parser.add_argument('--compile_solver', type=str, default="OSQP")
+    args = parser.parse_args()
+
+    test_profiling(args)
@@ -0,0 +1,55 @@
+"""
+test the ptdf formulation against the phase angle formulation
+"""
+
+import sys
+import numpy as np
+sys.path.append('.')
+from utils import load_grid_from_xlsx, random_params
+
+def test_ptdf(args):
+
+    rng = np.random.default_rng(0)
+
+    T = args.T
+    with_int = False
+
+    grid_op = {
+        formulation: load_grid_from_xlsx(
+            xlsx_path = f"configs/{args.pypower_case_name}.xlsx", T = T,
+            reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1, formulation = formulation
+            )
+        for formulation in ['angle', 'ptdf']
+    }
+    prob = {formulation: grid_op[formulation].get_opt(with_int) for formulation in grid_op.keys()}
+    assert 'theta' not in [var.name() for var in prob['ptdf'][0].variables()], "the ptdf formulation has the angle variable"
+
+    for i in range(args.no_sample):
+        params_val_dict_uc = random_params(grid_op['angle'], rng)
+
+        value, pf = {}, {}
+        for formulation, (uc, ed) in prob.items():
+            grid_op[formulation].solve(uc, params_val_dict_uc, solver = args.solver)
+            uc_sol = grid_op[formulation].get_sol(uc)
+            grid_op[formulation].solve(ed, {**params_val_dict_uc, 'pg_uc': uc_sol['pg']}, solver = args.solver)
+            ed_sol = grid_op[formulation].get_sol(ed)
+            value[formulation] = (uc.value, ed.value)
+            pf[formulation] = (grid_op[formulation].get_pf(uc_sol['theta']), grid_op[formulation].get_pf(ed_sol['theta']))
+
+        assert np.allclose(value['angle'], value['ptdf'], rtol = 1e-4), f"the objective of sample {i} is not consistent"
+        assert np.allclose(pf['angle'][1], pf['ptdf'][1], atol = 1e-3), f"the ed power flow of sample {i} is not consistent"
+
+    print('All tests passed')
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, default="case14")
+    parser.add_argument('-s', '--no_sample', type=int, default=5)
+    parser.add_argument('-T', '--T', type=int, default=6)
+    parser.add_argument('--solver', type=str, default="GUROBI")
+    args = parser.parse_args()
+
+    test_ptdf(args)
@@ -0,0 +1,88 @@
+"""
+test the rolling horizon simulation against the problems rebuilt with the initial condition of each day
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import numpy as np
+sys.path.append('.')
+from operation import Operation, RollingHorizon
+from utils import DataWindows, get_data
+
+def test_rolling_horizon(args):
+
+    T = args.T
+    xlsx_path = f"configs/{args.pypower_case_name}.xlsx"
+    grid_op = Operation(xlsx_path, T, reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1,
+                        sparse = True, vectorize = True, init_param = True)
+    load_all, solar_all, wind_all = get_data(grid_op.no_load, args.data_folder, grid_op)
+    actual = DataWindows(load_all, solar_all, wind_all, T)
+
+    simulator = RollingHorizon(grid_op, with_int = args.with_int, solver = args.solver)
+    results = simulator.run(actual, no_day = args.no_day)
+    assert np.all(results['optimal']), "not all the days are solved"
+
+    # the same days with the constant initial condition, rebuilt every day
+    pg_init, ug_init = grid_op.pg_init, grid_op.ug_init
+    for day in range(args.no_day):
+        grid_op_day = Operation(xlsx_path, T, reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1,
+                                sparse = True, vectorize = True)
+        grid_op_day.pg_init, grid_op_day.ug_init = pg_init, ug_init
+        uc, ed = grid_op_day.get_opt(args.with_int)
+
+        Operation.solve(uc, actual[day * T], solver = args.solver)
+        sol_uc = Operation.get_sol(uc, T = T, reshaped = True)
+        assert np.isclose(uc.value, results['uc_cost'][day], rtol = 1e-4), f"uc cost of day {day} is not consistent"
+        # the initial ramp limit is in the ncuc
+        assert np.all(sol_uc['pg'][0] - pg_init <= grid_op.ru + 1e-4) and np.all(pg_init - sol_uc['pg'][0] <= grid_op.rd + 1e-4), \
+            f"initial ramp limit of day {day} is violated"
+
+        params_val_dict_ed = {**actual[day * T], 'pg_uc': sol_uc['pg'].flatten()}
+        if args.with_int:
+            params_val_dict_ed['ug'] = np.round(sol_uc['ug']).flatten()
+        Operation.solve(ed, params_val_dict_ed, solver = args.solver)
+        assert np.isclose(ed.value, results['ed_cost'][day], rtol = 1e-4), f"ed cost of day {day} is not consistent"
+
+        pg_init = results['pg'][day][-1]
+        if args.with_int:
+            ug_init = results['ug'][day][-1]
+
+    # resume an interrupted simulation from the results folder
+    result_dir = tempfile.mkdtemp()
+    try:
+        simulator.run(actual, no_day = args.no_day, result_dir = result_dir, verbose = False)
+        with open(os.path.join(result_dir, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+        assert meta['no_day_done'] == args.no_day, "the completed days are not recorded"
+
+        # interrupted after the first day: the state of the first day is kept
+        meta['no_day_done'], meta['pg_init'] = 1, results['pg'][0][-1].tolist()
+        if args.with_int:
+            meta['ug_init'] = results['ug'][0][-1].tolist()
+        with open(os.path.join(result_dir, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        resumed = simulator.run(actual, no_day = args.no_day, result_dir = result_dir)
+        for name, value in results.items():
+            assert np.allclose(value, resumed[name], rtol = 1e-4, atol = 1e-6, equal_nan = True), f"the resumed {name} is not consistent"
+    finally:
+        shutil.rmtree(result_dir)
+
+    print('All tests passed')
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, default="case14")
+    parser.add_argument('-d', '--data_folder', type=str, default="data/case14")
+    parser.add_argument('-T', '--T', type=int, default=24)
+    parser.add_argument('-s', '--no_day', type=int, default=3)
+    parser.add_argument('-i', '--with_int', default=False, action='store_true')
+    parser.add_argument('--solver', type=str, default="GUROBI")
+    args = parser.parse_args()
+
+    test_rolling_horizon(args)
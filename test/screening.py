@@ -0,0 +1,99 @@
+"""
+test the pre-screen of the windows: the flagged windows shed load (or are infeasible) when the ncuc is solved
+"""
+
+import sys
+import numpy as np
+import cvxpy as cp
+sys.path.append('.')
+from operation import Operation
+from utils import DataWindows, screen_windows, screening_summary
+
+def solve_windows(grid_op, windows, idx, solver):
+    """the status and the load shedding of the ncuc of the windows idx"""
+    uc = grid_op.get_opt(False, 'uc')
+    result = []
+    for i in idx:
+        Operation.solve(uc, windows[i], solver = solver)
+        ls = np.sum(Operation.get_sol(uc)['ls']) if uc.status in [cp.OPTIMAL, cp.OPTIMAL_INACCURATE] else np.nan
+        result.append((uc.status, ls))
+    return result
+
+def check_flagged(grid_op, windows, mask, report, solver, name):
+    assert np.any(~mask), f"{name}: no window is flagged"
+    print(f"{name}: {screening_summary(report)}")
+    for i, (status, ls) in zip(np.flatnonzero(~mask), solve_windows(grid_op, windows, np.flatnonzero(~mask), solver)):
+        if report['infeasible'][i]:
+            assert status in [cp.INFEASIBLE, cp.INFEASIBLE_INACCURATE], f"{name}: window {i} is flagged infeasible but {status}"
+        else:
+            # the per-unit and the network limits may also make the ncuc infeasible
+            assert not (status == cp.OPTIMAL and ls <= 1e-4), f"{name}: window {i} is flagged but solved without load shedding"
+
+def test_screening(args):
+
+    rng = np.random.default_rng(0)
+    T = args.T
+    xlsx_path = f"configs/{args.pypower_case_name}.xlsx"
+
+    def grid():
+        return Operation(xlsx_path, T, reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1, sparse = True, vectorize = True)
+
+    grid_op = grid()
+    no_sample = args.no_sample
+    pmax = np.sum(grid_op.pgmax)
+    load_level = rng.uniform(0.3, 0.9, no_sample)
+    # a few hours above the capacity
+    load_level[rng.choice(no_sample, 3, replace = False)] = 1.2
+    load_all = np.outer(load_level, grid_op.load_default) * pmax / np.sum(grid_op.load_default)
+    # without the renewables
+    solar_all = np.zeros((no_sample, grid_op.no_solar)) if grid_op.no_solar > 0 else None
+    wind_all = np.zeros((no_sample, grid_op.no_wind)) if grid_op.no_wind > 0 else None
+    windows = DataWindows(load_all, solar_all, wind_all, T)
+
+    # the hours above the capacity certainly shed load
+    mask, report = screen_windows(grid_op, load_all, solar_all, wind_all, T = T)
+    assert len(mask) == len(windows), "the number of windows is not correct"
+    assert not np.any(report['infeasible']), "the windows are flagged infeasible"
+    capacity = np.convolve(load_level > 1, np.ones(T), 'valid') > 0
+    assert np.array_equal(report['capacity'], capacity), "the windows with the hours above the capacity are not flagged"
+    check_flagged(grid_op, windows, mask, report, args.solver, 'capacity')
+
+    # the reserve takes the capacity
+    grid_op = grid()
+    grid_op.reserve = np.full(T, 0.3 * pmax)
+    mask_reserve, report = screen_windows(grid_op, load_all, solar_all, wind_all, T = T)
+    assert np.all(mask_reserve <= mask) and np.any(mask_reserve < mask), "the reserve does not flag more windows"
+    check_flagged(grid_op, windows, mask_reserve, report, args.solver, 'reserve')
+
+    # the generation can not ramp from pg_init
+    grid_op = grid()
+    grid_op.pg_init = 0.05 * grid_op.pgmax
+    grid_op.ru = grid_op.ru * 0.2
+    mask, report = screen_windows(grid_op, load_all, solar_all, wind_all, T = T)
+    assert np.any(report['ramp_up']), "the ramp is not flagged"
+    check_flagged(grid_op, windows, mask, report, args.solver, 'ramp_up')
+
+    # the pgmin floors are above the load
+    grid_op = grid()
+    grid_op.pgmin = 0.5 * grid_op.pgmax
+    mask, report = screen_windows(grid_op, load_all, solar_all, wind_all, T = T)
+    assert np.any(report['min_generation']) and np.all(report['infeasible'][report['min_generation']]), "the pgmin floors are not flagged"
+    check_flagged(grid_op, windows, mask, report, args.solver, 'min_generation')
+    # the units can be off with the integer variables
+    mask, report = screen_windows(grid_op, load_all, solar_all, wind_all, T = T, with_int = True)
+    assert not np.any(report['min_generation']), "the pgmin floors are flagged with the integer variables"
+
+    print('All tests passed')
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, default="case14")
+    parser.add_argument('-T', '--T', type=int, default=6)
+    parser.add_argument('-s', '--no_sample', type=int, default=60)
+    parser.add_argument('--solver', type=str, default="GUROBI")
+    args = parser.parse_args()
+
+    test_screening(args)
@@ -0,0 +1,152 @@
+"""
+test the solution cache: the hits skip the solver and return the same solution, the keys follow the grid data
+and the quantized parameters, the non-optimal solves are not cached, the lru eviction, and the on-disk cache shared with a new process and the workers
+"""
+
+import sys
+import tempfile
+import numpy as np
+import cvxpy as cp
+sys.path.append('.')
+from operation import Operation, enable_solution_cache, disable_solution_cache, profiling
+from utils import random_params
+
+def assert_same_sol(sol, sol_ref, name):
+    assert sol.keys() == sol_ref.keys(), f"{name}: the variables are not the same"
+    for key in sol_ref:
+        assert np.array_equal(sol[key], sol_ref[key]), f"{name}: {key} is not the same"
+
+def test_solution_cache(args):
+
+    rng = np.random.default_rng(0)
+    xlsx_path = f"configs/{args.pypower_case_name}.xlsx"
+    grid_op = Operation(xlsx_path, args.T, reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1, sparse = True, vectorize = True)
+    uc, ed = grid_op.get_opt(False)
+    params_all = [random_params(grid_op, rng) for _ in range(args.no_sample)]
+
+    cache = enable_solution_cache(maxsize = args.no_sample)
+    try:
+        # the solutions of the misses are the reference
+        sol_ref, value_ref = [], []
+        for params in params_all:
+            Operation.solve(uc, params, solver = args.solver)
+            sol_ref.append({key: np.copy(value) for key, value in Operation.get_sol(uc).items()})
+            value_ref.append(uc.value)
+        assert cache.misses == args.no_sample and cache.hits == 0, "the first solves are not the misses"
+
+        # the hits skip the solver and restore the same solution
+        with profiling() as stats:
+            for i in reversed(range(args.no_sample)):
+                Operation.solve(uc, params_all[i], solver = args.solver)
+                assert uc.status == 'optimal' and uc.value == value_ref[i], f"the value of sample {i} is not restored"
+                assert_same_sol(Operation.get_sol(uc), sol_ref[i], f"sample {i}")
+        assert cache.hits == args.no_sample, "the repeated solves are not the hits"
+        assert stats.query('solve.cache_hit')['count'] == args.no_sample and stats.query('solve.solver')['count'] == 0, \
+            "the solver is called on the hits"
+
+        # a new problem of the same grid shares the cache, the perturbation below the quantum is the same key
+        uc_new = grid_op.get_opt(False, 'uc')
+        Operation.solve(uc_new, {key: value + 1e-3 * cache.quantum for key, value in params_all[0].items()}, solver = args.solver)
+        assert cache.hits == args.no_sample + 1, "the new problem of the same grid does not hit"
+        assert_same_sol(Operation.get_sol(uc_new), sol_ref[0], "the new problem")
+        Operation.solve(uc_new, {key: value + 1e3 * cache.quantum for key, value in params_all[0].items()}, solver = args.solver)
+        assert cache.misses == args.no_sample + 1, "the perturbation above the quantum hits"
+
+        # the changed grid and the other problem kind do not hit
+        misses = cache.misses
+        grid_changed = Operation(xlsx_path, args.T, reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1, sparse = True, vectorize = True)
+        grid_changed.pfmax = grid_changed.pfmax * 0.9
+        Operation.solve(grid_changed.get_opt(False, 'uc'), params_all[1], solver = args.solver)
+        Operation.solve(uc, params_all[1], solver = args.solver, max_iter = 20000)
+        Operation.solve(ed, {**params_all[1], 'pg_uc': sol_ref[1]['pg']}, solver = args.solver)
+        assert cache.misses == misses + 3, "the changed grid, the solver options or the ed hit the cache of the uc"
+
+        # the grid changed in place after a hit: the problem rebuilt from it misses, the problem built before still hits
+        for _ in range(2):
+            Operation.solve(uc, params_all[0], solver = args.solver)
+        hits, misses = cache.hits, cache.misses
+        pfmax = grid_op.pfmax
+        grid_op.pfmax = pfmax * 0.9
+        try:
+            Operation.solve(grid_op.get_opt(False, 'uc'), params_all[0], solver = args.solver)
+            assert cache.misses == misses + 1, "the problem of the changed grid hits the cache of the grid before the change"
+            Operation.solve(uc, params_all[0], solver = args.solver)
+            assert cache.hits == hits + 1, "the problem built before the change does not hit"
+        finally:
+            grid_op.pfmax = pfmax
+
+        # the non-optimal solve (infeasible with the negative load) is not cached and is solved again
+        misses, no_entry = cache.misses, len(cache.entries)
+        params_infeasible = {**params_all[2], 'load': -params_all[2]['load']}
+        for _ in range(2):
+            Operation.solve(uc, params_infeasible, solver = args.solver)
+            assert uc.status not in [cp.OPTIMAL, cp.OPTIMAL_INACCURATE], "the negative load is solved"
+        assert cache.misses == misses + 2 and len(cache.entries) == no_entry, "the non-optimal solve is served from the cache"
+
+        # the lru eviction: the least recently used samples are evicted first
+        assert len(cache.entries) == args.no_sample, "the cache is not bounded by maxsize"
+        hits = cache.hits
+        Operation.solve(uc, params_all[-1], solver = args.solver)
+        assert cache.hits == hits, "the evicted sample hits"
+        cache.configure(maxsize = 100, max_bytes = 2 * cache.entries[next(iter(cache.entries))]['nbytes'] if cache.entries else 0)
+        for params in params_all:
+            Operation.solve(uc, params, solver = args.solver)
+        assert len(cache.entries) == 2 and cache.nbytes <= cache.max_bytes, "the cache is not bounded by max_bytes"
+
+        # the parameters that differ by more than the quantum never share a key, those within the same multiple do
+        cache.configure(quantum = args.coarse_quantum)
+        quantum = cache.quantum
+        params = {key: np.round(value / quantum) * quantum for key, value in params_all[0].items()}
+        Operation.solve(uc, params, solver = args.solver)
+        value_ref = uc.value
+        for key in params:
+            for offset in [1.01, -1.01, 2.5, -2.5]:
+                misses = cache.misses
+                perturbed = {**params, key: params[key].copy()}
+                perturbed[key][0] += offset * quantum
+                Operation.solve(uc, perturbed, solver = args.solver)
+                assert cache.misses == misses + 1, f"the {key} that differs by {offset} quantum hits"
+            hits = cache.hits
+            perturbed = {**params, key: params[key] + 0.4 * quantum}
+            Operation.solve(uc, perturbed, solver = args.solver)
+            assert cache.hits == hits + 1 and uc.value == value_ref, f"the {key} within the quantum does not hit"
+
+        # the on-disk cache is shared with a new process (a new cache and grid) and the workers of solve_batch
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = enable_solution_cache(cache_dir = cache_dir)
+            sol_ref, value_ref = [], []
+            for params in params_all:
+                Operation.solve(uc, params, solver = args.solver)
+                sol_ref.append({key: np.copy(value) for key, value in Operation.get_sol(uc).items()})
+                value_ref.append(uc.value)
+            cache = enable_solution_cache(cache_dir = cache_dir)
+            grid_new = Operation(xlsx_path, args.T, reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1, sparse = True, vectorize = True)
+            uc_new = grid_new.get_opt(False, 'uc')
+            Operation.solve(uc_new, params_all[0], solver = args.solver)
+            assert cache.disk_hits == 1, "the new process does not hit the disk"
+            assert_same_sol(Operation.get_sol(uc_new), sol_ref[0], "the disk")
+
+            params_batch = {key: np.stack([params[key] for params in params_all]) for key in params_all[0]}
+            with profiling() as stats:
+                sol, status, value = grid_new.solve_batch('uc', params_batch, n_workers = 2, solver = args.solver)
+            assert stats.query('solve.cache_hit')['count'] == args.no_sample, "the workers do not hit the disk"
+            assert np.array_equal(value, value_ref) and np.array_equal(sol['pg'], np.stack([s['pg'] for s in sol_ref])), \
+                "the batch from the disk is not the same"
+    finally:
+        disable_solution_cache()
+
+    print('All tests passed')
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, default="case14")
+    parser.add_argument('-T', '--T', type=int, default=6)
+    parser.add_argument('-s', '--no_sample', type=int, default=5)
+    parser.add_argument('--solver', type=str, default="GUROBI")
+    parser.add_argument('--coarse_quantum', type=float, default=1e-2, help="the quantum of the test of the rounding")
+    args = parser.parse_args()
+
+    test_solution_cache(args)
@@ -0,0 +1,78 @@
+"""
+test the batch solve over the process pool against the sequential solve
+"""
+
+import sys
+import tempfile
+import numpy as np
+sys.path.append('.')
+from utils import load_grid_from_xlsx, random_params
+
+def test_solve_batch(args):
+    
+    rng = np.random.default_rng(0)
+    
+    T = args.T
+    with_int = False
+    
+    grid_op = load_grid_from_xlsx(
+        xlsx_path = f"configs/{args.pypower_case_name}.xlsx", T = T, 
+        reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1
+        )
+    uc, ed = grid_op.get_opt(with_int)
+    
+    # random samples around the default values
+    params_batch = random_params(grid_op, rng, args.no_sample)
+    
+    sol_uc, status_uc, value_uc = grid_op.solve_batch('uc', params_batch, with_int = with_int, 
+                                                    n_workers = args.n_workers, solver = args.solver)
+    assert np.all(status_uc == 'optimal'), "the batch uc is not solved"
+    
+    params_batch['pg_uc'] = sol_uc['pg']
+    sol_ed, status_ed, value_ed = grid_op.solve_batch('ed', params_batch, with_int = with_int, 
+                                                    n_workers = args.n_workers, solver = args.solver)
+    assert np.all(status_ed == 'optimal'), "the batch ed is not solved"
+    
+    # a failed sample is reported without aborting the batch
+    params_failed = {key: value[:2].copy() for key, value in params_batch.items()}
+    params_failed['pg_uc'] = params_failed['pg_uc'][:, :-1] # wrong dimension
+    _, status_failed, value_failed = grid_op.solve_batch('ed', params_failed, with_int = with_int, 
+                                                        n_workers = args.n_workers, solver = args.solver)
+    assert np.all(status_failed == 'error') and np.all(np.isnan(value_failed)), "the failure is not reported"
+    
+    # compare with the sequential solve
+    for i in range(args.no_sample):
+        grid_op.solve(uc, {key: value[i] for key, value in params_batch.items() if key != 'pg_uc'}, solver = args.solver)
+        assert np.isclose(uc.value, value_uc[i], rtol = 1e-4), f"uc value of sample {i} is not consistent"
+        grid_op.solve(ed, {key: value[i] for key, value in params_batch.items()}, solver = args.solver)
+        assert np.isclose(ed.value, value_ed[i], rtol = 1e-4), f"ed value of sample {i} is not consistent"
+    
+    # the workers solve the compiled standard form loaded from the cache, the same optimum as the cvxpy problem
+    with tempfile.TemporaryDirectory() as compiled_dir:
+        for prob_kind, value in [('uc', value_uc), ('ed', value_ed)]:
+            batch = params_batch if prob_kind == 'ed' else {key: val for key, val in params_batch.items() if key != 'pg_uc'}
+            sol_stand, status_stand, value_stand = grid_op.solve_batch(prob_kind, batch, with_int = with_int, n_workers = args.n_workers, 
+                                                                    solver = args.compiled_solver, compiled_dir = compiled_dir)
+            assert np.all(status_stand == 'optimal'), f"the compiled batch {prob_kind} is not solved"
+            assert np.allclose(value_stand, value, rtol = 1e-4), f"the compiled batch {prob_kind} value is not consistent"
+            assert set(sol_stand.keys()) <= set(sol_uc.keys() if prob_kind == 'uc' else sol_ed.keys()), "the variables are not the same"
+        _, status_failed, value_failed = grid_op.solve_batch('ed', params_failed, with_int = with_int, n_workers = args.n_workers, 
+                                                            solver = args.compiled_solver, compiled_dir = compiled_dir)
+        assert np.all(status_failed == 'error') and np.all(np.isnan(value_failed)), "the failure of the compiled batch is not reported"
+    
+    print('All tests passed')
+
+if __name__ == "__main__":
+    
+    import argparse
+    
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, default="case14")
+    parser.add_argument('-s', '--no_sample', type=int, default=20)
+    parser.add_argument('-T', '--T', type=int, default=6)
+    parser.add_argument('-w', '--n_workers', type=int, default=2)
+    parser.add_argument('--solver', type=str, default="GUROBI")
+    parser.add_argument('--compiled_solver', type=str, default="CLARABEL", help="the solver of the compiled standard form")
+    args = parser.parse_args()
+    
+    test_solve_batch(args)
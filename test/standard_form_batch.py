@@ -0,0 +1,85 @@
+"""
+test the batched right-hand sides of the standard form against the per-sample standard form
+"""
+
+import sys
+import time
+import numpy as np
+sys.path.append('.')
+from utils import load_grid_from_xlsx, return_standard_form, return_standard_form_batch, random_params
+
+def test_standard_form_batch(args):
+
+    rng = np.random.default_rng(0)
+
+    T = args.T
+    N = args.no_sample
+
+    grid_op = load_grid_from_xlsx(
+        xlsx_path = f"configs/{args.pypower_case_name}.xlsx", T = T,
+        reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1
+        )
+    uc_cvxpy, ed_cvxpy = grid_op.get_opt(with_int = False)
+
+    params_val_batch = random_params(grid_op, rng, N)
+
+    # warm up the compiler cache so that both paths only evaluate the parameters
+    return_standard_form_batch(uc_cvxpy, {key: value[:1] for key, value in params_val_batch.items()}, args.solver)
+
+    start = time.perf_counter()
+    P, q, A, G, b_batch, h_batch = return_standard_form_batch(uc_cvxpy, params_val_batch, args.solver)
+    batch_time = time.perf_counter() - start
+
+    b_sample, h_sample = [], []
+    start = time.perf_counter()
+    for i in range(N):
+        P_i, q_i, r_i, A_i, b_i, G_i, h_i = return_standard_form(
+            uc_cvxpy, {key: value[i] for key, value in params_val_batch.items()}, args.solver
+            )
+        b_sample.append(b_i)
+        h_sample.append(h_i)
+    sample_time = time.perf_counter() - start
+
+    assert np.allclose(b_batch, np.array(b_sample)), "b is not consistent"
+    assert np.allclose(h_batch, np.array(h_sample)), "h is not consistent"
+
+    assert np.allclose(P.toarray(), P_i.toarray()) and np.allclose(q, q_i), "the objective is not consistent"
+    assert np.allclose(A.toarray(), A_i.toarray()) and np.allclose(G.toarray(), G_i.toarray()), "the constraint matrices are not consistent"
+
+    print(f"per-sample: {sample_time:.2f} s, batch: {batch_time:.4f} s, speedup: {sample_time / batch_time:.0f}x")
+
+    # the parametric problem: the parameters not given take the defaults, the parametric cost gives a q per sample
+    grid_op = load_grid_from_xlsx(
+        xlsx_path = f"configs/{args.pypower_case_name}.xlsx", T = T,
+        reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1, sparse = True, parametric = ['init', 'reserve', 'pfmax', 'cost']
+        )
+    uc_cvxpy, ed_cvxpy = grid_op.get_opt(with_int = False)
+    N = min(N, args.no_sample_parametric)
+    params_val_batch = {key: value[:N] for key, value in params_val_batch.items()}
+    params_val_batch['pfmax'] = grid_op.pfmax * rng.uniform(0.8, 1.2, (N, grid_op.no_branch))
+    params_val_batch['cv'] = grid_op.cv * rng.uniform(0.5, 1.5, (N, grid_op.no_gen))
+    
+    P, q, A, G, b_batch, h_batch = return_standard_form_batch(uc_cvxpy, params_val_batch, args.solver)
+    assert q.shape == (N, P.shape[1]), "q is not given for each sample"
+    for i in range(N):
+        P_i, q_i, r_i, A_i, b_i, G_i, h_i = return_standard_form(
+            uc_cvxpy, {key: value[i] for key, value in params_val_batch.items()}, args.solver
+            )
+        assert np.allclose(b_batch[i], b_i) and np.allclose(h_batch[i], h_i), f"the right-hand sides of the parametric sample {i} are not consistent"
+        assert np.allclose(q[i], q_i), f"q of the parametric sample {i} is not consistent"
+
+    print('All tests passed')
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, default="case14")
+    parser.add_argument('-s', '--no_sample', type=int, default=8760)
+    parser.add_argument('-p', '--no_sample_parametric', type=int, default=50)
+    parser.add_argument('-T', '--T', type=int, default=24)
+    parser.add_argument('--solver', type=str, default="GUROBI")
+    args = parser.parse_args()
+
+    test_standard_form_batch(args)
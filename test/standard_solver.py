@@ -0,0 +1,92 @@
+"""
+test the native standard form solver against the cvxpy solution
+"""
+
+import sys
+import numpy as np
+sys.path.append('.')
+from utils import load_grid_from_xlsx, compile_problem, StandardFormSolver, random_params
+
+# osqp stops at the iteration limit of the cvxpy default (10000 iterations) for most samples of this problem,
+# and is polished as in cvxpy
+SOLVER_OPTIONS = {'OSQP': {'max_iter': 1000000, 'polishing': True}}
+# the relative tolerance of the optimal values to the reference of each solver, osqp stops at the residuals of 1e-5
+# (the values are within 2e-3 of clarabel on case14)
+RTOL = {'OSQP': 5e-3, 'HIGHS': 1e-5, 'CLARABEL': 1e-5}
+
+def test_standard_solver(args):
+    
+    rng = np.random.default_rng(0)
+    
+    T = args.T
+    with_int = False
+    
+    grid_op = load_grid_from_xlsx(
+        xlsx_path = f"configs/{args.pypower_case_name}.xlsx", T = T, 
+        reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1
+        )
+    uc_cvxpy, ed_cvxpy = grid_op.get_opt(with_int)
+    
+    # the standard form is canonicalized once
+    uc_compiled = compile_problem(uc_cvxpy, solver = args.compile_solver)
+    ed_compiled = compile_problem(ed_cvxpy, solver = args.compile_solver)
+    uc_stand = {solver: StandardFormSolver(uc_compiled, solver, **SOLVER_OPTIONS.get(solver, {})) for solver in args.solver}
+    ed_stand = {solver: StandardFormSolver(ed_compiled, solver, **SOLVER_OPTIONS.get(solver, {})) for solver in args.solver}
+    no_skipped = {solver: 0 for solver in args.solver}
+    
+    for i in range(args.no_sample):
+        params_val_dict_uc = random_params(grid_op, rng)
+        
+        # cvxpy solution
+        grid_op.solve(uc_cvxpy, params_val_dict_uc, solver = args.reference_solver)
+        uc_sol_cvxpy = grid_op.get_sol(uc_cvxpy)
+        params_val_dict_ed = {**params_val_dict_uc, 'pg_uc': uc_sol_cvxpy['pg']}
+        grid_op.solve(ed_cvxpy, params_val_dict_ed, solver = args.reference_solver)
+        assert uc_cvxpy.status == 'optimal' and ed_cvxpy.status == 'optimal', f"sample {i} is not solved by the reference"
+        value_ref = {'uc': uc_cvxpy.value, 'ed': ed_cvxpy.value}
+        
+        # standard form solution
+        for solver in args.solver:
+            uc_sol_stand, status_uc, value_uc = uc_stand[solver].solve(params_val_dict_uc)
+            ed_sol_stand, status_ed, value_ed = ed_stand[solver].solve(params_val_dict_ed)
+            for kind, status, value, prob, params in [('uc', status_uc, value_uc, uc_cvxpy, params_val_dict_uc), 
+                                                        ('ed', status_ed, value_ed, ed_cvxpy, params_val_dict_ed)]:
+                if status != 'optimal':
+                    # only a sample that cvxpy can not solve with the same solver either is skipped
+                    # (e.g. the solve error of the qp solver of highs)
+                    try:
+                        grid_op.solve(prob, params, solver = solver, **SOLVER_OPTIONS.get(solver, {}))
+                        status_cvxpy = prob.status
+                    except Exception as error:
+                        status_cvxpy = type(error).__name__
+                    assert status_cvxpy != 'optimal', f"the {kind} of sample {i} is solved by cvxpy with {solver} but not the standard form: {status}"
+                    print(f"the {kind} of sample {i} is skipped for {solver}: {status}, {status_cvxpy} in cvxpy")
+                    no_skipped[solver] += 1
+                    continue
+                assert np.isclose(value_ref[kind], value, rtol = RTOL.get(solver, args.rtol)), \
+                    f"{kind} value of {solver} is not consistent for sample {i}: {value}, {value_ref[kind]}"
+            if uc_sol_stand is not None:
+                assert set(uc_sol_stand.keys()) == set(uc_sol_cvxpy.keys()), "the variables are not consistent"
+    
+    for solver in args.solver:
+        assert no_skipped[solver] <= args.max_skipped * 2 * args.no_sample, \
+            f"{no_skipped[solver]} of the {2 * args.no_sample} problems are skipped for {solver}"
+    
+    print('All tests passed')
+
+if __name__ == "__main__":
+    
+    import argparse
+    
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, default="case14")
+    parser.add_argument('-s', '--no_sample', type=int, default=10)
+    parser.add_argument('-T', '--T', type=int, default=6)
+    parser.add_argument('--solver', type=str, nargs='+', default=["OSQP", "HIGHS", "CLARABEL"])
+    parser.add_argument('--reference_solver', type=str, default="GUROBI")
+    parser.add_argument('--compile_solver', type=str, default="OSQP")
+    parser.add_argument('--rtol', type=float, default=1e-5, help="the relative tolerance of the solvers not in RTOL")
+    parser.add_argument('--max_skipped', type=float, default=0.2, help="the maximum fraction of the problems skipped for each solver")
+    args = parser.parse_args()
+    
+    test_standard_solver(args)
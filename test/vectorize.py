@@ -0,0 +1,73 @@
+"""
+test the vectorized formulation against the per-step (loop) formulation: the same size of the standard form,
+the same optimal values and solutions, for the phase angle and the ptdf formulations
+"""
+
+import sys
+import numpy as np
+sys.path.append('.')
+from operation import Operation
+from utils import return_standard_form, random_params
+
+def standard_form_size(prob, params, solver):
+    """the shapes of P, A and G of the standard form"""
+    P, _, _, A, _, G, _ = return_standard_form(prob, params, solver = solver)
+    return P.shape, A.shape, G.shape
+
+def test_vectorize(args):
+
+    rng = np.random.default_rng(0)
+
+    T = args.T
+    with_int = args.with_int
+
+    for formulation in ['angle', 'ptdf']:
+        grid_op = {
+            vectorize: Operation(f"configs/{args.pypower_case_name}.xlsx", T, reserve = 0.0, pg_init_ratio = 0.5, ug_init = 1,
+                                sparse = True, vectorize = vectorize, formulation = formulation)
+            for vectorize in [False, True]
+        }
+        prob = {vectorize: grid_op[vectorize].get_opt(with_int) for vectorize in grid_op.keys()}
+
+        for i in range(args.no_sample):
+            params_uc = random_params(grid_op[False], rng)
+            value, sol, size = {}, {}, {}
+            for vectorize, (uc, ed) in prob.items():
+                grid_op[vectorize].solve(uc, params_uc, solver = args.solver)
+                uc_sol = grid_op[vectorize].get_sol(uc)
+                params_ed = {**params_uc, 'pg_uc': uc_sol['pg']}
+                if with_int:
+                    params_ed['ug'] = np.round(uc_sol['ug'])
+                grid_op[vectorize].solve(ed, params_ed, solver = args.solver)
+                value[vectorize] = (uc.value, ed.value)
+                sol[vectorize] = (uc_sol, grid_op[vectorize].get_sol(ed))
+
+                # the rows may be ordered differently (and the ptdf rows have a different sparsity), not the size
+                size[vectorize] = [standard_form_size(problem, params, args.solver) for problem, params in [(uc, params_uc), (ed, params_ed)]]
+
+            name = f"{formulation}, sample {i}"
+            assert size[False] == size[True], f"the size of P, A and G of {name} is not the same: {size[False]}, {size[True]}"
+            assert np.allclose(value[False], value[True], rtol = args.rtol), f"the objective of {name} is not the same"
+            for kind, loop_sol, vectorized_sol in zip(['uc', 'ed'], sol[False][:2], sol[True][:2]):
+                assert loop_sol.keys() == vectorized_sol.keys(), f"the variables of the {kind} of {name} are not the same"
+                for var_name in loop_sol.keys():
+                    assert np.allclose(loop_sol[var_name], vectorized_sol[var_name], atol = args.atol), \
+                        f"{var_name} of the {kind} of {name} is not the same"
+
+    print('All tests passed')
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, default="case14")
+    parser.add_argument('-s', '--no_sample', type=int, default=3)
+    parser.add_argument('-T', '--T', type=int, default=6)
+    parser.add_argument('-i', '--with_int', default=False, action='store_true')
+    parser.add_argument('--solver', type=str, default="GUROBI")
+    parser.add_argument('--rtol', type=float, default=1e-5)
+    parser.add_argument('--atol', type=float, default=1e-4)
+    args = parser.parse_args()
+
+    test_vectorize(args)
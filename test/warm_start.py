@@ -0,0 +1,79 @@
+"""
+test the shifted warm start of the consecutive windows with osqp: the same optimum as the cold solve in fewer
+iterations, and the cold solve with a warning outside the tested versions of cvxpy
+"""
+
+import sys
+import warnings
+import numpy as np
+sys.path.append('.')
+import operation.power_operation as power_operation
+from operation import Operation
+from utils import DataWindows, get_data
+
+def sweep(grid_op, prob, windows, no_window, warm_start, solver_options):
+    """the values and the total osqp iterations of the windows 1, ..., no_window - 1, window 0 sets up the solver"""
+    grid_op.solve(prob, windows[0], solver = 'OSQP', warm_start = False, **solver_options)
+    values, no_iter = [], 0
+    for i in range(1, no_window):
+        start = grid_op.shift_solution(prob) if warm_start else False
+        grid_op.solve(prob, windows[i], solver = 'OSQP', warm_start = start, **solver_options)
+        assert prob.status in ['optimal', 'optimal_inaccurate'], f"window {i} is not solved with warm_start = {warm_start}"
+        values.append(prob.value)
+        no_iter += prob.solver_stats.num_iters
+    return np.array(values), no_iter
+
+def test_warm_start(args):
+
+    T = args.T
+    grid_op = Operation(f"configs/{args.pypower_case_name}.xlsx", T, reserve = 0.0,
+                        pg_init_ratio = 0.5, ug_init = 1, sparse = True, vectorize = True)
+    load_all, solar_all, wind_all = get_data(grid_op.no_load, args.data_folder, grid_op)
+    windows = DataWindows(load_all, solar_all, wind_all, T)
+    solver_options = {'max_iter': args.max_iter}
+
+    # the optimum by the interior point method
+    prob = grid_op.get_opt(False, 'uc')
+    value_ref = []
+    for i in range(1, args.no_window):
+        grid_op.solve(prob, windows[i], solver = args.reference_solver)
+        value_ref.append(prob.value)
+    
+    value_cold, iter_cold = sweep(grid_op, grid_op.get_opt(False, 'uc'), windows, args.no_window, False, solver_options)
+    value_warm, iter_warm = sweep(grid_op, grid_op.get_opt(False, 'uc'), windows, args.no_window, True, solver_options)
+    print(f"cold: {iter_cold} iterations, shifted warm start: {iter_warm} iterations")
+    assert np.allclose(value_cold, value_ref, rtol = args.rtol), "the cold solve does not reach the optimum"
+    assert np.allclose(value_warm, value_ref, rtol = args.rtol), "the warm start does not reach the same optimum"
+    assert iter_warm < iter_cold, "the warm start does not save iterations"
+
+    # outside the tested versions of cvxpy the start is ignored with a warning and the windows are solved cold
+    tested = power_operation.OSQP_CACHE_CVXPY
+    power_operation.OSQP_CACHE_CVXPY = ((0, 0), (0, 0))
+    try:
+        with warnings.catch_warnings(record = True) as caught:
+            warnings.simplefilter('always')
+            value_fallback, iter_fallback = sweep(grid_op, grid_op.get_opt(False, 'uc'), windows, args.no_window, True, solver_options)
+    finally:
+        power_operation.OSQP_CACHE_CVXPY = tested
+    assert any('solved cold' in str(warning.message) for warning in caught), "the unsupported version is not warned"
+    assert np.allclose(value_fallback, value_cold), "the fallback is not the cold solve"
+    assert iter_fallback == iter_cold, "the fallback is not the cold solve"
+
+    print('All tests passed')
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--pypower_case_name', type=str, default="case14")
+    parser.add_argument('-d', '--data_folder', type=str, default="data/case14/")
+    parser.add_argument('-T', '--T', type=int, default=6)
+    parser.add_argument('-w', '--no_window', type=int, default=10)
+    parser.add_argument('--max_iter', type=int, default=100000, help="the iteration limit of osqp")
+    parser.add_argument('--reference_solver', type=str, default="CLARABEL")
+    # ! osqp stops at the residuals of 1e-5, the objective of the uc is then accurate to a few 1e-3
+    parser.add_argument('--rtol', type=float, default=1e-2, help="the tolerance of the optimal values of osqp")
+    args = parser.parse_args()
+
+    test_warm_start(args)
@@ -1,4 +1,10 @@
 from .loading import *
 from .standard_from import *
+from .problem_cache import *
+from .standard_solver import *
+from .data_store import *
+from .data_windows import *
+from .screening import *
 from .modify_data import *
+from .sampling import *
 from .group_data import group_data
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""
+columnar binary store of the assigned data (data_{i}.csv of each load)
+the store is a folder store/ in the data folder with one contiguous array for each kind of data:
+    - load.npy: (no_sample, no_load)
+    - solar.npy: (no_sample, no_solar), the loads with solar (same order as the loads)
+    - wind.npy: (no_sample, no_wind), the loads with wind
+    - features.npy: (no_sample, no_load, no_feature), the calendar and weather features (e.g. Weekday_sin, Hour_sin)
+    - meta.json: baseMVA, the feature names, the load index of the solar/wind columns and the csv file stats
+load, solar and wind are saved in p.u. so that get_data can return the memory-mapped arrays without a copy.
+The csv files are kept as the export of the data.
+"""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+
+DATA_COLUMNS = ['Load', 'Solar', 'Wind']
+
+def store_dir(data_folder):
+    """the folder of the binary store"""
+    return os.path.join(data_folder, 'store')
+
+def _csv_stats(data_folder, no_load):
+    """(size, mtime) of the csv files, used to detect the stale store"""
+    stats = []
+    for i in range(1, no_load + 1):
+        stat = os.stat(os.path.join(data_folder, f'data_{i}.csv'))
+        stats.append([stat.st_size, stat.st_mtime_ns])
+    return stats
+
+def write_data_store(data_folder, data_all, baseMVA):
+    """
+    write the binary store of the data
+    data_all: [DataFrame of load 1, DataFrame of load 2, ...], the same as data_{i}.csv
+    baseMVA: the load, solar and wind are saved in p.u.
+    """
+    folder = store_dir(data_folder)
+    os.makedirs(folder, exist_ok = True)
+
+    load = np.stack([data['Load'].values for data in data_all], axis = 1) / baseMVA
+    solar_idx = [i for i, data in enumerate(data_all) if np.sum(data['Solar']) > 0]
+    wind_idx = [i for i, data in enumerate(data_all) if np.sum(data['Wind']) > 0]
+    feature_names = [column for column in data_all[0].columns if column not in DATA_COLUMNS]
+
+    arrays = {
+        'load': load,
+        'solar': np.stack([data_all[i]['Solar'].values for i in solar_idx], axis = 1) / baseMVA if len(solar_idx) > 0 else None,
+        'wind': np.stack([data_all[i]['Wind'].values for i in wind_idx], axis = 1) / baseMVA if len(wind_idx) > 0 else None,
+        'features': np.stack([data[feature_names].values for data in data_all], axis = 1).astype(float)
+    }
+    for name, array in arrays.items():
+        if array is None:
+            continue
+        tmp_path = os.path.join(folder, f"{name}.npy.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.replace(tmp_path, os.path.join(folder, f"{name}.npy"))
+
+    # the meta file is written last, it marks the store as complete
+    meta = {
+        'baseMVA': float(baseMVA), 'no_load': len(data_all), 'no_sample': load.shape[0],
+        'solar_idx': solar_idx, 'wind_idx': wind_idx, 'feature_names': feature_names,
+        'csv_stats': _csv_stats(data_folder, len(data_all)) if os.path.exists(os.path.join(data_folder, 'data_1.csv')) else None
+    }
+    tmp_path = os.path.join(folder, f"meta.json.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(folder, 'meta.json'))
+
+def read_data_store(data_folder, no_load = None):
+    """
+    memory-map the binary store of the data (read-only)
+    return: {'meta': meta, 'load': array, 'solar': array or None, 'wind': array or None, 'features': array},
+        None if the store is missing or older than the csv files
+    """
+    meta_path = os.path.join(store_dir(data_folder), 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+
+    with open(meta_path, 'r') as f:
+        meta = json.load(f)
+    if no_load is not None and meta['no_load'] != no_load:
+        return None
+    if meta['csv_stats'] is not None and os.path.exists(os.path.join(data_folder, 'data_1.csv')):
+        if _csv_stats(data_folder, meta['no_load']) != meta['csv_stats']:
+            return None
+
+    store = {'meta': meta}
+    for name in ['load', 'solar', 'wind', 'features']:
+        if name in ['solar', 'wind'] and len(meta[f'{name}_idx']) == 0:
+            store[name] = None
+            continue
+        # a plain ndarray view of the memory map, no copy
+        store[name] = np.asarray(np.load(os.path.join(store_dir(data_folder), f"{name}.npy"), mmap_mode = 'r'))
+
+    return store
+
+def read_data_csv(data_folder, no_load):
+    """read data_{i}.csv of each load as a list of DataFrames"""
+    return [pd.read_csv(os.path.join(data_folder, f'data_{i}.csv')) for i in range(1, no_load + 1)]
@@ -0,0 +1,77 @@
+"""
+zero-copy sliding windows over the data of get_data
+the T-step window i of a (no_sample, n) array is data_all[i:i + T].flatten(),
+which is the i-th row of a (no_window, T * n) strided view on the same memory (no copy)
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+def window_view(data_all, T):
+    """
+    (no_sample - T + 1, T * n) read-only view of all the T-step windows of the (no_sample, n) array
+    """
+    data_all = np.ascontiguousarray(data_all) # no copy for the memory-mapped store of get_data
+    no_sample, n = data_all.shape
+    return as_strided(data_all, shape = (no_sample - T + 1, T * n),
+                    strides = (data_all.strides[0], data_all.itemsize), writeable = False)
+
+class DataWindows:
+
+    def __init__(self, load_all, solar_all, wind_all, T):
+        """
+        the windows of the load, solar and wind from get_data, keyed by the parameter names of the problem
+        load_all, solar_all, wind_all: (no_sample, n) arrays, solar_all and wind_all can be None
+        """
+        self.T = T
+        self.windows = {'load': window_view(load_all, T)}
+        if solar_all is not None:
+            self.windows['solar'] = window_view(solar_all, T)
+        if wind_all is not None:
+            self.windows['wind'] = window_view(wind_all, T)
+        self.no_window = self.windows['load'].shape[0]
+
+    def __len__(self):
+        return self.no_window
+
+    def __getitem__(self, i):
+        """the parameters of window i, {'load': (T * no_load,) view, ...}"""
+        return {name: window[i] for name, window in self.windows.items()}
+
+    def take(self, idx):
+        """the parameters of the windows idx stacked as {'load': (len(idx), T * no_load) array, ...}, e.g. for solve_batch"""
+        return {name: window[idx] for name, window in self.windows.items()}
+
+    def chunks(self, chunk_size, idx = None):
+        """
+        iterate over the windows (or the windows idx) in chunks of chunk_size
+        yield: the window index of the chunk and {'load': (chunk_size, T * no_load), ...},
+            views for the consecutive windows and copies for idx
+        """
+        if idx is None:
+            for start in range(0, self.no_window, chunk_size):
+                stop = min(start + chunk_size, self.no_window)
+                yield np.arange(start, stop), {name: window[start:stop] for name, window in self.windows.items()}
+        else:
+            idx = np.asarray(idx)
+            for start in range(0, len(idx), chunk_size):
+                yield idx[start:start + chunk_size], self.take(idx[start:start + chunk_size])
+
+    def noise_buffer(self):
+        """preallocated buffers for the noisy windows, {'load': (T * no_load,) array, ...}"""
+        return {name: np.empty(window.shape[1]) for name, window in self.windows.items()}
+
+    def noisy(self, i, low, high, out, rng):
+        """
+        window i multiplied by the uniform noise in [low, high), written into the buffers out (from noise_buffer)
+        rng: a numpy Generator, e.g. np.random.default_rng(seed)
+        NOTE: cvxpy keeps a reference to the parameter value, so the buffers should only be
+            overwritten after the problem with the current values is solved
+        """
+        for name, window in self.windows.items():
+            buffer = out[name]
+            rng.random(out = buffer)
+            buffer *= high - low
+            buffer += low
+            buffer *= window[i]
+        return out
@@ -1,24 +1,34 @@
 """
 group the original data (in Data_public) into each data csv file
+the day files are parsed in parallel into preallocated arrays of the whole year, and the bus files are written at the end
+the parsed days are kept in data/data_grouped_partial/ so that an interrupted grouping resumes from the parsed days
+an index of the bus files (index.json) and a binary copy of their values (series.npy) are written for assign_data
 """
 
+import json
 import pandas as pd
-from tqdm import trange
+from tqdm import tqdm
 import numpy as np
 import datetime
 import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 
-def return_renewable_incidences(no_bus):
+CLIMATE_COLUMNS = ['Temperature (k)', 'Shortwave Radiation (w/m2)',
+                    'Longwave Radiation (w/m2)', 'Zonal Wind Speed (m/s)',
+                    'Meridional Wind Speed (m/s)', 'Wind Speed (m/s)']
+
+def return_renewable_incidences(no_bus, raw_dir = 'data/Data_public'):
     """dicts to link the solar and wind idx to the bus idx
     given solar or wind idx, return the bus idx"""
 
     # link the generator idx to the bus idx
     # one bus can have multiple gen
-    gen_data = pd.read_excel('data/Data_public/Generator_data.xlsx', sheet_name='Gen data')    
+    gen_data = pd.read_excel(f'{raw_dir}/Generator_data.xlsx', sheet_name='Gen data')    
     # link the solar idx to the gen idx
-    solar_data = pd.read_excel('data/Data_public/Generator_data.xlsx', sheet_name='Solar Plant Number')
+    solar_data = pd.read_excel(f'{raw_dir}/Generator_data.xlsx', sheet_name='Solar Plant Number')
     # link the wind idx to the gen idx
-    wind_data = pd.read_excel('data/Data_public/Generator_data.xlsx', sheet_name='Wind Plant Number')
+    wind_data = pd.read_excel(f'{raw_dir}/Generator_data.xlsx', sheet_name='Wind Plant Number')
 
     # given bus idx return the gen idx
     bus_to_gen = {}
@@ -47,82 +57,110 @@ def return_renewable_incidences(no_bus):
     
     return solar_to_bus, wind_to_bus
 
-def group_data():
+def _to_array(data):
+    """
+    the values of a DataFrame as a float array and whether each column is integer
+    the integer columns are written as integers if they are integer in all the files (as pd.concat does)
+    """
+    return data.to_numpy(dtype = float), np.array([pd.api.types.is_integer_dtype(dtype) for dtype in data.dtypes])
 
-    print("========= Grouping data =========")
+def _read_day(raw_dir, day, no_hour):
+    """
+    parse the climate workbook and the load, solar and wind files of one day
+    return: {name: array} with
+        - climate: (no_hour, no_bus, no_climate), climate_int: (no_climate,)
+        - load: (no_hour, no_bus), load_int: (no_bus,)
+        - solar: (no_solar, no_hour), solar_int: (), the same for the wind
+    """
+    
+    # the climate file is a workbook with one sheet per hour
+    climate_day = pd.read_excel(f'{raw_dir}/Climate_2019/climate_2019_Day{day}.csv', sheet_name = [f'Hour {hour}' for hour in range(1, no_hour + 1)])
+    climate = [_to_array(climate_day[f'Hour {hour}'][CLIMATE_COLUMNS]) for hour in range(1, no_hour + 1)]
     
-    save_dir = 'data/data_grouped'
+    day_data = {
+        'climate': np.stack([value for value, _ in climate], axis = 0),
+        'climate_int': np.all([is_int for _, is_int in climate], axis = 0)
+    }
+    day_data['load'], day_data['load_int'] = _to_array(pd.read_csv(f'{raw_dir}/load_2019/load_annual_D{day}.txt', sep=" ", header=None))
+    for name in ['solar', 'wind']:
+        value, is_int = _to_array(pd.read_csv(f'{raw_dir}/{name}_2019/{name}_annual_D{day}.txt', sep=" ", header=None))
+        # a row of the DataFrame is integer only if all the columns are integer
+        day_data[name], day_data[f'{name}_int'] = value, np.all(is_int)
+    
+    return day_data
+
+def _read_day_star(args):
+    return _read_day(*args)
+
+def group_data(raw_dir = 'data/Data_public', save_dir = 'data/data_grouped', no_day = 365, n_workers = None):
+    """
+    group the raw data of the Texas backbone system into bus_{i}.csv with the calendar, climate, load, solar and wind of each hour
+    raw_dir: the unzipped Data_public folder
+    save_dir: the output folder, the grouping is skipped if it exists
+    n_workers: the number of processes to parse the day files, default to the number of cpus. parse in the current process if 1
+    """
+
+    print("========= Grouping data =========")
     
     if os.path.exists(save_dir):
-        print("Data already grouped. To re-group, delete the 'data/data_grouped' directory.")
+        print(f"Data already grouped. To re-group, delete the '{save_dir}' directory.")
         return
 
     no_bus = 123
-    no_day = 365
     no_hour = 24
     
-    # empty dataframes
-    climate_hour = pd.read_excel("data/Data_public/Climate_2019/climate_2019_Day" + '1.csv', sheet_name='Hour 1')
-    data_all = {key: pd.DataFrame(columns=climate_hour.columns) for key in range(1, no_bus+1)}
-
-    # climate data
-    for i in trange(1, no_day+1, desc='Loading climate data'):
-        climate_data_day = pd.ExcelFile("data/Data_public/Climate_2019/climate_2019_Day" + str(i) + '.csv')
-        for hour in [f'Hour {i}' for i in range(1,no_hour+1)]:
-            climate_data_hour = climate_data_day.parse(hour)
-            for bus_idx in range(1, no_bus +1):
-                if len(data_all[bus_idx]) == 0:
-                    data_all[bus_idx] = climate_data_hour.iloc[bus_idx-1:bus_idx]
-                else:
-                    data_all[bus_idx] = pd.concat([data_all[bus_idx], climate_data_hour.iloc[bus_idx-1:bus_idx]], ignore_index=True, axis=0)
-
-    # load data
-    load_all = []
-    for day in trange(1, no_day+1, desc='Loading load data'):
-        load_all.append(pd.read_csv(f'data/Data_public/load_2019/load_annual_D{day}.txt', sep=" ", header=None))
-    load_all = pd.concat(load_all, axis=0)  # (no_day*no_hour, no_bus)
-    load_all.reset_index(drop=True, inplace=True)
-    for bus_idx in range(1, no_bus+1):
-        data_all[bus_idx]['Load'] = load_all[bus_idx-1]
-    
     # solar and wind incidence matrix
-    solar_to_bus, wind_to_bus = return_renewable_incidences(no_bus)
-    
-    # add new columns
-    for idx, data in data_all.items():
-        data['Solar'] = 0
-        data['Wind'] = 0
-    
-    # pack the solar
-    solar_all = {solar_idx: [] for solar_idx in solar_to_bus.keys()}
-    for day in trange(1, no_day+1, desc='Loading solar data'):
-        solar_day = pd.read_csv(f'data/Data_public/solar_2019/solar_annual_D{day}.txt', sep=" ", header=None)
-        for solar_idx in solar_to_bus.keys():
-            if len(solar_all[solar_idx]) == 0:
-                solar_all[solar_idx] = solar_day.iloc[solar_idx-1,:]
-            else:
-                solar_all[solar_idx] = pd.concat([solar_all[solar_idx], solar_day.iloc[solar_idx-1,:]], axis=0, ignore_index=True)
-    
-    # assign solar to data
-    for solar_idx, bus_idx in solar_to_bus.items():
-        data_all[bus_idx]['Solar'] = solar_all[solar_idx]
-
-    # pack the wind
-    wind_all = {wind_idx: [] for wind_idx in wind_to_bus.keys()}
-    for day in trange(1, no_day+1, desc='Loading wind data'):
-        wind_day = pd.read_csv(f'data/Data_public/wind_2019/wind_annual_D{day}.txt', sep=" ", header=None)
-        for wind_idx in wind_to_bus.keys():
-            if len(wind_all[wind_idx]) == 0:
-                wind_all[wind_idx] = wind_day.iloc[wind_idx-1, :]
-            else:
-                wind_all[wind_idx] = pd.concat([wind_all[wind_idx], wind_day.iloc[wind_idx-1, :]], axis=0, ignore_index=True)
-    
-    # assign wind to data
-    for wind_idx, bus_idx in wind_to_bus.items():
-        data_all[bus_idx]['Wind'] = wind_all[wind_idx]
-    
-    # print('solar to bus:', solar_to_bus, 'length:', len(solar_to_bus))
-    # print('wind to bus:', wind_to_bus, 'length:', len(wind_to_bus))
+    solar_to_bus, wind_to_bus = return_renewable_incidences(no_bus, raw_dir)
+    
+    # the parsed days of an interrupted grouping
+    partial_dir = save_dir.rstrip('/') + '_partial'
+    os.makedirs(partial_dir, exist_ok = True)
+    day_path = lambda day: os.path.join(partial_dir, f'day_{day}.npz')
+    to_parse = [day for day in range(1, no_day + 1) if not os.path.exists(day_path(day))]
+    if len(to_parse) < no_day:
+        print(f"Resume from {no_day - len(to_parse)} parsed days in '{partial_dir}'.")
+    
+    n_workers = os.cpu_count() if n_workers is None else n_workers
+    tasks = [(raw_dir, day, no_hour) for day in to_parse]
+    if n_workers == 1:
+        parsed = map(_read_day_star, tasks)
+    else:
+        executor = ProcessPoolExecutor(max_workers = n_workers)
+        # map keeps the input order
+        parsed = executor.map(_read_day_star, tasks)
+    try:
+        for day, day_data in tqdm(zip(to_parse, parsed), total = len(to_parse), desc = 'Loading day files'):
+            tmp_path = day_path(day) + '.tmp.npz'
+            np.savez(tmp_path, **day_data)
+            os.replace(tmp_path, day_path(day))
+    finally:
+        if n_workers != 1:
+            executor.shutdown(cancel_futures = True)
+    
+    # preallocated arrays of the whole year
+    climate_all = np.empty((no_day * no_hour, no_bus, len(CLIMATE_COLUMNS)))
+    load_all = np.empty((no_day * no_hour, no_bus))
+    solar_all = {solar_idx: np.empty(no_day * no_hour) for solar_idx in solar_to_bus.keys()}
+    wind_all = {wind_idx: np.empty(no_day * no_hour) for wind_idx in wind_to_bus.keys()}
+    climate_int, load_int = np.ones(len(CLIMATE_COLUMNS), dtype = bool), np.ones(no_bus, dtype = bool)
+    solar_int, wind_int = True, True
+    
+    for day in range(1, no_day + 1):
+        hours = slice((day - 1) * no_hour, day * no_hour)
+        with np.load(day_path(day)) as day_data:
+            climate_all[hours] = day_data['climate']
+            load_all[hours] = day_data['load']
+            for solar_idx in solar_to_bus.keys():
+                solar_all[solar_idx][hours] = day_data['solar'][solar_idx - 1]
+            for wind_idx in wind_to_bus.keys():
+                wind_all[wind_idx][hours] = day_data['wind'][wind_idx - 1]
+            climate_int &= day_data['climate_int']
+            load_int &= day_data['load_int']
+            solar_int &= bool(day_data['solar_int'])
+            wind_int &= bool(day_data['wind_int'])
+    
+    # the integer columns are kept as integers
+    as_type = lambda value, is_int: value.astype(np.int64) if is_int else value
 
     # add calender data
     start_weekday = datetime.datetime(2019,1,1).weekday()
@@ -136,31 +174,95 @@ def group_data():
     hour_cos = np.cos(2 * np.pi * ( hour / 24))
     weekday_sin = np.sin(2 * np.pi * ( weekday / 7))
     weekday_cos = np.cos(2 * np.pi * ( weekday / 7))
+    
+    bus_to_solar = {bus_idx: solar_idx for solar_idx, bus_idx in solar_to_bus.items()}
+    bus_to_wind = {bus_idx: wind_idx for wind_idx, bus_idx in wind_to_bus.items()}
+    
+    # save the data, the complete folder is moved to save_dir at the end
+    tmp_dir = save_dir.rstrip('/') + '_tmp'
+    shutil.rmtree(tmp_dir, ignore_errors = True)
+    os.makedirs(tmp_dir)
+    
+    for bus in tqdm(range(1, no_bus + 1), desc = 'Saving bus files'):
+        data = {
+            'Weekday_sin': weekday_sin, 'Weekday_cos': weekday_cos, 'Hour_sin': hour_sin, 'Hour_cos': hour_cos,
+            **{column: as_type(climate_all[:, bus - 1, i], climate_int[i]) for i, column in enumerate(CLIMATE_COLUMNS)},
+            'Load': as_type(load_all[:, bus - 1], load_int[bus - 1]),
+            'Solar': as_type(solar_all[bus_to_solar[bus]], solar_int) if bus in bus_to_solar else np.zeros(no_day * no_hour, dtype = np.int64),
+            'Wind': as_type(wind_all[bus_to_wind[bus]], wind_int) if bus in bus_to_wind else np.zeros(no_day * no_hour, dtype = np.int64),
+        }
+        pd.DataFrame(data).to_csv(os.path.join(tmp_dir, f'bus_{bus}.csv'), index=False)
+    
+    np.save(os.path.join(tmp_dir, 'solar_to_bus.npy'), solar_to_bus, allow_pickle=True)
+    np.save(os.path.join(tmp_dir, 'wind_to_bus.npy'), wind_to_bus, allow_pickle=True)
+    write_grouped_index(tmp_dir)
+    
+    os.replace(tmp_dir, save_dir)
+    shutil.rmtree(partial_dir)
 
-    for bus in range(1, no_bus+1):
-        data_all[bus]['Hour_sin'] = hour_sin
-        data_all[bus]['Hour_cos'] = hour_cos
-        data_all[bus]['Weekday_sin'] = weekday_sin
-        data_all[bus]['Weekday_cos'] = weekday_cos
-        data_all[bus]['Load'] = load_all.iloc[:,bus-1]
+def _bus_stats(data_grouped_dir, file_name):
+    """(size, mtime) of the bus files, used to detect the stale index"""
+    stats = []
+    for name in file_name:
+        stat = os.stat(os.path.join(data_grouped_dir, name))
+        stats.append([stat.st_size, stat.st_mtime_ns])
+    return stats
+
+def write_grouped_index(data_grouped_dir):
+    """
+    write the index of the bus files and the binary copy of their values
+        - series.npy: (no_bus, no_sample, no_column), the values of bus_{i}.csv as read by pd.read_csv
+        - index.json: the file names (in the order of series.npy), the columns, the integer columns of each file,
+            whether each file has solar and wind, the max load, solar and wind of each file and the file stats
+    """
     
-    # change the order of the columns
-    columns = ['Weekday_sin', 'Weekday_cos', 'Hour_sin', 'Hour_cos', 'Temperature (k)', 'Shortwave Radiation (w/m2)',
-                    'Longwave Radiation (w/m2)', 'Zonal Wind Speed (m/s)',
-                    'Meridional Wind Speed (m/s)', 'Wind Speed (m/s)',
-                    'Load', 'Solar', 'Wind']
+    file_name = sorted(name for name in os.listdir(data_grouped_dir) if '.csv' in name)
+    data_all = [pd.read_csv(os.path.join(data_grouped_dir, name)) for name in file_name]
+    columns = list(data_all[0].columns)
+    
+    index = {
+        'file_name': file_name, 'columns': columns,
+        'int_columns': [[column for column in columns if pd.api.types.is_integer_dtype(data[column])] for data in data_all],
+        # the same to the check of assign_data, the bus data does not have solar (wind) if the sum is 0
+        'has_solar': [bool(np.sum(data['Solar']) > 0) for data in data_all],
+        'has_wind': [bool(np.sum(data['Wind']) > 0) for data in data_all],
+        'max_load': [float(np.max(data['Load'])) for data in data_all],
+        'max_solar': [float(np.max(data['Solar'])) for data in data_all],
+        'max_wind': [float(np.max(data['Wind'])) for data in data_all],
+        'stats': _bus_stats(data_grouped_dir, file_name)
+    }
     
-    # save the data
-    if not os.path.exists(save_dir):
-        os.makedirs(save_dir)
+    tmp_path = os.path.join(data_grouped_dir, f"series.npy.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        np.save(f, np.stack([data.to_numpy(dtype = float) for data in data_all], axis = 0))
+    os.replace(tmp_path, os.path.join(data_grouped_dir, 'series.npy'))
+    
+    # the index is written last, it marks the binary copy as complete
+    tmp_path = os.path.join(data_grouped_dir, f"index.json.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f)
+    os.replace(tmp_path, os.path.join(data_grouped_dir, 'index.json'))
 
-    for bus, data in data_all.items():
-        data = data[columns]
-        data.to_csv(f'data/data_grouped/bus_{bus}.csv', index=False)
+def read_grouped_index(data_grouped_dir):
+    """
+    read the index of the bus files and memory-map the binary copy of their values (read-only)
+    return: (index, series), None if the index is missing or older than the bus files
+    """
+    
+    index_path = os.path.join(data_grouped_dir, 'index.json')
+    if not os.path.exists(index_path):
+        return None
+    
+    with open(index_path, 'r') as f:
+        index = json.load(f)
+    try:
+        if _bus_stats(data_grouped_dir, index['file_name']) != index['stats']:
+            return None
+    except FileNotFoundError:
+        return None
     
-    np.save('data/data_grouped/solar_to_bus.npy', solar_to_bus, allow_pickle=True)
-    np.save('data/data_grouped/wind_to_bus.npy', wind_to_bus, allow_pickle=True)
+    return index, np.asarray(np.load(os.path.join(data_grouped_dir, 'series.npy'), mmap_mode = 'r'))
 
 if __name__ == "__main__":
 
-    group_data()
\ No newline at end of file
+    group_data()
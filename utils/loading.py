@@ -4,7 +4,7 @@ import numpy as np
 import pandas as pd
 from .pypower_idx import *
 from collections.abc import Iterable
-from operation import Operation
+from operation import Operation, write_grid_binary
 import json
 from copy import deepcopy
 
@@ -33,10 +33,17 @@ def grid_summary(grid):
     print(f"max renewable capacity: {(solar_cap + wind_cap) / total_cap}")
     print(f"max load penetration: {default_load / total_cap}")
 
-def load_grid_from_xlsx(xlsx_path: str, T, reserve, pg_init_ratio = None, ug_init = None):
-    """load the grid from the excel file"""
+def load_grid_from_xlsx(xlsx_path: str, T, reserve, pg_init_ratio = None, ug_init = None, sparse = False,
+                        vectorize = False, formulation = 'angle', init_param = False, parametric = ()):
+    """load the grid from the excel file
+    sparse: if True, the network matrices are stored as scipy.sparse matrices
+    vectorize: if True, the constraints are formulated over the whole horizon at once
+    formulation: 'angle' (phase angle variables) or 'ptdf' (branch flows by the PTDF matrix)
+    init_param: if True, the initial pg and ug of the ncuc are the parameters 'pg_init' and 'ug_init'
+    parametric: the data declared as the parameters, any of 'init', 'reserve', 'pfmax' and 'cost'"""
     
-    my_grid = Operation(xlsx_path, T, reserve, pg_init_ratio, ug_init)
+    my_grid = Operation(xlsx_path, T, reserve, pg_init_ratio, ug_init, sparse = sparse, vectorize = vectorize,
+                        formulation = formulation, init_param = init_param, parametric = parametric)
     
     grid_summary(my_grid)
 
@@ -78,6 +85,13 @@ def from_pypower(pypower_case_name: str, extra_config_path: str):
 
     configs = load_grid_pypower(pypower_case_name) # pypower case
 
+    # map the external bus numbers to the consecutive 1-based bus positions
+    # (the bus numbers of the large cases, e.g. case300, are not consecutive)
+    bus_pos = {int(bus_no): i + 1 for i, bus_no in enumerate(configs["bus"][:, BUS_I])}
+    for element_name, columns in [("gen", [GEN_BUS]), ("branch", [F_BUS, T_BUS])]:
+        for column in columns:
+            configs[element_name][:, column] = [bus_pos[int(i)] for i in configs[element_name][:, column]]
+
     """
     empty dataframes
     """
@@ -243,6 +257,7 @@ def from_pypower(pypower_case_name: str, extra_config_path: str):
     with pd.ExcelWriter(f"configs/{pypower_case_name}.xlsx", engine='xlsxwriter') as writer:
         for element_name, element_df in data_frame.items():
             element_df.to_excel(writer, sheet_name=element_name, index=False)
+    write_grid_binary(f"configs/{pypower_case_name}.xlsx")
     
     no_load = len(data_frame["load"])
     no_solar = len(data_frame["solar"]) if with_solar else 0
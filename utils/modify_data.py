@@ -5,21 +5,32 @@ also rescale the load, solar, and wind data to the default scale
 
 import pandas as pd
 import numpy as np
+import cvxpy as cp
 import os
 import random
 import shutil
 import sys
 sys.path.append('.')
+from operation import Operation, write_grid_binary
+from operation.power_operation import STANDARD_SOLVERS, load_standard_form
+from operation.profiling import PROFILE, init_worker_profiling, call_with_stats
 from utils import from_pypower, return_compiler, return_standard_form
-from tqdm import trange
+from utils.data_store import write_data_store, read_data_store, read_data_csv
+from utils.data_windows import DataWindows
+from utils.standard_solver import StandardFormSolver
+from utils.screening import screen_windows, screening_summary
+from utils.group_data import write_grouped_index, read_grouped_index
+from tqdm import tqdm
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pprint import pprint
 
-def assign_data(xlsx_dir, save_dir, seed, force_new = False):
+def assign_data(xlsx_dir, save_dir, seed, force_new = False, export_csv = True):
     """
     xlsx_dir: the path to the configuration file in xlsx format (generated from utils.loading.py)
     save_dir: the directory to save the assigned data
     seed: the random seed
     force_new: if True, the function will assign new data even if the directory exists
+    export_csv: if False, only the binary store (utils.data_store) is written without the data_{i}.csv files
     """
     
     print("========== Assign bus data to load and rescale ==========")
@@ -38,120 +49,121 @@ def assign_data(xlsx_dir, save_dir, seed, force_new = False):
     
     load_config = all_sheets['load']
     no_load = len(load_config)
-    data_all = {key: [] for key in range(1, no_load + 1)}
 
     data_grouped_dir = 'data/data_grouped'
-    file_name = os.listdir(data_grouped_dir)
+    # the index and the binary copy of the bus files, written from the bus files if missing
+    grouped = read_grouped_index(data_grouped_dir)
+    if grouped is None:
+        write_grouped_index(data_grouped_dir)
+        grouped = read_grouped_index(data_grouped_dir)
+    index, series = grouped
+    position = {name: j for j, name in enumerate(index['file_name'])}
+    columns = index['columns']
+    
+    # go through the bus data files in the order of os.listdir
+    file_name = [name for name in os.listdir(data_grouped_dir) if '.csv' in name]
     assigned_name = []
+    # load idx: (the bus data file, the renewable to rescale and its default value)
+    assignment = {}
 
-    # assign solar
-    if 'solar' in all_sheets.keys():
-        solar_config = all_sheets['solar']
-        for i in range(len(solar_config)):
-            # find the corresponding load index of the solar bus
-            # it is assumed that the solar bus can only locate at the load bus
-            bus_idx = solar_config['idx'][i]
-            load_idx = load_config[load_config['idx'] == bus_idx].index.values[0] + 1
-            for name in file_name:
-                # go through the bus data files until the bus data contains solar has been found
-                if '.csv' in name and name not in assigned_name:
-                    data = pd.read_csv(os.path.join(data_grouped_dir, name))
-                    if np.sum(data['Solar']) > 0: # the bus data contains solar
-                        # the bus data does not have solar if the sum of solar is 0
-                        assigned_name.append(name)
-                        # rescale load
-                        max_load = np.max(data['Load'])
-                        default_load = load_config['default'][load_idx - 1]
-                        data['Load'] = data['Load'] * default_load / max_load
-                        # rescale solar
-                        max_solar = np.max(data['Solar'])
-                        default_solar = solar_config['default'][i]
-                        data['Solar'] = data['Solar'] * default_solar / max_solar
-                        data_all[load_idx] = data
-                        break
-    
-    if 'wind' in all_sheets.keys():
-        wind_config = pd.read_excel(xlsx_dir, sheet_name='wind', engine='openpyxl')
-        for i in range(len(wind_config)):
-            bus_idx = wind_config['idx'][i]
-            load_idx = load_config[load_config['idx'] == bus_idx].index.values[0] + 1 # the corresponding load index of the wind bus
-            for name in file_name:
-                if '.csv' in name and name not in assigned_name:
-                    data = pd.read_csv(os.path.join(data_grouped_dir, name))
-                    if np.sum(data['Wind']) > 0: # the data contains wind
-                        assigned_name.append(name)
-                        # rescale load
-                        max_load = np.max(data['Load'])
-                        default_load = load_config['default'][load_idx - 1]
-                        data['Load'] = data['Load'] * default_load / max_load
-                        # recale wind
-                        max_wind = np.max(data['Wind'])
-                        default_wind = wind_config['default'][i]
-                        data['Wind'] = data['Wind'] * default_wind / max_wind
-                        data_all[load_idx] = data
-                        break
+    # assign solar and wind
+    # it is assumed that the solar (wind) bus can only locate at the load bus
+    for kind in ['solar', 'wind']:
+        if kind not in all_sheets.keys():
+            continue
+        config = all_sheets[kind]
+        # the bus data does not have solar (wind) if the sum of solar (wind) is 0
+        candidate = iter([name for name in file_name if index[f'has_{kind}'][position[name]] and name not in assigned_name])
+        for i in range(len(config)):
+            # the corresponding load index of the solar (wind) bus
+            load_idx = load_config[load_config['idx'] == config['idx'][i]].index.values[0] + 1
+            name = next(candidate, None)
+            if name is not None:
+                assigned_name.append(name)
+                assignment[load_idx] = (name, kind, config['default'][i])
     
     # for the remaining load
     # randomly choose
-    remaining_file_name = [name for name in file_name if name not in assigned_name and '.csv' in name]
+    remaining_file_name = [name for name in file_name if name not in assigned_name]
     remaining_file_name = np.random.choice(remaining_file_name, no_load - len(assigned_name), replace=False)
 
     idx = 0
     for i in range(1, no_load + 1):
-        if len(data_all[i]) == 0: # the load has not been assigned
-            name = remaining_file_name[idx]
-            data = pd.read_csv(os.path.join(data_grouped_dir, name))
-            # rescale load
-            max_load = np.max(data['Load'])
-            default_load = load_config['default'][i - 1]
-            data['Load'] = data['Load'] * default_load / max_load
-            data['Solar'] = 0     # pure load bus
-            data['Wind'] = 0
-            data_all[i] = data
-            assigned_name.append(name)
+        if i not in assignment: # the load has not been assigned
+            assignment[i] = (remaining_file_name[idx], None, 0)     # pure load bus
+            assigned_name.append(remaining_file_name[idx])
             idx += 1
     
+    # rescale all the loads at once (a copy of the binary data)
+    file_idx = np.array([position[assignment[i][0]] for i in range(1, no_load + 1)])
+    value_all = series[file_idx]
+    load_col = columns.index('Load')
+    default_load = load_config['default'].values[:no_load].astype(float)
+    value_all[:, :, load_col] = value_all[:, :, load_col] * default_load[:, None] / np.array(index['max_load'])[file_idx][:, None]
+    for kind in ['solar', 'wind']:
+        col = columns.index(kind.capitalize())
+        is_kind = np.array([assignment[i][1] == kind for i in range(1, no_load + 1)])
+        default_kind = np.array([float(assignment[i][2]) for i in range(1, no_load + 1)])[is_kind]
+        value_all[is_kind, :, col] = value_all[is_kind, :, col] * default_kind[:, None] / np.array(index[f'max_{kind}'])[file_idx[is_kind]][:, None]
+    
+    data_all = {}
+    for i in range(1, no_load + 1):
+        data = pd.DataFrame(value_all[i - 1], columns = columns)
+        # the columns that are not rescaled keep the integer type of the bus data file
+        int_columns = [column for column in index['int_columns'][file_idx[i - 1]] 
+                    if column != 'Load' and column.lower() != assignment[i][1]]
+        data[int_columns] = data[int_columns].astype(np.int64)
+        if assignment[i][1] is None:
+            data['Solar'] = 0
+            data['Wind'] = 0
+        data_all[i] = data
+    
     # save the data  
     if os.path.exists(save_dir):
         shutil.rmtree(save_dir)
     
     os.makedirs(save_dir)
     
-    for i in range(1, no_load + 1):
-        data_all[i].to_csv(os.path.join(save_dir, f'data_{i}.csv'), index=False)
+    if export_csv:
+        for i in range(1, no_load + 1):
+            data_all[i].to_csv(os.path.join(save_dir, f'data_{i}.csv'), index=False)
+    
+    # the binary store for get_data, the csv files are kept as the export
+    write_data_store(save_dir, [data_all[i] for i in range(1, no_load + 1)], all_sheets['basic']['baseMVA'].values[0])
 
 def get_data(no_load, data_folder, grid_op):
-    """return trh scaled version data"""
-    load_all, solar_all, wind_all = [], [], []
-
-    for i in range(1, no_load + 1):
+    """return trh scaled version data
+    the binary store of the data folder (utils.data_store) is memory-mapped (read-only) if it is up to date,
+    otherwise the csv files are read and the store is written"""
+    
+    store = read_data_store(data_folder, no_load)
+    if store is None:
         # ! the index of the file name starts from 1 and the sequence is the same to the config file
-        data = pd.read_csv(os.path.join(data_folder, f'data_{i}.csv'))
-        load_all.append(data['Load'].values)
-        if np.sum(data['Solar']) > 0:
-            solar_all.append(data['Solar'].values)
-        if np.sum(data['Wind']) > 0:
-            wind_all.append(data['Wind'].values)
-
-    load_all = np.array(load_all).T / grid_op.baseMVA
-    if len(solar_all) == 0:
-        solar_all = None
-    else:
-        solar_all = np.array(solar_all).T / grid_op.baseMVA
-    if len(wind_all) == 0:
-        wind_all = None
-    else:
-        wind_all = np.array(wind_all).T / grid_op.baseMVA
+        write_data_store(data_folder, read_data_csv(data_folder, no_load), grid_op.baseMVA)
+        store = read_data_store(data_folder, no_load)
+    
+    load_all, solar_all, wind_all = store['load'], store['solar'], store['wind']
+    if store['meta']['baseMVA'] != grid_op.baseMVA:
+        scale = store['meta']['baseMVA'] / grid_op.baseMVA
+        load_all = load_all * scale
+        solar_all = solar_all * scale if solar_all is not None else None
+        wind_all = wind_all * scale if wind_all is not None else None
 
     return load_all, solar_all, wind_all
 
 def modify_pfmax(grid_op, with_int, T, data_folder, min_pfmax, scale_factor, xlsx_dir,
-                force_new = False):
+                force_new = False, solver = 'GUROBI', warm_start = False, n_workers = None, chunk_size = None,
+                compiled_dir = None):
     """
     reduce the maximum branch limits (so that the grid optimization is not trivially solved)
     grid_op: the grid operation class
     data_folder: the folder that contains the data
     min_pfmax: the minimum branch flow limits
+    warm_start: if True, each window starts from the solution of the previous window shifted by one step
+        (the first window of each chunk starts cold)
+    n_workers: the number of processes, default to the number of cpus. solve in the current process if 1
+    chunk_size: the number of consecutive windows solved by a worker at once
+    compiled_dir: if given, the workers solve the compiled standard form loaded from this directory, see sweep_pfmax
     """
 
     print("==========modify the maximum branch limits==========")
@@ -165,62 +177,36 @@ def modify_pfmax(grid_op, with_int, T, data_folder, min_pfmax, scale_factor, xls
     grid_op.pfmax = np.ones(grid_op.no_branch) * np.max(grid_op.pgmax) * 2
     print('initial pf max:', grid_op.pfmax)
     
-    prob, _ = grid_op.get_opt(with_int)
-    
     load_all, solar_all, wind_all = get_data(no_load, data_folder, grid_op)
     no_sample = load_all.shape[0]
     # no_sample = 2000
-    pf_summary = []
-    infeasible_indicator = 0
+    no_window = no_sample - T + 1
     
-    load_level_summary = []
+    # pre-screen all the windows before solving: the capacity with the reserve and the pgmin floors, and the ramps
+    mask, report = screen_windows(grid_op, load_all, solar_all, wind_all, T, with_int = with_int)
+    print(screening_summary(report))
+    assert np.all(mask), "the load shedding is certain (or the ncuc is infeasible) in some windows, please consider reduce the max_default_ratio of the load"
     
-    for i in trange(no_sample - T + 1, desc='solve the grid'):
-        
-        # ! vectorized formulation of the parameter
-        params_val_dict = {
-            "load": load_all[i:i + T].flatten(),  
-        }
-        total_load = np.sum(load_all[i:i + T], axis=1)
-        
-        total_gen = np.sum(grid_op.pgmax)
-        if solar_all is not None:
-            params_val_dict['solar'] = solar_all[i:i + T].flatten()
-            total_gen += np.sum(solar_all[i:i + T], axis=1)
-        if wind_all is not None:
-            params_val_dict['wind'] = wind_all[i:i + T].flatten()
-            total_gen += np.sum(wind_all[i:i + T], axis=1)
-        
-        assert np.all(total_load <= total_gen), "the total load is larger than the total generation, please consider reduce the max_default_ratio of the load"
-        
-        load_level = np.max(total_load / total_gen)
-        load_level_summary.append(load_level)
-        
-        grid_op.solve(prob, params_val_dict)
-        
-        optimal_sol = grid_op.get_sol(prob, T = T, reshaped = True)
-        
-        ls, solarc, windc = optimal_sol['ls'], optimal_sol['solarc'], optimal_sol['windc']
-        theta = optimal_sol['theta']
-
-        ls_indicator, solarc_indicator, windc_indicator = np.sum(ls), np.sum(solarc), np.sum(windc)
-        indicator = ls_indicator + solarc_indicator + windc_indicator
-        if not np.isclose(indicator, 0, atol = 1e-6):
-            infeasible_indicator += 1
-            # pprint(optimal_sol)
-            print(f"ls: {ls_indicator}, solar: {solarc_indicator}, wind: {windc_indicator}")
-            print(f"ls: {ls}")
-            print(f"total load: {np.sum(load_all[i:i + T], axis=1)}")
-            print(f"maximum generator: {np.sum(grid_op.pgmax)}")
-            assert False, "infeasible solution meets, please try to increase the penalization of the cls."
-
-        pf = grid_op.get_pf(theta) # a summary of the power flow
-        pf_summary.append(pf)
+    # the load level of all the windows at once: the maximum ratio of the total load to the total generation in the window
+    total_load = np.sum(load_all, axis=1)
+    total_gen = np.full(no_sample, np.sum(grid_op.pgmax))
+    if solar_all is not None:
+        total_gen += np.sum(solar_all, axis=1)
+    if wind_all is not None:
+        total_gen += np.sum(wind_all, axis=1)
+    load_level_summary = DataWindows((total_load / total_gen)[:, None], None, None, T).windows['load'].max(axis=1)
+    
+    pf_max, infeasible = sweep_pfmax(grid_op, with_int, T, data_folder, no_window, solver = solver, warm_start = warm_start,
+                                    n_workers = n_workers, chunk_size = chunk_size,
+                                    compiled_dir = compiled_dir)
 
-    print("infeasible rate:", infeasible_indicator / (no_sample - T + 1))
+    print("infeasible rate:", len(infeasible) / no_window)
+    if len(infeasible) > 0:
+        for i, status, ls_indicator, solarc_indicator, windc_indicator in infeasible:
+            print(f"window {i}: {status}, ls: {ls_indicator}, solar: {solarc_indicator}, wind: {windc_indicator}")
+        print(f"maximum generator: {np.sum(grid_op.pgmax)}")
+        assert False, "infeasible solution meets, please try to increase the penalization of the cls."
 
-    pf_summary = np.concatenate(pf_summary, axis=0)
-    pf_max = np.max(np.abs(pf_summary), axis=0)
     print('max pf:', pf_max)
     print('max load penetration:', np.max(load_level_summary))
 
@@ -231,4 +217,121 @@ def modify_pfmax(grid_op, with_int, T, data_folder, min_pfmax, scale_factor, xls
     # save
     with pd.ExcelWriter(xlsx_dir, engine='xlsxwriter') as writer:
         for element_name, element_df in config.items():
-            element_df.to_excel(writer, sheet_name=element_name, index=False)
\ No newline at end of file
+            element_df.to_excel(writer, sheet_name=element_name, index=False)
+    write_grid_binary(xlsx_dir)
+
+def sweep_pfmax(grid_op, with_int, T, data_folder, no_window, solver = 'GUROBI', warm_start = False, 
+                n_workers = None, chunk_size = None, compiled_dir = None):
+    """
+    solve the uc of the first no_window windows of the data with the current grid_op.pfmax
+    the consecutive windows are solved in chunks over a process pool, see modify_pfmax
+    compiled_dir: if given, the uc with the parametric pfmax is compiled once (utils.problem_cache.load_compiled) 
+        and the workers load it from this directory and solve it by StandardFormSolver instead of building the 
+        cvxpy problem. Only for the solvers in STANDARD_SOLVERS and the phase angle formulation, 
+        warm_start is not used (OSQP starts from the solution of the previous window)
+    return:
+        - pf_max: (no_branch,) the maximum |pf| of the branches over the solved windows
+        - infeasible: [(window, status, ls, solarc, windc), ...] of the windows with load shedding or curtailment,
+            and of the windows that are not solved (the indicators are nan)
+    """
+    
+    n_workers = os.cpu_count() if n_workers is None else n_workers
+    if chunk_size is None:
+        # a few chunks per worker to balance the load
+        chunk_size = max(1, int(np.ceil(no_window / (4 * n_workers))))
+    chunks = [(start, min(start + chunk_size, no_window)) for start in range(0, no_window, chunk_size)]
+    initargs = (grid_op.init_args, grid_op.pfmax, with_int, T, data_folder, solver, compiled_dir)
+    if compiled_dir is not None:
+        if solver.upper() not in STANDARD_SOLVERS:
+            raise ValueError(f"the compiled problem is solved by {STANDARD_SOLVERS}, got {solver}")
+        if grid_op.init_args['formulation'] != 'angle':
+            raise ValueError("the compiled problem has no phase angle for the branch flows of the ptdf formulation")
+        # compile (or load) once here so that the workers only read the cache
+        load_standard_form(_pfmax_init_args(grid_op.init_args), with_int, 'uc', compiled_dir, solver)
+    
+    if n_workers == 1:
+        _init_pfmax_worker(*initargs)
+        results = [_pfmax_chunk(start, stop, solver, warm_start) for start, stop in tqdm(chunks, desc='solve the grid')]
+    else:
+        with ProcessPoolExecutor(max_workers = n_workers, initializer = init_worker_profiling, 
+                                initargs = (PROFILE.enabled, _init_pfmax_worker, *initargs)) as executor:
+            futures = [executor.submit(call_with_stats, _pfmax_chunk, start, stop, solver, warm_start) for start, stop in chunks]
+            for _ in tqdm(as_completed(futures), total = len(futures), desc='solve the grid'):
+                pass
+            results = [future.result() for future in futures]
+        # the phases recorded in the workers
+        for _, stats in results:
+            PROFILE.merge(stats)
+        results = [result for result, _ in results]
+    
+    # merge the chunks
+    pf_max = np.max([result['pf_max'] for result in results], axis=0)
+    infeasible = [sample for result in results for sample in result['infeasible']]
+    
+    return pf_max, infeasible
+
+"""
+worker functions of modify_pfmax
+the problem and the windows of the data are built once per process and kept in the module globals
+"""
+
+_pfmax_worker = None
+
+def _pfmax_init_args(init_args):
+    """the arguments of the compiled uc, the branch limits are the parameter 'pfmax'"""
+    return {**init_args, 'parametric': tuple(init_args['parametric']) + 
+            (('pfmax',) if 'pfmax' not in init_args['parametric'] else ())}
+
+def _init_pfmax_worker(init_args, pfmax, with_int, T, data_folder, solver, compiled_dir = None):
+    global _pfmax_worker
+    grid_op = Operation(**init_args)
+    grid_op.pfmax = pfmax
+    load_all, solar_all, wind_all = get_data(grid_op.no_load, data_folder, grid_op)
+    windows = DataWindows(load_all, solar_all, wind_all, T)
+    if compiled_dir is not None:
+        stand = StandardFormSolver(load_standard_form(_pfmax_init_args(init_args), with_int, 'uc', compiled_dir, solver), solver)
+        _pfmax_worker = (grid_op, stand, windows)
+        return
+    prob = grid_op.get_opt(with_int, 'uc')
+    # the first solve compiles the problem, solve the first window (as the serial sweep does) so that
+    # all the windows are solved through the cached compilation and the results do not depend on the chunks
+    grid_op.solve(prob, windows[0], solver = solver)
+    _pfmax_worker = (grid_op, prob, windows)
+
+def _pfmax_chunk(start, stop, solver, warm_start):
+    """
+    solve the windows start, ..., stop - 1 and reduce them to the running maximum |pf| of the branches
+    return: {'pf_max': (no_branch,) array, 'infeasible': [(window, status, ls, solarc, windc), ...]}
+    the windows that are not solved are in infeasible with nan indicators and do not count in pf_max
+    """
+    
+    grid_op, prob, windows = _pfmax_worker
+    pf_max = np.zeros(grid_op.no_branch)
+    infeasible = []
+    warm_start_sol = None
+    
+    for i in range(start, stop):
+        if isinstance(prob, StandardFormSolver):
+            optimal_sol, status, _ = prob.solve({**windows[i], 'pfmax': grid_op.pfmax}, T = windows.T, reshaped = True)
+        else:
+            grid_op.solve(prob, windows[i], solver = solver, warm_start = warm_start_sol)
+            status = prob.status
+        if status not in [cp.OPTIMAL, cp.OPTIMAL_INACCURATE]:
+            infeasible.append((i, status, np.nan, np.nan, np.nan))
+            warm_start_sol = None
+            continue
+        if not isinstance(prob, StandardFormSolver):
+            if warm_start:
+                # window i + 1 overlaps window i in T - 1 steps
+                warm_start_sol = grid_op.shift_solution(prob)
+            optimal_sol = grid_op.get_sol(prob, T = windows.T, reshaped = True)
+        
+        ls_indicator, solarc_indicator, windc_indicator = np.sum(optimal_sol['ls']), np.sum(optimal_sol['solarc']), np.sum(optimal_sol['windc'])
+        indicator = ls_indicator + solarc_indicator + windc_indicator
+        if not np.isclose(indicator, 0, atol = 1e-6):
+            infeasible.append((i, status, ls_indicator, solarc_indicator, windc_indicator))
+        
+        pf = grid_op.get_pf(optimal_sol['theta']) # a summary of the power flow
+        np.maximum(pf_max, np.max(np.abs(pf), axis=0), out = pf_max)
+    
+    return {'pf_max': pf_max, 'infeasible': infeasible}
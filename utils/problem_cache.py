@@ -0,0 +1,98 @@
+"""
+persistent on-disk cache of the compiled (standard form) UC/ED problems
+so that a new process does not need to build and canonicalize the cvxpy problem again
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import numpy as np
+import cvxpy as cp
+from operation import Operation, PowerGrid
+from operation.power_operation import FORMULATION_VERSION, FORMULATION_METHODS
+from operation.grid_io import file_hash
+from .standard_from import return_standard_form_no_value, return_q_map, return_bool_idx, return_var_idx
+
+@functools.lru_cache(maxsize = None)
+def formulation_hash():
+    """
+    hash of the source of the methods that build the problems (FORMULATION_METHODS) and of PowerGrid,
+    so that a change of the formulations misses the cache even if FORMULATION_VERSION is not bumped
+    computed once per process
+    """
+    source = [inspect.getsource(PowerGrid)] + [inspect.getsource(getattr(Operation, name)) for name in FORMULATION_METHODS]
+    return hashlib.sha256('\n'.join(source).encode()).hexdigest()
+
+def problem_key(xlsx_path, T, with_int, reserve, pg_init_ratio, ug_init, prob_kind, **options):
+    """
+    the key of a compiled problem: content hash of the xlsx config, 
+    the operation settings, the initial conditions, and the other options (e.g. solver, vectorize),
+    together with the version (and the source, see formulation_hash) of the formulations and the version of cvxpy 
+    that produce the standard form
+    """
+    content = {
+        'formulation_version': FORMULATION_VERSION,
+        'formulation_source': formulation_hash(),
+        'cvxpy_version': cp.__version__,
+        'xlsx': file_hash(xlsx_path),
+        'T': T,
+        'with_int': bool(with_int),
+        'reserve': np.asarray(reserve, dtype = float).tolist(),
+        'pg_init_ratio': None if pg_init_ratio is None else np.asarray(pg_init_ratio, dtype = float).tolist(),
+        'ug_init': None if ug_init is None else np.asarray(ug_init, dtype = float).tolist(),
+        'prob_kind': prob_kind,
+        **options
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys = True).encode()).hexdigest()
+
+def compile_problem(prob, solver = 'GUROBI'):
+    """
+    the parametric standard form of a cvxpy problem as a dictionary
+    P, q, A, G, b, h: the standard form matrices and vectors
+    B, H: {param_name: matrix}, the parameter-to-column maps of the equality and inequality
+    Q: {param_name: matrix}, the parameter-to-column map of the linear cost (empty if q is constant)
+    defaults: {param_name: value}, the default values of the parameters, see Operation.default_parameters
+    bool_idx: the index of the boolean variables in x
+    var_idx: {var_name: (start_idx, size)}, the location of the cvxpy variables in x
+    """
+    P, q, A, G, b, h, B, H = return_standard_form_no_value(prob, solver = solver)
+    
+    return {
+        'P': P, 'q': q, 'A': A, 'G': G, 'b': b, 'h': h, 'B': B, 'H': H,
+        'Q': return_q_map(prob, solver),
+        'defaults': Operation.default_parameters(prob),
+        'bool_idx': return_bool_idx(prob, solver),
+        'var_idx': return_var_idx(prob, solver)
+    }
+
+def load_compiled(xlsx_path, T, with_int, reserve, pg_init_ratio = None, ug_init = None, prob_kind = 'uc',
+                cache_dir = 'data/compiled', solver = 'GUROBI', **grid_kwargs):
+    """
+    return the compiled standard form (see compile_problem) of the requested problem
+    only the requested problem (uc or ed) is built and compiled when it is not found in the cache
+    grid_kwargs: other keyword arguments of Operation, e.g. sparse and vectorize
+    the compiled problem is meant for StandardFormSolver in a new process, 
+    e.g. the workers of Operation.solve_batch and modify_pfmax with compiled_dir
+    """
+    key = problem_key(xlsx_path, T, with_int, reserve, pg_init_ratio, ug_init, prob_kind,
+                    solver = solver.upper(), **grid_kwargs)
+    path = os.path.join(cache_dir, f'{prob_kind}_{key}.pkl')
+    
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    
+    grid_op = Operation(xlsx_path, T, reserve, pg_init_ratio, ug_init, **grid_kwargs)
+    compiled = compile_problem(grid_op.get_opt(with_int, prob_kind), solver)
+    
+    # ! write to a temporary file first so that concurrent workers never read a partial file
+    os.makedirs(cache_dir, exist_ok = True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(compiled, f, protocol = pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    
+    return compiled
@@ -0,0 +1,22 @@
+"""
+random parameters of the operation problems around the default load and renewables, for the tests and benchmarks
+"""
+
+import numpy as np
+
+def random_params(grid_op, rng, no_sample = None):
+    """
+    the load (0.5 to 1 of the default) and the solar and wind (0 to 1 of the default) over the T steps of grid_op
+    rng: a numpy random generator, e.g. np.random.default_rng(0)
+    no_sample: the values of one sample if None, otherwise stacked as (no_sample, T * n) arrays for solve_batch
+    return: {'load': ..., 'solar': ..., 'wind': ...}, without solar or wind if the grid has none
+    """
+    T = grid_op.T
+    shape = lambda n: T * n if no_sample is None else (no_sample, T * n)
+
+    params = {'load': np.tile(grid_op.load_default, T) * rng.uniform(0.5, 1.0, shape(grid_op.no_load))}
+    if grid_op.no_solar > 0:
+        params['solar'] = np.tile(grid_op.solar_default, T) * rng.uniform(0, 1, shape(grid_op.no_solar))
+    if grid_op.no_wind > 0:
+        params['wind'] = np.tile(grid_op.wind_default, T) * rng.uniform(0, 1, shape(grid_op.no_wind))
+    return params
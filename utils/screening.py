@@ -0,0 +1,104 @@
+"""
+pre-screen the windows of the data before any optimization
+the checks are on the aggregated generation of the ncuc, all the windows at once:
+    g_t = sum(pg_t) must meet the load net of the renewables, L_t - R_t <= g_t <= L_t (the renewables can be curtailed),
+    within pmin <= g_t <= sum(pgmax) - reserve_t, and the ramps g_t - g_{t-1} in [-sum(rd), sum(ru)] (from pg_init)
+the aggregated conditions are necessary: a flagged window certainly sheds load (or is infeasible),
+while a window that passes may still shed load because of the per-unit and the network limits
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# the checks of screen_windows, the first ones mean the load shedding is certain and the others infeasible ncuc
+SHED_CHECKS = ('capacity', 'ramp_up')
+INFEASIBLE_CHECKS = ('reserve', 'min_generation', 'ramp_down')
+
+def screen_windows(grid_op, load_all, solar_all = None, wind_all = None, T = None, with_int = False, pg_init = None,
+                    tol = 1e-6):
+    """
+    grid_op: the operation, for pgmax, pgmin, ru, rd (rsu, rsd) and reserve
+    load_all, solar_all, wind_all: (no_sample, no_load), ... arrays in p.u., e.g. from get_data
+    T: the length of the windows, default to grid_op.T
+    with_int: the units can be off, the pgmin floors are dropped and the start-up and shut-down ramps are allowed
+    pg_init: the initial pg of the ramp, default to grid_op.pg_init (the ramp is from the first step if None)
+    return:
+        - mask: (no_window,) bool array, True for the windows that pass all the checks
+        - report: {check: (no_window,) bool array of the flagged windows} for the checks
+            'capacity': the load net of the renewables is above sum(pgmax) - reserve at a step
+            'ramp_up': the generation can not ramp up to the net load
+            'reserve': the reserve leaves less than the pgmin floors at a step
+            'min_generation': the pgmin floors are above the load at a step (the ncuc can not spill)
+            'ramp_down': the generation can not ramp down to the load
+        and 'load_shed_certain', 'infeasible' (the union of the checks), 'shortfall' (the lower bound of the
+        load shedding (p.u.) at the worst step, from the capacity) and 'no_window'
+    """
+
+    T = grid_op.T if T is None else T
+    reserve = np.broadcast_to(np.asarray(grid_op.reserve, dtype = float), (T,))
+    pmax = np.sum(grid_op.pgmax)
+    pmin = 0.0 if with_int else np.sum(grid_op.pgmin)
+    if with_int:
+        ramp_up = np.sum(np.maximum(grid_op.ru, grid_op.rsu))
+        ramp_down = np.sum(np.maximum(grid_op.rd, grid_op.rsd))
+    else:
+        ramp_up, ramp_down = np.sum(grid_op.ru), np.sum(grid_op.rd)
+
+    # (no_window, T) views of the totals of the steps
+    renewable = np.zeros(len(load_all))
+    for data in [solar_all, wind_all]:
+        if data is not None:
+            renewable += np.sum(data, axis = 1)
+    load = sliding_window_view(np.sum(load_all, axis = 1), T)
+    renewable = sliding_window_view(renewable, T)
+    no_window = len(load)
+
+    upper = pmax - reserve                                  # the generation left by the reserve
+    lower = np.maximum(pmin, load - renewable)              # the generation without load shedding
+    higher = np.minimum(upper, load)                        # the generation without spilling
+
+    report = {
+        'capacity': np.any(load - renewable > upper + tol, axis = 1),
+        'reserve': np.broadcast_to(np.any(pmin > upper + tol), (no_window,)).copy(),
+        'min_generation': np.any(pmin > load + tol, axis = 1),
+        'ramp_up': np.zeros(no_window, dtype = bool),
+        'ramp_down': np.zeros(no_window, dtype = bool),
+    }
+    report['shortfall'] = np.maximum(np.max(load - renewable - upper, axis = 1), 0)
+
+    if T > 1:
+        # propagate the reachable interval [a, b] of the generation over the steps
+        pg_init = getattr(grid_op, 'pg_init', None) if pg_init is None else pg_init
+        if pg_init is not None:
+            a = b = np.full(no_window, np.sum(pg_init))
+        else:
+            a, b = np.full(no_window, -np.inf), np.full(no_window, np.inf)
+        for t in range(T):
+            reach_a, reach_b = a - ramp_down, b + ramp_up
+            step_ok = lower[:, t] <= higher[:, t] + tol   # the other checks flag the infeasible steps
+            report['ramp_up'] |= step_ok & (reach_b < lower[:, t] - tol)
+            report['ramp_down'] |= step_ok & (reach_a > higher[:, t] + tol)
+            a, b = np.maximum(lower[:, t], reach_a), np.minimum(higher[:, t], reach_b)
+            # when the step is not met, continue from the reachable generation within the limits
+            empty = a > b
+            a = np.where(empty, np.clip(reach_a, pmin, upper[t]), a)
+            b = np.where(empty, np.clip(reach_b, pmin, upper[t]), b)
+
+    report['load_shed_certain'] = np.any([report[check] for check in SHED_CHECKS], axis = 0)
+    report['infeasible'] = np.any([report[check] for check in INFEASIBLE_CHECKS], axis = 0)
+    report['no_window'] = no_window
+    mask = ~(report['load_shed_certain'] | report['infeasible'])
+
+    return mask, report
+
+def screening_summary(report, max_window = 10):
+    """the number of the flagged windows of each check and the first flagged windows"""
+    lines = [f"{report['no_window']} windows, {np.sum(report['load_shed_certain'] | report['infeasible'])} flagged"]
+    for check in SHED_CHECKS + INFEASIBLE_CHECKS:
+        flagged = np.flatnonzero(report[check])
+        if len(flagged) > 0:
+            more = ', ...' if len(flagged) > max_window else ''
+            lines.append(f"{check}: {len(flagged)} windows, e.g. {', '.join(str(i) for i in flagged[:max_window])}{more}")
+    if np.any(report['capacity']):
+        lines.append(f"maximum shortfall: {np.max(report['shortfall']):.4f} p.u.")
+    return "\n".join(lines)
@@ -2,12 +2,17 @@
 return the standard form of the operation problem as QP or LP
 """
 
+import numpy as np
+import scipy.sparse as sp
 import cvxpy as cp
 from cvxpy.reductions.solvers.conic_solvers.scs_conif import dims_to_solver_dict
+from operation import Operation
+from operation.profiling import timed
 
-def return_compiler(prob):
+def return_compiler(prob, solver = 'GUROBI'):
     """
     return the compiler of the problem given by cvxpy
+    solver: the solver used to canonicalize the problem, must accept QP (e.g. GUROBI, or OSQP, CLARABEL without integer)
     return:
         - compiler: the compiler of the problem in standard form
         - params_idx: {param_id: param_name}, link the id to the parameter name
@@ -15,10 +20,30 @@ def return_compiler(prob):
                                         (always be the first rows in the matrix)
         - int_vars_idx: the index of integer variables
         - bool_vars_idx: the index of boolean variables
+    the result is cached on the problem (prob._compiler_cache) for each solver, 
+    so that the repeated calls only cost a dictionary lookup
+    """
+    
+    cache = prob.__dict__.setdefault('_compiler_cache', {})
+    if solver.upper() not in cache:
+        cache[solver.upper()] = _compile(prob, solver)
+    
+    return cache[solver.upper()]
+
+def clear_compiler_cache(prob):
+    """
+    remove the cached compilers of the problem, e.g. after the problem is modified in place
+    """
+    prob.__dict__.pop('_compiler_cache', None)
+
+@timed('standard_form.compile')
+def _compile(prob, solver):
+    """
+    canonicalize the problem by cvxpy, see return_compiler
     """
 
     data, _, _ = prob.get_problem_data(
-                solver=cp.GUROBI, solver_opts={'use_quad_obj': True})  
+                solver=getattr(cp, solver.upper()), solver_opts={'use_quad_obj': True})  
     # ! set True can force the objective to be quadrtic
 
     assert data['dims'].exp == 0, 'does not support cone'
@@ -31,64 +56,94 @@ def return_compiler(prob):
     # ! the order of parameter idx is changed internally in cvxpy so we link the id to the name
     params_idx = {p.id: p.name() for p in prob.parameters()}  
 
-    return param_qp_prog, params_idx, data['dims'].zero, data['int_vars_idx'], data['bool_vars_idx']
+    # ! the conic solvers (e.g. CLARABEL, SCS) do not return the integer indices when they do not support them
+    return param_qp_prog, params_idx, data['dims'].zero, data.get('int_vars_idx', []), data.get('bool_vars_idx', [])
 
-def return_standard_form(prob, params_val_dict):
+@timed('standard_form.apply_parameters')
+def return_standard_form(prob, params_val_dict, solver = 'GUROBI'):
     """find the compiler first to save time
     prob: a cvxpy problem
     the order of params_val should be the same as the param_ids
+    the parameters not in params_val_dict take their current values (e.g. the defaults of Operation(..., parametric = ...))
     output[0]: P (with 1/2 being considered)
     output[1]: q
     output[2]: r
     output[3]: [eq_matrix; ineq_matrix]
-    output[4]: [eq_vec; ineq_vec]"""
+    output[4]: [eq_vec; ineq_vec]
+    P, A and G are returned as scipy.sparse csr matrices"""
 
-    param_qp_prog, params_idx, zero_dim, int_dim, bool_dim = return_compiler(prob)
-    params_val = {idx: params_val_dict[name] for idx, name in params_idx.items()}
+    param_qp_prog, params_idx, zero_dim, int_dim, bool_dim = return_compiler(prob, solver)
+    id_to_param = {p.id: p for p in prob.parameters()}
+    params_val = {idx: params_val_dict[name] if name in params_val_dict else id_to_param[idx].value 
+                for idx, name in params_idx.items()}
     
     output = param_qp_prog.apply_parameters(
                     params_val,
-                    keep_zeros=True)
+                    keep_zeros=True,
+                    quad_obj=True)
     
-    P = output[0].toarray()
+    P = sp.csr_matrix(output[0])
     q = output[1]
     r = output[2]
-    A = output[3].toarray()[:zero_dim]
+    A_tilde = sp.csr_matrix(output[3])
+    A = A_tilde[:zero_dim]
     b = -output[4][:zero_dim]
-    G = -output[3].toarray()[zero_dim:]
+    G = -A_tilde[zero_dim:]
     h = output[4][zero_dim:]
     
     return P, q, r, A, b, G, h
 
-def return_bool_idx(prob):
+def return_bool_idx(prob, solver = 'GUROBI'):
     """
     return the index of the boolean variables
     prob: a cvxpy problem
     """
-    data, _, _ = prob.get_problem_data(
-                solver=cp.GUROBI, solver_opts={'use_quad_obj': True})  
+    return return_compiler(prob, solver)[4]
+
+def return_var_idx(prob, solver = 'GUROBI'):
+    """
+    return the location of the cvxpy variables in the standard form decision variable x
+    var_idx: {var_name: (start_idx, size)}, so that x[start_idx:start_idx+size] is the variable
+    """
+    param_qp_prog = return_compiler(prob, solver)[0]
+    id_to_var = {v.id: v for v in prob.variables()}
     
-    return data['bool_vars_idx']
+    return {id_to_var[key].name(): (start_idx, id_to_var[key].size)
+            for key, start_idx in param_qp_prog.var_id_to_col.items()}
+
+def _unflatten_column(column, no_row, no_col):
+    """
+    reshape the flattened column of the parametric tensor (in Fortran order) to a sparse (no_row, no_col) matrix
+    """
+    column = column.tocoo()
+    return sp.csr_matrix(
+        (column.data, (column.row % no_row, column.row // no_row)), shape = (no_row, no_col)
+        )
 
-def return_standard_form_no_value(prob, as_tensor = False):
+@timed('standard_form.no_value')
+def return_standard_form_no_value(prob, as_tensor = False, solver = 'GUROBI', dense = False):
     """
     standard form of the QP problem without parameter value
     idx_to_name: {param_id: param_name}, link the id to the parameter name
+    the matrices P, A, G, B and H are extracted from the sparse parametric tensor of cvxpy and 
+    returned as scipy.sparse csr matrices, or as numpy arrays if dense = True
     """
 
     param_id_to_name = {p.id: p.name() for p in prob.parameters()}  # the idx to name dictionary
-    param_qp_prog, params_idx, zero_dim, int_dim, bool_dim = return_compiler(prob)
+    param_qp_prog, params_idx, zero_dim, int_dim, bool_dim = return_compiler(prob, solver)
 
     no_cons = param_qp_prog.constr_size
     no_var = param_qp_prog.reduced_A.var_len
+    
+    # ! the last column of the tensor is the constant part
+    P_tensor = sp.csc_matrix(param_qp_prog.P)
+    A_tensor = sp.csc_matrix(param_qp_prog.A)
 
-    P = param_qp_prog.P.toarray()[:,-1].reshape(no_var, no_var)
-    q = param_qp_prog.q.toarray()[:-1,-1]
-
-    A_tilde = param_qp_prog.A.toarray()[:int(no_cons * no_var), -1]
-    A_tilde = A_tilde.reshape(no_var, no_cons).T
+    P = _unflatten_column(P_tensor[:, -1], no_var, no_var)
+    q = np.asarray(param_qp_prog.q[:-1, -1].toarray()).flatten()
 
-    b_tilde = param_qp_prog.A.toarray()[int(no_cons * no_var):, -1]
+    A_tilde = _unflatten_column(A_tensor[:int(no_cons * no_var), -1], no_cons, no_var)
+    b_tilde = A_tensor[int(no_cons * no_var):, -1].toarray().flatten()
 
     A = A_tilde[:zero_dim,:]
     G = -A_tilde[zero_dim:,:]
@@ -96,7 +151,7 @@ def return_standard_form_no_value(prob, as_tensor = False):
     b = -b_tilde[:zero_dim]
     h = b_tilde[zero_dim:]
 
-    B_tilde = param_qp_prog.A.toarray()[int(no_cons * no_var):, :-1]
+    B_tilde = A_tensor[int(no_cons * no_var):, :-1].tocsr()
 
     # ! support multiple parameters
     B = {}
@@ -113,6 +168,11 @@ def return_standard_form_no_value(prob, as_tensor = False):
         B[name] = -B_tilde[:zero_dim, start_idx:start_idx+size]
         H[name] = B_tilde[zero_dim:, start_idx:start_idx+size] 
     
+    if dense:
+        P, A, G = P.toarray(), A.toarray(), G.toarray()
+        B = {key: value.toarray() for key, value in B.items()}
+        H = {key: value.toarray() for key, value in H.items()}
+    
     # find the matrix corresponding to the parameter in b
     # # ! only support single parameter
     # B = -B_tilde[:zero_dim, :]
@@ -131,18 +191,84 @@ def return_standard_form_no_value(prob, as_tensor = False):
 
     return P, q, A, G, b, h, B, H # NOTE: negative sign
 
-def return_standard_form_in_cvxpy(prob):
+@timed('standard_form.q_map')
+def return_q_map(prob, solver = 'GUROBI'):
+    """
+    the parametric part of the linear cost, q + \sum Q_i z_i
+    Q: {param_name: (no_var, param_size) csr matrix}, only the parameters in the objective 
+        (e.g. the costs of Operation(..., parametric = ['cost'])), empty if q is constant
+    """
+    param_id_to_name = {p.id: p.name() for p in prob.parameters()}
+    param_qp_prog = return_compiler(prob, solver)[0]
+    
+    # ! the last row of the tensor is the constant of the objective and the last column is the constant part
+    q_tensor = sp.csc_matrix(param_qp_prog.q)[:-1]
+    Q = {}
+    for key, start_idx in param_qp_prog.param_id_to_col.items():
+        if key == -1:
+            continue
+        column = q_tensor[:, start_idx:start_idx + param_qp_prog.param_id_to_size[key]]
+        if column.nnz > 0:
+            Q[param_id_to_name[key]] = column.tocsr()
+    
+    return Q
+
+@timed('standard_form.batch')
+def return_standard_form_batch(prob, params_val_batch, solver = 'GUROBI'):
+    """
+    standard form of the QP problem for a batch of parameter values
+    params_val_batch: {param_name: array of shape (N, param_size)}, e.g. load of shape (N, T * no_load)
+        the parameters of Operation(..., parametric = ...) not given take the defaults for all the samples
+    return:
+        - P, A, G: shared by all the samples, see return_standard_form_no_value
+        - q: shared by all the samples, or (N, no_var), q + \sum Q_i z_i for each sample if the cost is parametric
+        - b: (N, no_eq), b + \sum B_i z_i for each sample
+        - h: (N, no_ineq), h + \sum H_i z_i for each sample
+    the right-hand sides are evaluated by one sparse-dense product over the stacked parameters
+    """
+    
+    P, q, A, G, b, h, B, H = return_standard_form_no_value(prob, solver = solver)
+    Q = return_q_map(prob, solver)
+    
+    defaults = Operation.default_parameters(prob)
+    N = len(next(iter(params_val_batch.values())))
+    def stack(names):
+        """the stacked values (N, sum of param_size) of the parameters, the defaults tiled over the batch"""
+        return np.hstack([np.asarray(params_val_batch[name], dtype = float).reshape(N, -1) if name in params_val_batch else 
+                        np.tile(np.asarray(defaults[name], dtype = float).ravel(), (N, 1)) for name in names])
+    
+    # ! the parameters only in the cost (e.g. cv) have all-zero columns in B and H
+    names = [name for name in B.keys() if B[name].count_nonzero() + H[name].count_nonzero() > 0]
+    if names:
+        rhs_map = sp.vstack([sp.hstack([B[name] for name in names]), sp.hstack([H[name] for name in names])]).tocsr()
+        rhs = (rhs_map @ stack(names).T).T
+    else:
+        rhs = np.zeros((N, A.shape[0] + G.shape[0]))
+    
+    # ! add the constant parts in place, the batch can take hundreds of MB
+    b_batch, h_batch = rhs[:, :A.shape[0]], rhs[:, A.shape[0]:]
+    b_batch += b
+    h_batch += h
+    
+    if Q:
+        q = (sp.hstack(list(Q.values())).tocsr() @ stack(list(Q.keys())).T).T + q
+    
+    return P, q, A, G, b_batch, h_batch
+
+@timed('standard_form.in_cvxpy')
+def return_standard_form_in_cvxpy(prob, solver = 'GUROBI'):
     """
     return the standard form of the problem fommated as cvxpy
     standard form
-    min 1/2 x^T P x + q^T x
+    min 1/2 x^T P x + (q + \sum Q_i z_i)^T x
     s.t. A x = b + \sum B_i z_i
          G x <= h + \sum H_i z_i
     in which x is the decision variable, z_i is the i-th parameter
     """
     
-    P, q, A, G, b, h, B, H = return_standard_form_no_value(prob)
-    bool_idx = return_bool_idx(prob)
+    P, q, A, G, b, h, B, H = return_standard_form_no_value(prob, solver = solver)
+    Q = return_q_map(prob, solver)
+    bool_idx = return_bool_idx(prob, solver)
     
     x = cp.Variable(P.shape[1])
     parameters = {
@@ -151,7 +277,10 @@ def return_standard_form_in_cvxpy(prob):
         } # paramters for the standard QP
     
     # formulate the cvxpy problem
-    objective = cp.Minimize(0.5 * cp.quad_form(x, P) + q @ x)
+    q_ = q
+    for key in Q.keys():
+        q_ = q_ + Q[key] @ parameters[key]
+    objective = cp.Minimize(0.5 * cp.quad_form(x, P) + q_ @ x)
     constraints = []
     if len(bool_idx) > 0:
         # set the integer (binary) constraints
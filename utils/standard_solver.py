@@ -0,0 +1,191 @@
+"""
+solve the standard form QP/LP directly with the solver interface (OSQP, HiGHS or Clarabel)
+the solver model is built once from the standard form matrices,
+and only the right-hand sides b + \sum B_i z_i and h + \sum H_i z_i 
+(and the linear cost q + \sum Q_i z_i if the costs are parameters) are updated for each sample
+"""
+
+import numpy as np
+import scipy.sparse as sp
+
+OSQP_STATUS = {'solved': 'optimal', 'solved inaccurate': 'optimal_inaccurate',
+                'primal infeasible': 'infeasible', 'dual infeasible': 'unbounded',
+                'maximum iterations reached': 'user_limit'}
+CLARABEL_STATUS = {'Solved': 'optimal', 'AlmostSolved': 'optimal_inaccurate',
+                    'PrimalInfeasible': 'infeasible', 'DualInfeasible': 'unbounded'}
+
+class StandardFormSolver:
+    
+    def __init__(self, compiled: dict, solver: str = 'OSQP', **solver_options):
+        """
+        compiled: the standard form from utils.problem_cache.compile_problem (or load_compiled)
+            min 1/2 x^T P x + (q + \sum Q_i z_i)^T x
+            s.t. A x = b + \sum B_i z_i
+                 G x <= h + \sum H_i z_i
+                 x[bool_idx] in {0, 1}
+        solver: OSQP, HIGHS or CLARABEL. Only HIGHS supports the boolean variables (without quadratic cost)
+        solver_options: the settings passed to the solver
+        """
+        
+        self.solver = solver.upper()
+        self.var_idx = compiled['var_idx']
+        self.bool_idx = list(compiled['bool_idx'])
+        
+        P = sp.csc_matrix(compiled['P'])
+        self.q = np.asarray(compiled['q'], dtype = float)
+        A, G = sp.csr_matrix(compiled['A']), sp.csr_matrix(compiled['G'])
+        self.no_eq = A.shape[0]
+        self.no_var = A.shape[1]
+        
+        # stack the equality and inequality so that the right-hand sides are updated by one product
+        self.param_names = list(compiled['B'].keys())
+        self.rhs = np.concatenate([compiled['b'], compiled['h']])
+        self.rhs_map = sp.vstack([
+            sp.hstack([sp.csr_matrix(compiled['B'][name]) for name in self.param_names]),
+            sp.hstack([sp.csr_matrix(compiled['H'][name]) for name in self.param_names])
+            ]).tocsr()
+        self.P = P
+        
+        # the parametric linear cost, and the default values of the parameters not given to solve
+        self.cost_names = list(compiled.get('Q', {}).keys())
+        self.q_map = sp.hstack([sp.csr_matrix(compiled['Q'][name]) for name in self.cost_names]).tocsr() \
+                    if len(self.cost_names) > 0 else None
+        self.defaults = compiled.get('defaults', {})
+        
+        if len(self.bool_idx) > 0 and not (self.solver == 'HIGHS' and P.nnz == 0):
+            raise ValueError(f"{self.solver} does not support the boolean variables in this problem")
+        
+        C = sp.vstack([A, G]).tocsc()
+        getattr(self, f'_setup_{self.solver.lower()}')(P, C, solver_options)
+    
+    def _setup_osqp(self, P, C, solver_options):
+        import osqp
+        # the same default tolerance as cvxpy
+        solver_options = {'eps_abs': 1e-5, 'eps_rel': 1e-5, 'max_iter': 10000, 'verbose': False, **solver_options}
+        lower, upper = self._bounds(self.rhs)
+        self.model = osqp.OSQP()
+        self.model.setup(sp.triu(P, format = 'csc'), self.q, C, lower, upper, **solver_options)
+    
+    def _setup_highs(self, P, C, solver_options):
+        import highspy
+        self.model = highspy.Highs()
+        self.model.setOptionValue('output_flag', False)
+        for key, value in solver_options.items():
+            self.model.setOptionValue(key, value)
+        
+        lower, upper = self._bounds(self.rhs)
+        lp = highspy.HighsLp()
+        lp.num_col_, lp.num_row_ = self.no_var, C.shape[0]
+        lp.col_cost_ = self.q
+        lp.col_lower_ = np.full(self.no_var, -highspy.kHighsInf)
+        lp.col_upper_ = np.full(self.no_var, highspy.kHighsInf)
+        lp.row_lower_ = np.where(np.isinf(lower), -highspy.kHighsInf, lower)
+        lp.row_upper_ = upper
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+        lp.a_matrix_.start_, lp.a_matrix_.index_, lp.a_matrix_.value_ = C.indptr, C.indices, C.data
+        if len(self.bool_idx) > 0:
+            integrality = np.full(self.no_var, highspy.HighsVarType.kContinuous)
+            integrality[self.bool_idx] = highspy.HighsVarType.kInteger
+            lp.integrality_ = integrality.tolist()
+            lp.col_lower_[self.bool_idx], lp.col_upper_[self.bool_idx] = 0, 1
+        self.model.passModel(lp)
+        
+        if P.nnz > 0:
+            # lower triangular part in the column-wise format
+            P_lower = sp.tril(P, format = 'csc')
+            hessian = highspy.HighsHessian()
+            hessian.dim_ = self.no_var
+            hessian.format_ = highspy.HessianFormat.kTriangular
+            hessian.start_, hessian.index_, hessian.value_ = P_lower.indptr, P_lower.indices, P_lower.data
+            self.model.passHessian(hessian)
+        
+        self.row_idx = np.arange(C.shape[0], dtype = np.int32)
+    
+    def _setup_clarabel(self, P, C, solver_options):
+        import clarabel
+        settings = clarabel.DefaultSettings()
+        settings.verbose = False
+        settings.presolve_enable = False # ! keep the rows so that b can be updated
+        for key, value in solver_options.items():
+            setattr(settings, key, value)
+        cones = [clarabel.ZeroConeT(self.no_eq), clarabel.NonnegativeConeT(C.shape[0] - self.no_eq)]
+        self.model = clarabel.DefaultSolver(sp.triu(P, format = 'csc'), self.q, C, self.rhs, cones, settings)
+    
+    def _bounds(self, rhs):
+        """lower and upper bounds of [A; G] x"""
+        lower = rhs.copy()
+        lower[self.no_eq:] = -np.inf
+        return lower, rhs
+    
+    def return_rhs(self, params_val_dict):
+        """[b + \sum B_i z_i; h + \sum H_i z_i] for the parameter values"""
+        return self.rhs + self.rhs_map @ self._stack(params_val_dict, self.param_names)
+    
+    def return_q(self, params_val_dict):
+        """q + \sum Q_i z_i for the parameter values"""
+        if self.q_map is None:
+            return self.q
+        return self.q + self.q_map @ self._stack(params_val_dict, self.cost_names)
+    
+    def _stack(self, params_val_dict, names):
+        """the stacked values of the parameters, the defaults for the parameters not given"""
+        return np.concatenate([np.asarray(params_val_dict[name] if name in params_val_dict else self.defaults[name], 
+                                        dtype = float).ravel() for name in names])
+    
+    def solve(self, params_val_dict: dict, T = None, reshaped = False):
+        """
+        update the right-hand sides (and the linear cost) and solve
+        params_val_dict: {param_name: value}, the same keys as the parameters of the cvxpy problem,
+            the parameters with the default values (see compile_problem) can be omitted
+        return:
+            - sol: {var_name: value}, the same as Operation.get_sol
+            - status: the solver status in the cvxpy convention, e.g. 'optimal' and 'infeasible'
+            - value: the objective value 1/2 x^T P x + q^T x, nan if not solved
+        """
+        rhs = self.return_rhs(params_val_dict)
+        q = None
+        if self.q_map is not None:
+            q = self.return_q(params_val_dict)
+        x, status = getattr(self, f'_solve_{self.solver.lower()}')(rhs, q)
+        
+        if x is None:
+            return None, status, np.nan
+        
+        value = 0.5 * x @ (self.P @ x) + (self.q if q is None else q) @ x
+        sol = {}
+        for name, (start_idx, size) in self.var_idx.items():
+            sol[name] = x[start_idx:start_idx + size] if not reshaped else x[start_idx:start_idx + size].reshape(T, -1)
+        
+        return sol, status, value
+    
+    def _solve_osqp(self, rhs, q = None):
+        lower, upper = self._bounds(rhs)
+        if q is not None:
+            self.model.update(q = q)
+        self.model.update(l = lower, u = upper)
+        results = self.model.solve()
+        status = OSQP_STATUS.get(results.info.status, results.info.status)
+        return (results.x if status in ['optimal', 'optimal_inaccurate'] else None), status
+    
+    def _solve_highs(self, rhs, q = None):
+        import highspy
+        lower, upper = self._bounds(rhs)
+        lower = np.where(np.isinf(lower), -highspy.kHighsInf, lower)
+        if q is not None:
+            self.model.changeColsCost(self.no_var, np.arange(self.no_var, dtype = np.int32), q)
+        self.model.changeRowsBounds(len(self.row_idx), self.row_idx, lower, upper)
+        self.model.run()
+        model_status = self.model.getModelStatus()
+        if model_status == highspy.HighsModelStatus.kOptimal:
+            return np.array(self.model.getSolution().col_value), 'optimal'
+        elif model_status == highspy.HighsModelStatus.kInfeasible:
+            return None, 'infeasible'
+        return None, self.model.modelStatusToString(model_status).lower()
+    
+    def _solve_clarabel(self, rhs, q = None):
+        if q is not None:
+            self.model.update(q = q)
+        self.model.update(b = rhs)
+        solution = self.model.solve()
+        status = CLARABEL_STATUS.get(str(solution.status), str(solution.status))
+        return (np.array(solution.x) if status in ['optimal', 'optimal_inaccurate'] else None), status